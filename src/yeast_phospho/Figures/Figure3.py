@@ -1,11 +1,11 @@
 import igraph
-import pickle
 import numpy as np
 import seaborn as sns
 import matplotlib.pyplot as plt
 from yeast_phospho import wd
 from matplotlib.gridspec import GridSpec
 from pandas import DataFrame, read_csv, melt, concat
+from yeast_phospho.results import RegressionStore
 from yeast_phospho.utilities import get_proteins_name, get_metabolites_name
 
 
@@ -31,15 +31,13 @@ tf_activity = tf_activity[tf_activity.std(1) > .4]
 
 
 # Linear regression results
-with open('%s/tables/linear_regressions.pickle' % wd, 'rb') as handle:
-    lm_res = pickle.load(handle)
+lm_res = RegressionStore('%s/tables/linear_regressions.npz' % wd)
 
 
-lm_betas_kinases = DataFrame([i[1][3] for i in lm_res if i[1][0] == 'Kinases' and i[1][1] == 'Dynamic' and i[1][2] == 'without'][0])
-lm_betas_tfs = DataFrame([i[1][3] for i in lm_res if i[1][0] == 'TFs' and i[1][1] == 'Dynamic' and i[1][2] == 'without'][0])
+lm_betas_kinases = lm_res.betas('Kinases', 'Dynamic', 'without')
+lm_betas_tfs = lm_res.betas('TFs', 'Dynamic', 'without')
 
-lm_cor = [(ft, dt, f, mt, ct, c) for c in lm_res for ft, dt, f, mt, ct, c in c[0]]
-lm_cor = DataFrame(lm_cor, columns=['feature', 'dataset', 'variable', 'growth', 'corr_type', 'cor'])
+lm_cor = lm_res.correlations()
 print '[INFO] Data-sets + Linear regression results imported'
 
 
@@ -1,9 +1,10 @@
 import numpy as np
 import seaborn as sns
 import matplotlib.pyplot as plt
+from multiprocessing import cpu_count
 from yeast_phospho import wd
-from pandas import DataFrame, read_csv
-from yeast_phospho.utilities import get_kinases_targets, estimate_activity_with_sklearn, get_proteins_name
+from pandas import read_csv
+from yeast_phospho.utilities import get_kinases_targets, estimate_activities_with_ridge, get_proteins_name
 
 
 # Import growth rates
@@ -11,14 +12,16 @@ growth = read_csv('%s/files/strain_relative_growth_rate.txt' % wd, sep='\t', ind
 ko_strains = list(growth.index)
 
 # Import kinase targets
-k_targets = get_kinases_targets()
+k_targets = get_kinases_targets(sparse=True)
+
+n_jobs = cpu_count()
 
 
 # -- Estimate kinase activities steady-state
 phospho_df = read_csv('%s/tables/pproteomics_steady_state.tab' % wd, sep='\t', index_col=0).loc[:, ko_strains].dropna(how='all', axis=1)
 
 # Estimate kinase activities
-k_activity = DataFrame({c: estimate_activity_with_sklearn(k_targets, phospho_df[c].dropna()) for c in phospho_df})
+k_activity = estimate_activities_with_ridge(k_targets, phospho_df, n_jobs=n_jobs)
 k_activity.to_csv('%s/tables/kinase_activity_steady_state.tab' % wd, sep='\t')
 
 
@@ -27,7 +30,7 @@ k_activity.to_csv('%s/tables/kinase_activity_steady_state.tab' % wd, sep='\t')
 phospho_df_dyn = read_csv('%s/tables/pproteomics_dynamic.tab' % wd, sep='\t', index_col=0)
 
 # Estimate kinase activities
-k_activity_dyn = DataFrame({c: estimate_activity_with_sklearn(k_targets, phospho_df_dyn[c].dropna()) for c in phospho_df_dyn})
+k_activity_dyn = estimate_activities_with_ridge(k_targets, phospho_df_dyn, n_jobs=n_jobs)
 k_activity_dyn.to_csv('%s/tables/kinase_activity_dynamic.tab' % wd, sep='\t')
 
 
@@ -41,6 +44,6 @@ phospho_df_comb_dyn = phospho_df_comb_dyn[[i.split('_')[0] in acc for i in phosp
 phospho_df_comb_dyn.index = ['%s_%s' % (acc[i.split('_')[0]], i.split('_')[1]) for i in phospho_df_comb_dyn.index]
 phospho_df_comb_dyn = phospho_df_comb_dyn[[c for c in phospho_df_comb_dyn if 'NaCl+alpha' not in c]]
 
-k_activity_comb_dyn = DataFrame({c: estimate_activity_with_sklearn(k_targets, phospho_df_comb_dyn[c].dropna()) for c in phospho_df_comb_dyn})
+k_activity_comb_dyn = estimate_activities_with_ridge(k_targets, phospho_df_comb_dyn, n_jobs=n_jobs)
 k_activity_comb_dyn.to_csv('%s/tables/kinase_activity_dynamic_combination.tab' % wd, sep='\t')
 print '[INFO] Activities estimated'
@@ -1,8 +1,9 @@
 import seaborn as sns
 import matplotlib.pyplot as plt
+from multiprocessing import cpu_count
 from yeast_phospho import wd
-from pandas import DataFrame, read_csv
-from yeast_phospho.utilities import get_tfs_targets_filtered, estimate_activity_with_sklearn
+from pandas import read_csv
+from yeast_phospho.utilities import get_tfs_targets_filtered, estimate_activities_with_ridge
 
 
 # Import growth rates
@@ -10,14 +11,16 @@ growth = read_csv('%s/files/strain_relative_growth_rate.txt' % wd, sep='\t', ind
 ko_strains = list(growth.index)
 
 # Import TF targets
-tf_targets = get_tfs_targets_filtered()
+tf_targets = get_tfs_targets_filtered(sparse=True)
+
+n_jobs = cpu_count()
 
 
 # -- Estimate TFs activities steady-state
 trans = read_csv('%s/tables/transcriptomics_steady_state.tab' % wd, sep='\t', index_col=0).loc[:, ko_strains].dropna(how='all', axis=1)
 
 # Estimate TFs activities
-tf_activity = DataFrame({c: estimate_activity_with_sklearn(tf_targets, trans[c]) for c in trans})
+tf_activity = estimate_activities_with_ridge(tf_targets, trans, n_jobs=n_jobs)
 tf_activity.to_csv('%s/tables/tf_activity_steady_state.tab' % wd, sep='\t')
 
 
@@ -25,6 +28,6 @@ tf_activity.to_csv('%s/tables/tf_activity_steady_state.tab' % wd, sep='\t')
 dyn_trans_df = read_csv('%s/tables/transcriptomics_dynamic.tab' % wd, sep='\t', index_col=0)
 
 # Estimate TFs activities
-tf_activity_dyn = DataFrame({c: estimate_activity_with_sklearn(tf_targets, dyn_trans_df[c]) for c in dyn_trans_df})
+tf_activity_dyn = estimate_activities_with_ridge(tf_targets, dyn_trans_df, n_jobs=n_jobs)
 tf_activity_dyn.to_csv('%s/tables/tf_activity_dynamic.tab' % wd, sep='\t')
 print '[INFO] Activities estimated'
@@ -57,22 +57,22 @@ kinases_names = {acc_name[i] for i in k_activity_dyn_ng_gsea.index}
 # -- Linear regressions
 lm_res, lm_feat = [], []
 for (x, y, feature_type, method_type) in comparisons:
-    for m in metabolomics_dyn_ng.index:
-        for c in conditions:
-            ys = y.ix[m, [i for i in y if not i.startswith(c)]]
-            xs = x[ys.index].T
+    for c in conditions:
+        ys = y.ix[metabolomics_dyn_ng.index, [i for i in y if not i.startswith(c)]].T
+        xs = x[ys.index].T
 
-            yss = y.ix[m, [i for i in y if i.startswith(c)]]
-            xss = x[yss.index].T
+        yss = y.ix[metabolomics_dyn_ng.index, [i for i in y if i.startswith(c)]].T
+        xss = x[yss.index].T
 
-            lm = ElasticNet(alpha=0.01).fit(xs, ys)
-            pred = Series(lm.predict(xss), index=xss.index)
+        # All metabolites fitted at once sharing the Gram matrix of the features
+        lm = ElasticNet(alpha=0.01, precompute=True).fit(xs, ys)
+        pred = DataFrame(lm.predict(xss), index=xss.index, columns=ys.columns)
 
-            features = dict(zip(*(xs.columns, lm.coef_)))
-            for f in features:
-                lm_feat.append((feature_type, method_type, m, c, f, features[f]))
+        for m, coef in zip(*(ys.columns, lm.coef_)):
+            for f, v in zip(*(xs.columns, coef)):
+                lm_feat.append((feature_type, method_type, m, c, f, v))
 
-            lm_res.append((feature_type, method_type, m, c, pearson(yss, pred)[0]))
+            lm_res.append((feature_type, method_type, m, c, pearson(yss[m], pred[m])[0]))
 
 lm_res = DataFrame(lm_res, columns=['feature', 'method', 'ion', 'condition', 'pearson'])
 lm_res['metabolite'] = [met_name[i] for i in lm_res['ion']]
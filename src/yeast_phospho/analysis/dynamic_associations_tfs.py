@@ -6,20 +6,23 @@ import matplotlib.pyplot as plt
 import itertools as it
 from yeast_phospho import wd
 from scipy.stats.stats import pearsonr
-from sklearn.metrics import roc_curve, auc, precision_recall_curve, average_precision_score
 from scipy.stats.distributions import hypergeom
 from sklearn.decomposition.pca import PCA
 from statsmodels.stats.multitest import multipletests
-from sklearn.linear_model import ElasticNetCV, RidgeCV
-from sklearn.cross_validation import ShuffleSplit
+from sklearn.linear_model import RidgeCV
 from sklearn.metrics.regression import r2_score
 from pandas import DataFrame, Series, read_csv, concat, pivot_table
+from multiprocessing import cpu_count
+from yeast_phospho.regression import elastic_net_split, predict_split, stability_selection, stability_summary
+from yeast_phospho.parallel import run_tasks, condition_seed, data_digest
+from yeast_phospho.benchmark import interaction_labels, benchmark, roc_curves, pr_curves
 from yeast_phospho.utilities import get_metabolites_name, get_proteins_name, regress_out
 
 
 # -- General vars
 label_order = ['N_downshift', 'N_upshift', 'Rapamycin']
 palette = {'Rapamycin': '#D25A2B', 'N_upshift': '#5EACEC', 'N_downshift': '#4783C7'}
+seed, n_jobs, n_resamples = 0, cpu_count(), 200
 
 
 # -- Import IDs maps
@@ -49,36 +52,45 @@ conditions, tfs, ions = ['N_downshift', 'N_upshift', 'Rapamycin'], list(xs.index
 
 # -- Predict experiments
 # condition, ion = 'N_upshift', '188.0600'
-lm_res = []
-for ion in ions:
-    for condition in conditions:
-        # Define train and test conditions
-        train, test = [c for c in xs if not re.match(condition, c)], [c for c in xs if re.match(condition, c)]
+# Digest of the data of every condition, a held-out condition task is keyed by the conditions it is trained on
+digests = {condition: data_digest(concat([xs.ix[tfs], ys.ix[ions]])[[c for c in xs if re.match(condition, c)]]) for condition in conditions}
+
+tasks, ys_test, xs_test = [], {}, {}
+for condition in conditions:
+    # Define train and test conditions
+    train, test = [c for c in xs if not re.match(condition, c)], [c for c in xs if re.match(condition, c)]
+
+    ys_train, xs_train = ys.ix[ions, train].T, xs.ix[tfs, train].T
+    ys_test[condition], xs_test[condition] = ys.ix[ions, test].T, xs.ix[tfs, test].T
 
-        ys_train, xs_train = ys.ix[ion, train], xs.ix[tfs, train].T
-        ys_test, xs_test = ys.ix[ion, test], xs.ix[tfs, test].T
+    # Standardization
+    xs_train /= xs_train.std()
+    xs_test[condition] /= xs_test[condition].std()
 
-        # Standardization
-        xs_train /= xs_train.std()
-        xs_test /= xs_test.std()
+    ys_train -= ys_train.mean()
+    ys_test[condition] -= ys_test[condition].mean()
 
-        ys_train -= ys_train.mean()
-        ys_test -= ys_test.mean()
+    tasks.append((condition, {'x_train': xs_train, 'y_train': ys_train, 'seed': condition_seed(seed, condition)}, {c: digests[c] for c in conditions if c != condition}))
 
-        # Elastic Net ShuffleSplit cross-validation
-        cv = ShuffleSplit(len(ys_train), n_iter=10, test_size=.2)
-        lm = ElasticNetCV(cv=cv).fit(xs_train, ys_train)
+# Elastic Net ShuffleSplit cross-validation of all ions at once, one checkpointed task per held-out condition
+fits = run_tasks(elastic_net_split, tasks, '%s/cache/lm_dynamic_tfs_gsea_predictions.pickle' % wd, n_jobs)
 
-        # Evaluate predictions
-        meas, pred = ys_test[test].values, lm.predict(xs_test.ix[test])
+lm_res = []
+for condition in conditions:
+    coef, intercept, alphas = fits[condition]
+    preds = predict_split(coef, intercept, xs_test[condition])
+
+    # Evaluate predictions
+    for ion in ions:
+        meas, pred = ys_test[condition][ion].values, preds[ion].values
 
         rsquared = r2_score(meas, pred)
         cor, pval = pearsonr(meas, pred)
 
         # Store results
-        lm_res.append((ion, condition, cor, pval, rsquared, lm))
+        lm_res.append((ion, condition, cor, pval, rsquared, alphas[ion]))
 
-lm_res = DataFrame(lm_res, columns=['ion', 'condition', 'cor', 'pval', 'rsquared', 'lm'])
+lm_res = DataFrame(lm_res, columns=['ion', 'condition', 'cor', 'pval', 'rsquared', 'alpha'])
 print lm_res.sort('rsquared')
 
 # Plot General Linear regression boxplots
@@ -119,31 +131,15 @@ print '[INFO] Plot done'
 
 
 # -- Predict associations
-# Run Linear models
-lm_f_res = []
-# train, _ = list(ShuffleSplit(len(ys.ix[ion]), test_size=.2))[0]
-for ion in ions:
-    for train, _ in ShuffleSplit(len(ys.ix[ion]), test_size=.2, n_iter=20):
-        ys_train, xs_train = ys.ix[ion, train], xs.ix[tfs, train].T
+# Stability selection: Elastic Net of all ions on every resample of the conditions, checkpointed per resample
+x = xs.ix[tfs].T
+coefs = stability_selection(x, ys.ix[ions, x.index].T, '%s/cache/lm_dynamic_tfs_gsea_stability.pickle' % wd, n_resamples=n_resamples, seed=seed, n_jobs=n_jobs)
 
-        # Standardization
-        xs_train /= xs_train.std()
-        ys_train -= ys_train.mean()
+lm_f_res = stability_summary(coefs, ions, tfs).rename(columns={'response': 'ion'})
 
-        # Elastic Net ShuffleSplit cross-validation
-        cv = ShuffleSplit(len(ys_train), test_size=.2, n_iter=10)
-        lm = ElasticNetCV(cv=cv).fit(xs_train, ys_train)
-
-        # Store results
-        for f, v in zip(*(tfs, lm.coef_)):
-            lm_f_res.append((ion, f, v))
-
-lm_f_res = DataFrame(lm_f_res, columns=['ion', 'feature', 'coef'])
-lm_f_res['coef_abs'] = [abs(i) for i in lm_f_res['coef']]
-
-lm_f_res['biogrid'] = [int((f, i) in interactions['tfs']['biogrid']) for i, f in lm_f_res[['ion', 'feature']].values]
-lm_f_res['string'] = [int((f, i) in interactions['tfs']['string']) for i, f in lm_f_res[['ion', 'feature']].values]
-lm_f_res['targets'] = [int((f, i) in interactions['tfs']['targets']) for i, f in lm_f_res[['ion', 'feature']].values]
+labels = interaction_labels(lm_f_res['feature'], lm_f_res['ion'], {source: interactions['tfs'][source] for source in ['biogrid', 'string', 'targets']})
+for source in labels:
+    lm_f_res[source] = labels[source].astype(int).values
 
 lm_f_res['Transcription-factors'] = [acc_name[c] for c in lm_f_res['feature']]
 lm_f_res['Metabolites'] = [met_name[c] for c in lm_f_res['ion']]
@@ -153,14 +149,17 @@ print lm_f_res.sort('coef_abs', ascending=False)
 
 
 roc_table = lm_f_res.groupby(['Metabolites', 'Transcription-factors'])['coef_abs', 'targets', 'biogrid', 'string'].median().reset_index()
+roc_labels = roc_table[['targets', 'biogrid', 'string']].astype(bool)
+roc_bench, roc_curve_sources = benchmark(roc_table['coef_abs'], roc_labels), roc_curves(roc_table['coef_abs'], roc_labels)
+print roc_bench
 
 # AROC
 source_pal = {'string': '#e74c3c', 'biogrid': '#34495e', 'targets': '#2ecc71'}
 
 sns.set(style='ticks', context='paper', font_scale=.75, rc={'axes.linewidth': .3, 'xtick.major.width': .3, 'ytick.major.width': .3})
 for source in ['targets', 'biogrid', 'string']:
-    curve_fpr, curve_tpr, thresholds = roc_curve(roc_table[source], roc_table['coef_abs'])
-    curve_auc = auc(curve_fpr, curve_tpr)
+    curve_fpr, curve_tpr = roc_curve_sources[source]
+    curve_auc = roc_bench.ix[source, 'auc']
 
     plt.plot(curve_fpr, curve_tpr, label='%s (area = %0.2f)' % (source, curve_auc), color=source_pal[source])
 
@@ -179,11 +178,13 @@ print '[INFO] Plot done'
 
 # APRC
 sns.set(style='ticks', context='paper', font_scale=.75, rc={'axes.linewidth': .3, 'xtick.major.width': .3, 'ytick.major.width': .3})
+pr_curve_sources = pr_curves(roc_table['coef_abs'], roc_labels)
+
 for source in ['targets', 'biogrid', 'string']:
-    curve_fpr, curve_tpr, _ = precision_recall_curve(roc_table[source], roc_table['coef_abs'])
-    curve_auc = average_precision_score(roc_table[source], roc_table['coef_abs'])
+    curve_recall, curve_precision = pr_curve_sources[source]
+    curve_auc = roc_bench.ix[source, 'aupr']
 
-    plt.plot(curve_fpr, curve_tpr, label='%s (area = %0.2f)' % (source, curve_auc), color=source_pal[source])
+    plt.plot(curve_recall, curve_precision, label='%s (area = %0.2f)' % (source, curve_auc), color=source_pal[source])
 
 sns.despine(trim=True)
 plt.xlabel('Recal')
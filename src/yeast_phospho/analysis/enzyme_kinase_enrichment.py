@@ -7,14 +7,14 @@ import statsmodels.api as sm
 import itertools as it
 from yeast_phospho import wd
 from scipy.stats.stats import pearsonr
-from sklearn.metrics import roc_curve, auc
-from scipy.stats.distributions import hypergeom
-from pymist.reader.sbml_reader import read_sbml_model
 from pandas import DataFrame, read_csv, pivot_table, melt, Series
 from sklearn.linear_model import ElasticNet, Ridge, RidgeCV
 from sklearn.cross_validation import LeaveOneOut, ShuffleSplit
 from sklearn.feature_selection import SelectKBest, f_regression
 from sklearn.metrics.pairwise import euclidean_distances, manhattan_distances, linear_kernel
+from yeast_phospho.phosphogrid import load_phosphogrid
+from yeast_phospho.benchmark import pair_labels, benchmark, roc_curves, enrichment
+from yeast_phospho.metabolic_model import load_metabolic_model
 from yeast_phospho.utilities import metric, pearson, get_proteins_name, get_metabolites_name
 
 
@@ -45,20 +45,8 @@ annot = {m: annot[m] for m in annot if annot[m] in metabolomics.index}
 
 
 # -- Import metabolic model
-model = read_sbml_model('/Users/emanuel/Projects/resources/metabolic_models/iMM904.v1.xml')
-
-# Remove extracellular metabolites
-s_matrix = model.get_stoichiometric_matrix()
-s_matrix = s_matrix[[not i.endswith('_b') for i in s_matrix.index]]
-
-# Remove biomass reactions
-s_matrix = s_matrix.drop('R_biomass_SC5_notrace', axis=1)
-
-# Build {metabolite: protein} dict
-m_dict = {i: {r for r in s_matrix.loc[i, s_matrix.ix[i] != 0].index if not r.startswith('R_EX_')} for i in s_matrix.index}
-m_dict = {m: {g for r in m_dict[m] for g in model.get_reaction_genes(r)} for m in m_dict}
-m_dict = {m: {g for x in m_dict if x[2:-2] == m for g in m_dict[x]} for m in annot}
-m_dict = {m: m_dict[m] for m in m_dict if 0 < len(m_dict[m])}
+# Compiled once, extracellular metabolites, exchange and biomass reactions are ignored
+model = load_metabolic_model('/Users/emanuel/Projects/resources/metabolic_models/iMM904.v1.xml')
 
 # Filter highly connected metabolites
 hmet = {
@@ -70,14 +58,9 @@ hmet = {
     'so4', 'udpg', 'dudp',
     'hdca'
 }
-m_dict = {m: m_dict[m] for m in m_dict if m not in hmet}
-
-# Build {protein: metabolite} dict
-m_genes = {g for m in m_dict for g in m_dict[m]}
-g_dict = {g: {m for m in m_dict if g in m_dict[m]} for g in m_genes}
 
 # Build {protein: ion} dict
-i_dict = {g: {annot[m] for m in g_dict[g]} for g in g_dict}
+i_dict = model.gene_ions(annot, hmet)
 
 
 # -- Read protein interactions dbs
@@ -88,9 +71,7 @@ for bkg_type in ['biogrid', 'string', 'phosphogrid']:
         db = {(s, t) for s, t in db.values}
 
     elif bkg_type == 'phosphogrid':
-        db = read_csv('%s/files/PhosphoGrid.txt' % wd, sep='\t')[['KINASES_ORFS', 'PHOSPHATASES_ORFS', 'ORF_NAME']]
-        db['regulator'] = db['KINASES_ORFS'] + '|' + db['PHOSPHATASES_ORFS']
-        db = {(p, s) for ps, s in db[['regulator', 'ORF_NAME']].values for p in ps.split('|') if p != '-' and s != '-'}
+        db = load_phosphogrid().regulators_proteins()
 
     elif bkg_type == 'string':
         db = read_csv('%s/files/4932.protein.links.v9.1.txt' % wd, sep=' ')
@@ -166,7 +147,7 @@ for xs, ys, ft, dt, gt in comparisons:
     # info_table = info_table[[i in db_ions for i in info_table['metabolite']]]
 
     # Kinase/Enzyme interactions via metabolite correlations
-    info_table['TP'] = [int(i in db) for i in zip(info_table['feature'], info_table['metabolite'])]
+    info_table['TP'] = pair_labels(info_table['feature'], info_table['metabolite'], db).astype(int)
 
     info_table = info_table.dropna()
     print '[INFO] TP (%s): %d / %d' % (description, info_table['TP'].sum(), info_table.shape[0])
@@ -175,8 +156,8 @@ for xs, ys, ft, dt, gt in comparisons:
     # ROC plot analysis
     ax = plot[pos]
     for roc_metric in ['coef']:
-        curve_fpr, curve_tpr, thresholds = roc_curve(info_table['TP'], info_table[roc_metric])
-        curve_auc = auc(curve_fpr, curve_tpr)
+        curve_fpr, curve_tpr = roc_curves(info_table[roc_metric], info_table[['TP']].astype(bool))['TP']
+        curve_auc = benchmark(info_table[roc_metric], info_table[['TP']].astype(bool)).ix['TP', 'auc']
 
         ax.plot(curve_fpr, curve_tpr, label='%s (area = %0.2f)' % (roc_metric, curve_auc))
 
@@ -192,16 +173,18 @@ for xs, ys, ft, dt, gt in comparisons:
     # M: total number of objects,
     # n: total number of type I objects
     # N: total number of type I objects drawn without replacement
-    kinase_enzyme_all = set(it.product(all_kinases if ft == 'Kinases' else all_tfs, all_metabolites))
-    kinase_enzyme_true = {i for i in kinase_enzyme_all if i in db}
-    kinase_enzyme_thres = {(f, m) for f, m in info_table.loc[info_table['coef'] > .5, ['feature', 'metabolite']].values}
-
-    pval = hypergeom.sf(
-        len(kinase_enzyme_thres.intersection(kinase_enzyme_true)),
-        len(kinase_enzyme_all),
-        len(kinase_enzyme_all.intersection(kinase_enzyme_true)),
-        len(kinase_enzyme_thres)
-    )
+    bkg_features, bkg_metabolites = list(all_kinases if ft == 'Kinases' else all_tfs), list(all_metabolites)
+    bkg_true = pair_labels(np.repeat(bkg_features, len(bkg_metabolites)), np.tile(bkg_metabolites, len(bkg_features)), db).sum()
+
+    # Pairs drawn from the background, counted once
+    bkg_table = info_table[info_table['feature'].isin(bkg_features) & info_table['metabolite'].isin(bkg_metabolites)]
+    bkg_table = bkg_table.drop_duplicates(['feature', 'metabolite'])
+
+    pval = enrichment(
+        bkg_table['coef'], bkg_table[['TP']].astype(bool), [.5],
+        population=len(bkg_features) * len(bkg_metabolites),
+        positives=[bkg_true]
+    ).ix[.5, 'TP']
     print pval
 
 plt.savefig('%s/reports/kinase_enzyme_enrichment_metabolomics.pdf' % wd, bbox_inches='tight')
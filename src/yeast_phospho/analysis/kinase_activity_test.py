@@ -8,7 +8,10 @@ from pandas.stats.misc import zscore
 from sklearn.linear_model import Ridge
 from pandas import DataFrame, Series, read_csv, melt, pivot_table, concat
 from yeast_phospho.utilities import pearson, get_kinases_targets, get_protein_sequence
-from yeast_phospho.utilities import read_fasta, flanking_sequence, position_weight_matrix, similarity_score_matrix, AA_PRIORS_YEAST
+from yeast_phospho.fasta import IndexedFasta
+from yeast_phospho.utilities import flanking_sequence
+from yeast_phospho.incidence import Incidence
+from yeast_phospho.motifs import load_motif_scanner
 
 acc_name = read_csv('/Users/emanuel/Projects/resources/yeast/yeast_uniprot.txt', sep='\t', index_col=0)
 acc_name.index = [i.split(';')[0] for i in acc_name.index]
@@ -19,40 +22,25 @@ acc_name = acc_name['oln'].to_dict()
 data = read_csv('%s/tables/pproteomics_steady_state.tab' % wd, sep='\t', index_col=0)
 data_proteins = {i.split('_')[0] for i in data.index}
 
-sequences = read_fasta('%s/files/orf_trans_all.fasta' % wd)
+sequences = IndexedFasta('%s/files/orf_trans_all.fasta' % wd)
 
 stringdb = read_csv('/Users/emanuel/Downloads/4932.protein.links.v10.txt', sep=' ')
 stringdb = stringdb[stringdb['combined_score'] > 500]
-stringdb['protein1'] = [i.split('.')[1] for i in stringdb['protein1']]
-stringdb['protein2'] = [i.split('.')[1] for i in stringdb['protein2']]
-stringdb = stringdb[[p1 in data_proteins and p2 in data_proteins for p1, p2 in stringdb[['protein1', 'protein2']].values]]
-stringdb = stringdb[[p1 in sequences and p2 in sequences for p1, p2 in stringdb[['protein1', 'protein2']].values]]
+stringdb['protein1'] = stringdb['protein1'].str.split('.').str[1]
+stringdb['protein2'] = stringdb['protein2'].str.split('.').str[1]
 
+proteins = list(data_proteins.intersection(sequences))
+stringdb = stringdb[stringdb['protein1'].isin(proteins) & stringdb['protein2'].isin(proteins)]
 
-phosphogrid = get_kinases_targets()
 
 flanking_targets_all = flanking_sequence(sequences, {i for i in data.index if len(i.split('_')) == 2}, flank=7)
 
+# Kinases PWMs (cached) and STRING interactors
+motifs = load_motif_scanner(flank=7)
 
-def calculate_ssm(kinase):
-    psites = set(phosphogrid[phosphogrid[kinase] != 0].index)
+interactors = Incidence.from_interactions(concat([stringdb['protein2'], stringdb['protein1']]), concat([stringdb['protein1'], stringdb['protein2']]))
 
-    flanking_targets = flanking_sequence(sequences, psites, flank=7)
-
-    pwm, ic = position_weight_matrix(flanking_targets, AA_PRIORS_YEAST)
-
-    interactions = {list(set([p1, p2]) - set([kinase]))[0] for p1, p2 in stringdb[['protein1', 'protein2']].values if kinase in [p1, p2]}
-
-    ssm = similarity_score_matrix({p: flanking_targets_all[p] for p in flanking_targets_all if p.split('_')[0] in interactions}, pwm, ic)
-
-    if len(ssm) != 0:
-        ssm.index = ssm.index.droplevel(1)
-        return ssm.to_dict()
-
-    else:
-        return {}
-
-k_targets = DataFrame({k: calculate_ssm(k) for k in phosphogrid}).replace(np.NaN, .0)
+k_targets = motifs.score(flanking_targets_all, interactors).dropna(how='all').replace(np.NaN, .0)
 print '[INFO] Similarity matrix calculated!'
 
 
@@ -2,19 +2,17 @@ import pickle
 import itertools as it
 from yeast_phospho import wd
 from pandas import read_csv
-from pymist.reader.sbml_reader import read_sbml_model
+from yeast_phospho.metabolic_model import load_metabolic_model
 from yeast_phospho.utilities import get_kinases_targets, get_tfs_targets
 
 
 # -- Import targets
 # Import kinase targets
-k_targets = get_kinases_targets()
-k_targets = {t: set(k_targets.ix[map(bool, k_targets[t]), t].index) for t in k_targets}
+k_targets = get_kinases_targets(sparse=True).to_sets()
 k_targets = {k: {t.split('_')[0] for t in k_targets[k]} for k in k_targets}
 
 # Import TF targets
-tf_targets = get_tfs_targets()
-tf_targets = {t: set(tf_targets.ix[map(bool, tf_targets[t]), t].index) for t in tf_targets}
+tf_targets = get_tfs_targets(sparse=True).to_sets()
 tf_targets = {tf: {t.split('_')[0] for t in tf_targets[tf]} for tf in tf_targets}
 
 
@@ -30,20 +28,8 @@ annot['mz'] = ['%.4f' % round(i, 2) for i in annot['mz']]
 annot = annot['mz'].to_dict()
 
 # -- Import metabolic model
-model = read_sbml_model('/Users/emanuel/Projects/resources/metabolic_models/iMM904.v1.xml')
-
-# Remove extracellular metabolites
-s_matrix = model.get_stoichiometric_matrix()
-s_matrix = s_matrix[[not i.endswith('_b') for i in s_matrix.index]]
-
-# Remove biomass reactions
-s_matrix = s_matrix.drop('R_biomass_SC5_notrace', axis=1)
-
-# Build {metabolite: protein} dict
-m_dict = {i: {r for r in s_matrix.loc[i, s_matrix.ix[i] != 0].index if not r.startswith('R_EX_')} for i in s_matrix.index}
-m_dict = {m: {g for r in m_dict[m] for g in model.get_reaction_genes(r)} for m in m_dict}
-m_dict = {m: {g for x in m_dict if x[2:-2] == m for g in m_dict[x]} for m in annot}
-m_dict = {m: m_dict[m] for m in m_dict if 0 < len(m_dict[m])}
+# Compiled once, extracellular metabolites, exchange and biomass reactions are ignored
+model = load_metabolic_model('/Users/emanuel/Projects/resources/metabolic_models/iMM904.v1.xml')
 
 # Filter highly connected metabolites
 hmet = {
@@ -55,14 +41,9 @@ hmet = {
     'so4', 'udpg', 'dudp',
     'hdca'
 }
-m_dict = {m: m_dict[m] for m in m_dict if m not in hmet}
-
-# Build {protein: metabolite} dict
-m_genes = {g for m in m_dict for g in m_dict[m]}
-g_dict = {g: {m for m in m_dict if g in m_dict[m]} for g in m_genes}
 
 # Build {protein: ion} dict
-i_dict = {g: {annot[m] for m in g_dict[g]} for g in g_dict}
+i_dict = model.gene_ions(annot, hmet)
 
 
 # -- List protein-metabolites associations
@@ -1,12 +1,11 @@
-import pickle
 import numpy as np
 import seaborn as sns
 import matplotlib.pyplot as plt
 from yeast_phospho import wd
-from sklearn.linear_model import ElasticNet
-from sklearn.cross_validation import LeaveOneOut
 from pandas import DataFrame, read_csv, Series
 from yeast_phospho.utilities import pearson
+from yeast_phospho.results import RegressionStore
+from yeast_phospho.regression import loo_elastic_net, median_betas
 from matplotlib_venn import venn3, venn3_circles, venn2, venn2_circles
 
 
@@ -133,6 +132,9 @@ comparisons = [
 ]
 
 
+store = RegressionStore('%s/tables/linear_regressions.npz' % wd, overwrite=True)
+
+
 def loo_regressions(xs, ys, ft, dt, mt):
     print '[INFO]', ft, dt
 
@@ -140,51 +142,25 @@ def loo_regressions(xs, ys, ft, dt, mt):
     x = xs.loc[:, ys.columns].dropna(axis=1).T
     y = ys[x.index].T
 
-    # Define cross-validation
-    cv = LeaveOneOut(len(y))
-
-    # Run regressions
-    y_pred, y_betas = {}, {}
-    for m in y:
-        y_pred[m] = {}
-
-        betas = []
-        for train, test in cv:
-            lm = ElasticNet(alpha=0.01).fit(x.ix[train], y.ix[train, m])
-            y_pred[m][x.index[test][0]] = lm.predict(x.ix[test])[0]
-
-            betas.append(dict(zip(*(x.columns, lm.coef_))))
-
-        y_betas[m] = DataFrame(betas).median().to_dict()
-
-    y_pred = DataFrame(y_pred).ix[y.index, y.columns]
+    # Run leave-one-out regressions
+    y_pred, coefs = loo_elastic_net(x, y, alpha=0.01)
+    y_betas = DataFrame(median_betas(coefs, x.columns, y.columns))
     print '[INFO] Regression done: ', ft, dt
 
     # Perform correlation with predicted values
-    metabolites_corr = [(ft, dt, f, mt, 'metabolites', pearson(y[f], y_pred[f])[0]) for f in y_pred]
-    conditions_corr = [(ft, dt, s, mt, 'conditions', pearson(y.ix[s], y_pred.ix[s])[0]) for s in y_pred.index]
-
-    return (metabolites_corr + conditions_corr), (ft, dt, mt, y_betas)
+    metabolites_corr = [(f, 'metabolites', pearson(y[f], y_pred[f])[0]) for f in y_pred]
+    conditions_corr = [(s, 'conditions', pearson(y.ix[s], y_pred.ix[s])[0]) for s in y_pred.index]
 
-lm_res = [loo_regressions(xs, ys, ft, dt, mt) for xs, ys, ft, dt, mt in comparisons]
+    # Export linear regression results
+    store.write(ft, dt, mt, y_betas, y_pred, DataFrame(metabolites_corr + conditions_corr, columns=['variable', 'corr_type', 'cor']))
 
-lm_cor = [(ft, dt, f, mt, ct, c) for c in lm_res for ft, dt, f, mt, ct, c in c[0]]
-lm_cor = DataFrame(lm_cor, columns=['feature', 'dataset', 'variable', 'growth', 'corr_type', 'cor'])
+for xs, ys, ft, dt, mt in comparisons:
+    loo_regressions(xs, ys, ft, dt, mt)
 
-lm_betas = [c[1] for c in lm_res]
+lm_cor = store.correlations([(ft, dt, mt) for xs, ys, ft, dt, mt in comparisons])
 print '[INFO] Regressions done'
 
 
-# -- Export linear regression results
-# Export results
-with open('%s/tables/linear_regressions.pickle' % wd, 'wb') as handle:
-    pickle.dump(lm_res, handle, protocol=pickle.HIGHEST_PROTOCOL)
-
-# # Import restuls
-# with open('%s/tables/linear_regressions.pickle' % wd, 'rb') as handle:
-#     lm_res = pickle.load(handle)
-
-
 # -- Plot linear regression predictions correlation
 palette = {'TFs': '#34495e', 'Kinases': '#3498db'}
 condition_name_map = {'Combination': 'NaCl + Pheromone', 'Dynamic': 'Nitrogen metabolism', 'Steady-state': 'Genetic perturbations'}
@@ -4,23 +4,22 @@ import matplotlib.pyplot as plt
 from yeast_phospho import wd
 from numpy.lib.nanfunctions import nanmedian
 from pandas import DataFrame, Series, read_csv
+from yeast_phospho.annotation import load_annotation
 
 conditions = ['NaCl', 'alpha']
 palette = {'NaCl': '#CC2229', 'pheromone': '#6FB353'}
 
 # -- Plot QTOF
-# Import annotation
-annot = read_csv('%s/files/2015_12_10_fia_experiments_imm904_annotation.txt' % wd, sep='\t', index_col=0)
-annot['mz'] = ['%.4f' % i for i in annot['mz']]
-annot = annot[annot['mod'] == '-H(+)']
-annot = annot.groupby('mz')['name'].agg(lambda x: '; '.join(set(x))).to_dict()
-annot = {k: '%s (*)' % v.split('; ')[0] if len(v.split('; ')) > 1 else v for k, v in annot.items()}
-annot['341.1089'] = 'Trehalose (*)'
-annot['160.0615'] = 'O-Acetyl-L-homoserine (*)'
-
 # Import data-set
 m_untargeted_std = read_csv('%s/tables/metabolomics_dynamic_combination_std.csv' % wd, index_col=0)
 m_untargeted_std = m_untargeted_std[[c for c in m_untargeted_std if c.split('_')[0] in conditions]]
+
+# Annotate ions (iMM904, -H(+)), ions with several candidates are named after the best ranked
+annot = load_annotation().candidates(m_untargeted_std.index, da=1e-4, sources=['imm904']).dropna()
+annot = {'%.4f' % k: '%s (*)' % v.split('; ')[0] if len(v.split('; ')) > 1 else v for k, v in annot.iteritems()}
+annot['341.1089'] = 'Trehalose (*)'
+annot['160.0615'] = 'O-Acetyl-L-homoserine (*)'
+
 m_untargeted_std.index = ['%.4f' % i for i in m_untargeted_std.index]
 
 # tsplot: untargeted matebolomics
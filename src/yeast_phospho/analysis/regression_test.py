@@ -3,10 +3,9 @@ import numpy as np
 import seaborn as sns
 import matplotlib.pyplot as plt
 from yeast_phospho import wd
-from sklearn.linear_model import ElasticNet
-from sklearn.cross_validation import LeaveOneOut
 from pandas import DataFrame, Series, read_csv
-from yeast_phospho.utilities import pearson
+from yeast_phospho.correlations import correlation_matrix
+from yeast_phospho.regression import loo_elastic_net
 
 # -- Imports
 # GSEA kinases activities
@@ -31,8 +30,9 @@ m = '606.0736'
 k_activities = [('gsea', k_activity_dyn_comb_gsea), ('lm', k_activity_dyn_comb_lm)]
 
 # -- Kinase activities correlation
-m_cor = [(k, pearson(k_activity_dyn_comb_lm.ix[k, conditions], metabolomics_dyn_comb.ix[m, conditions])[0], pearson(k_activity_dyn_comb_gsea.ix[k, conditions], metabolomics_dyn_comb.ix[m, conditions])[0]) for k in kinases]
-m_cor = DataFrame(m_cor, columns=['kinase', 'lm_cor', 'gsea_cor']).set_index('kinase')
+m_cor = DataFrame({
+    '%s_cor' % method: correlation_matrix(df.ix[kinases, conditions], metabolomics_dyn_comb.ix[[m], conditions]).set_index('x')['cor'] for method, df in k_activities
+})
 
 lm_top_features = list(m_cor['lm_cor'].abs().sort(inplace=False, ascending=False).head(5).index)
 gsea_top_features = list(m_cor['gsea_cor'].abs().sort(inplace=False, ascending=False).head(5).index)
@@ -59,7 +59,7 @@ for df_type, df in k_activities:
     ys = metabolomics_dyn_comb.ix[m]
     xs = df[ys.index].T
 
-    pred[df_type] = Series({xs.ix[test].index[0]: ElasticNet(alpha=0.01).fit(xs.ix[train], ys.ix[train]).predict(xs.ix[test])[0] for train, test in LeaveOneOut(len(ys))})
+    pred[df_type] = loo_elastic_net(xs, ys.to_frame(), alpha=0.01)[0][m]
 
 pred = DataFrame(pred)
 pred['measured'] = metabolomics_dyn_comb.ix[m, pred.index]
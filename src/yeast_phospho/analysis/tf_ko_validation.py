@@ -1,9 +1,9 @@
-import pickle
 import numpy as np
 import seaborn as sns
 import matplotlib.pyplot as plt
 from yeast_phospho import wd, data
 from pandas import DataFrame, read_csv, melt
+from yeast_phospho.results import RegressionStore
 from yeast_phospho.utilities import get_proteins_name, get_metabolites_name
 
 
@@ -36,11 +36,10 @@ met_name = {k: met_name[k] for k in met_name if len(met_name[k].split('; ')) ==
 
 
 # Linear regression results
-with open('%s/tables/linear_regressions.pickle' % wd, 'rb') as handle:
-    lm_res = pickle.load(handle)
+lm_res = RegressionStore('%s/tables/linear_regressions.npz' % wd)
 
 
-df = DataFrame([i[1][3] for i in lm_res if i[1][0] == 'TFs' and i[1][1] == 'Dynamic' and i[1][2] == 'without'][0])
+df = lm_res.betas('TFs', 'Dynamic', 'without')
 df['feature'] = df.index
 df = melt(df, id_vars='feature', var_name='variable', value_name='coef')
 df = df[df['coef'] != 0.0]
@@ -8,7 +8,6 @@ from pandas import read_csv, DataFrame
 from scipy.stats.distributions import hypergeom
 from sklearn.metrics.classification import f1_score, matthews_corrcoef, precision_score, recall_score
 from sklearn.metrics.ranking import roc_auc_score
-from yeast_phospho.utilities import randomise_matrix
 from scipy.stats.stats import spearmanr, pearsonr, ttest_ind, fisher_exact
 
 
@@ -44,9 +43,6 @@ metabolomics = metabolomics.ix[m_names.keys()]
 metabolomics.index = [m_names[i] for i in metabolomics.index]
 print 'metabolomics', metabolomics.shape
 
-# --
-metabolomics_r = {i: randomise_matrix(metabolomics) for i in range(100)}
-
 # --
 val_df = []
 for metabolite, feature, coef, type, cor, fdr in assoc[['Metabolites', 'feature', 'coef', 'type', 'cor', 'fdr']].values:
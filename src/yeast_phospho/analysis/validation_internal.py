@@ -4,10 +4,11 @@
 import numpy as np
 import seaborn as sns
 import matplotlib.pyplot as plt
-from pandas import read_csv, DataFrame, Series
+from pandas import read_csv
 from scipy.stats.stats import spearmanr, pearsonr, ttest_ind
 from yeast_phospho.utilities import get_metabolites_name
-from yeast_phospho.utilities import randomise_matrix
+from yeast_phospho.utilities import randomised_cells
+from yeast_phospho.mz import unique_ions
 
 
 # -- Imports
@@ -29,51 +30,55 @@ met_name = {'%.2f' % float(k): met_name[k] for k in met_name if len(met_name[k].
 
 metabolomics = read_csv('./tables/metabolomics_steady_state.tab', sep='\t', index_col=0)
 # metabolomics = metabolomics[metabolomics.std(1) > .4]
-metabolomics.index = ['%.2f' % i for i in metabolomics.index]
-
-dup = Series(dict(zip(*(np.unique(metabolomics.index, return_counts=True))))).sort_values()
-metabolomics = metabolomics.drop(dup[dup > 1].index, axis=0)
+metabolomics = unique_ions(metabolomics, 2)
 print 'metabolomics', metabolomics.shape
 
 
 # --
-metabolomics_r = {i: randomise_matrix(metabolomics) for i in range(100)}
+n_permutations = 10000
 
+val_df = assoc[[i in metabolomics.index and f in metabolomics.columns for i, f in assoc[['ion', 'feature']].values]]
+val_df = val_df[['feature', 'ion', 'coef', 'type']].reset_index(drop=True)
+val_df['coef_binary'] = ['Negative' if c < 0 else 'Positive' for c in val_df['coef']]
 
-# --
-val_df = []
-for ion, feature, coef, type in assoc[['ion', 'feature', 'coef', 'type']].values:
-    if ion in metabolomics.index and feature in metabolomics.columns:
-        val_df.append({
-            'feature': feature, 'ion': ion, 'coef': coef,
-            'coef_binary': 'Negative' if coef < 0 else 'Positive',
-            'zscore': metabolomics.ix[ion, feature], 'zscore_abs': abs(metabolomics.ix[ion, feature]),
-            'type': type, 'random': 'No'
-        })
-
-        for i in metabolomics_r:
-            val_df.append({
-                'feature': feature, 'ion': ion, 'coef': coef,
-                'coef_binary': 'Negative' if coef < 0 else 'Positive',
-                'zscore': metabolomics_r[i].ix[ion, feature], 'zscore_abs': abs(metabolomics_r[i].ix[ion, feature]),
-                'type': type, 'random': 'Yes'
-            })
-
-
-val_df = DataFrame(val_df)
+# Associations metabolite zscore and its values in randomised metabolomics (associations x permutations)
+zscores = randomised_cells(metabolomics, [tuple(i) for i in val_df[['ion', 'feature']].values], n_permutations, random_state=0)
+
+val_df['zscore'] = metabolomics.lookup(val_df['ion'], val_df['feature'])
+val_df['zscore_abs'] = val_df['zscore'].abs()
+
+# Empirical p-value of the absolute zscore and quantiles of the randomised zscores
+with np.errstate(invalid='ignore'):
+    val_df['pvalue'] = ((np.abs(zscores) >= val_df[['zscore_abs']].values).sum(1) + 1.) / (n_permutations + 1)
+    val_df.loc[val_df['zscore'].isnull(), 'pvalue'] = np.NaN
+
+for q in [.05, .5, .95]:
+    val_df['random_q%.2f' % q] = np.nanpercentile(zscores, q * 100, axis=1)
+
+val_df = val_df[['coef', 'coef_binary', 'feature', 'ion', 'type', 'zscore', 'zscore_abs', 'pvalue', 'random_q0.05', 'random_q0.50', 'random_q0.95']]
 val_df.to_csv('./tables/validations_internal.csv', index=False)
 print val_df
 
 
-# Plot
-plot_df = val_df[val_df['coef'].abs() > .1]
-print plot_df[plot_df['random'] == 'No'].sort('zscore_abs')
-
-t, pval = ttest_ind(
-    plot_df.loc[(plot_df['random'] == 'Yes') & (plot_df['coef_binary'] == 'Negative'), 'zscore_abs'],
-    plot_df.loc[(plot_df['random'] == 'No') & (plot_df['coef_binary'] == 'Negative'), 'zscore_abs'],
-    equal_var=False
-)
+# Plot, randomised zscores are shown for the first n_plot permutations of every association
+n_plot = 100
+
+selected = (val_df['coef'].abs() > .1).values
+
+plot_df = val_df[selected].copy()
+plot_df['random'] = 'No'
+print plot_df.sort('zscore_abs')
+
+plot_df_r = plot_df.ix[np.repeat(plot_df.index, n_plot)].copy()
+plot_df_r['zscore'], plot_df_r['random'] = zscores[selected, :n_plot].ravel(), 'Yes'
+plot_df_r['zscore_abs'] = plot_df_r['zscore'].abs()
+
+plot_df = plot_df.append(plot_df_r, ignore_index=True)
+
+# Welch's t-test against all the permutations
+negative = selected & (val_df['coef_binary'] == 'Negative').values
+
+t, pval = ttest_ind(np.abs(zscores[negative]).ravel(), val_df.loc[negative, 'zscore_abs'], equal_var=False)
 print t, pval
 
 # Plot
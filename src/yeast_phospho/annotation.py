@@ -0,0 +1,120 @@
+import numpy as np
+from yeast_phospho import wd
+from pandas import DataFrame, Series, Index, read_csv, concat
+from yeast_phospho.cache import cached_npz
+from yeast_phospho.mz import MzIndex
+
+
+# -- Compiled metabolite m/z annotation
+annotation_maps = {
+    'kegg': '%s/files/metabolite_mz_map_kegg.txt' % wd,
+    'kegg_adducts': '%s/files/metabolite_mz_map_kegg_adducts.txt' % wd,
+    'dobson': '%s/files/metabolite_mz_map_dobson.txt' % wd,
+    'imm904': '%s/files/2015_12_10_fia_experiments_imm904_annotation.txt' % wd
+}
+
+
+def compile_annotation(map_files, cache_file):
+    """
+    Parse the m/z maps once and store them as one table sorted by m/z
+
+    :param map_files: dict of source to m/z map (tab separated with 'id', 'name', 'formula', 'mz' and 'mod' columns, optional 'score')
+    :param cache_file: compiled numpy (.npz) file
+    """
+    sources = np.array(sorted(map_files), dtype=str)
+
+    df = []
+    for i, s in enumerate(sources):
+        m_map = read_csv(map_files[s], sep='\t')
+        m_map['source'] = i
+        m_map['score'] = m_map['score'] if 'score' in m_map else np.NaN
+        df.append(m_map[['mz', 'id', 'name', 'formula', 'mod', 'source', 'score']])
+
+    df = concat(df, ignore_index=True).dropna(subset=['mz']).sort_values('mz', kind='mergesort')
+
+    mods, mod = np.unique(df['mod'].fillna('').values.astype(str), return_inverse=True)
+
+    np.savez(
+        cache_file,
+        sources=sources, mods=mods,
+        mz=df['mz'].values.astype(np.float64), mod=mod, source=df['source'].values.astype(np.int64), score=df['score'].values.astype(np.float64),
+        id=df['id'].fillna('').values.astype(str), name=df['name'].fillna('').values.astype(str), formula=df['formula'].fillna('').values.astype(str)
+    )
+
+
+class MetaboliteAnnotation(object):
+    """
+    Candidate metabolites (id, name, formula) of every adduct m/z of all the annotation sources,
+    matched in one tolerance join against a list of ions
+    """
+
+    columns = ['ion', 'rank', 'id', 'name', 'formula', 'mod', 'source', 'mz', 'error_ppm', 'score']
+
+    def __init__(self, arrays):
+        for k in arrays.files:
+            setattr(self, k, arrays[k])
+
+    def adducts(self):
+        """
+        :return: Series of the number of entries of every adduct
+        """
+        return Series(np.bincount(self.mod, minlength=len(self.mods)), index=self.mods).sort_values(ascending=False)
+
+    def annotate(self, ions, ppm=None, da=None, adducts=('-H(+)', ), sources=None):
+        """
+        Candidates of every ion within tolerance, ranked by the order of preference of their adduct,
+        absolute m/z error, score (highest first) and source
+
+        :param ions: array of m/z values
+        :param ppm: relative tolerance in parts per million
+        :param da: absolute tolerance in Dalton
+        :param adducts: adducts to consider in order of preference (e.g. ['-H(+)', '+OH(-)']), all if None
+        :param sources: sources to consider (e.g. ['imm904']) in order of preference, all if None
+        :return: DataFrame (candidates) with the columns of MetaboliteAnnotation.columns, rank 0 is the best candidate of the ion
+        """
+        ions = np.asarray(ions, dtype=np.float64)
+
+        # Adduct and source preference, -1 for discarded entries
+        mod_rank = np.arange(len(self.mods)) if adducts is None else Index(list(adducts)).get_indexer(self.mods)
+        source_rank = np.arange(len(self.sources)) if sources is None else Index(list(sources)).get_indexer(self.sources)
+
+        keep = np.where((mod_rank[self.mod] >= 0) & (source_rank[self.source] >= 0))[0]
+
+        q, i = MzIndex(self.mz[keep]).lookup(ions, ppm, da)
+        i = keep[i]
+
+        error = (self.mz[i] - ions[q]) / ions[q] * 1e6
+
+        order = np.lexsort((source_rank[self.source[i]], -np.nan_to_num(self.score[i]), np.abs(error), mod_rank[self.mod[i]], q))
+        q, i, error = q[order], i[order], error[order]
+
+        # Rank within every ion, candidates are sorted by ion
+        first = np.searchsorted(q, q, side='left')
+
+        return DataFrame({
+            'ion': ions[q], 'rank': np.arange(len(q)) - first,
+            'id': self.id[i], 'name': self.name[i], 'formula': self.formula[i], 'mod': self.mods[self.mod[i]], 'source': self.sources[self.source[i]],
+            'mz': self.mz[i], 'error_ppm': error, 'score': self.score[i]
+        }, columns=self.columns)
+
+    def candidates(self, ions, ppm=None, da=None, adducts=('-H(+)', ), sources=None, column='name', sep='; '):
+        """
+        :param column: candidates attribute, e.g. 'name' or 'id'
+        :param sep: separator of multiple candidates
+        :return: Series indexed by ions of their distinct candidates in rank order, NaN if none
+        """
+        res = self.annotate(ions, ppm, da, adducts, sources).drop_duplicates(['ion', column])
+        res = res.groupby('ion')[column].agg(lambda x: sep.join(x))
+
+        return Series(res.reindex(np.asarray(ions, dtype=np.float64)).values, index=ions)
+
+
+def load_annotation(map_files=annotation_maps, cache_dir='%s/cache/' % wd):
+    """
+    Load compiled annotation, compiling it if the cache of these maps versions is missing
+
+    :param map_files: dict of source to m/z map file
+    :param cache_dir:
+    :return: MetaboliteAnnotation
+    """
+    return MetaboliteAnnotation(cached_npz('annotation', map_files, lambda cache_file: compile_annotation(map_files, cache_file), cache_dir))
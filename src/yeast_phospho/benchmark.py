@@ -0,0 +1,159 @@
+from __future__ import division
+import numpy as np
+from pandas import DataFrame, Index
+from scipy.stats.distributions import hypergeom
+
+
+# -- Ground truth of (feature, ion) pairs
+def pair_codes(features, ions, feature_index, ion_index):
+    """
+    :return: integer code of every (feature, ion) pair, -1 if the feature or the ion is not indexed
+    """
+    f, i = feature_index.get_indexer(np.asarray(features, dtype=object)), ion_index.get_indexer(np.asarray(ions, dtype=object))
+    return np.where((f >= 0) & (i >= 0), f.astype(np.int64) * len(ion_index) + i, -1)
+
+
+def pair_labels(features, ions, interactions):
+    """
+    Membership of the (feature, ion) pairs in a set of interactions, e.g. (kinase, ion) pairs
+    reported in STRING. Pairs are integer encoded and joined against the sorted codes of the
+    interactions.
+
+    :param features: features of the pairs
+    :param ions: ions of the pairs
+    :param interactions: set of (feature, ion)
+    :return: boolean array
+    """
+    feature_index, ion_index = Index(np.unique(np.asarray(features, dtype=object))), Index(np.unique(np.asarray(ions, dtype=object)))
+
+    db = np.array(list(interactions), dtype=object).reshape(-1, 2)
+    db = pair_codes(db[:, 0], db[:, 1], feature_index, ion_index)
+
+    return np.in1d(pair_codes(features, ions, feature_index, ion_index), np.unique(db[db >= 0]))
+
+
+def interaction_labels(features, ions, sources):
+    """
+    :param features: features of the pairs
+    :param ions: ions of the pairs
+    :param sources: dict of source (e.g. 'string') to set of (feature, ion)
+    :return: boolean DataFrame (pairs x sources)
+    """
+    return DataFrame({s: pair_labels(features, ions, sources[s]) for s in sources}, columns=sorted(sources))
+
+
+# -- ROC and precision-recall of all sources at once
+def ranked_counts(scores, labels):
+    """
+    True and false positives of all sources at every distinct score threshold, as
+    sklearn.metrics roc_curve and precision_recall_curve
+
+    :param scores: array of the pairs scores
+    :param labels: boolean array (pairs x sources)
+    :return: thresholds (decreasing), true positives and false positives (thresholds x sources)
+    """
+    scores, labels = np.asarray(scores, dtype=np.float64), np.asarray(labels, dtype=bool).reshape(len(scores), -1)
+
+    order = np.argsort(scores, kind='mergesort')[::-1]
+    scores, labels = scores[order], labels[order]
+
+    distinct = np.concatenate((np.where(np.diff(scores))[0], [len(scores) - 1]))
+
+    tps = np.cumsum(labels, axis=0)[distinct].astype(np.float64)
+    fps = 1 + distinct[:, None] - tps
+
+    return scores[distinct], tps, fps
+
+
+def curve_areas(tps, fps):
+    """
+    :return: area under the ROC curves and under the precision-recall curves (trapezoidal, as sklearn average_precision_score) of every source
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tpr = np.vstack((np.zeros(tps.shape[1]), tps / tps[-1]))
+        fpr = np.vstack((np.zeros(fps.shape[1]), fps / fps[-1]))
+
+        # Recall is constant after the last true positive, the remaining points do not add area
+        precision = np.vstack((np.ones(tps.shape[1]), tps / (tps + fps)))
+
+        return np.trapz(tpr, fpr, axis=0), np.trapz(precision, tpr, axis=0)
+
+
+def benchmark(scores, labels, bootstrap=0, ci=.95, seed=None):
+    """
+    ROC and precision-recall areas of the pairs scores against every source of interactions
+
+    :param scores: array of the pairs scores (e.g. absolute coefficients)
+    :param labels: boolean DataFrame (pairs x sources) of interaction_labels
+    :param bootstrap: number of bootstrap resamples of the pairs, 0 for no confidence intervals
+    :param ci: confidence level of the intervals
+    :param seed: random seed of the bootstrap
+    :return: DataFrame (sources) with 'positives', 'auc' and 'aupr' columns, plus their confidence intervals (e.g. 'auc_low', 'auc_high')
+    """
+    scores, values = np.asarray(scores, dtype=np.float64), labels.values.astype(bool)
+
+    res = DataFrame({'positives': values.sum(0)}, index=labels.columns)
+    res['auc'], res['aupr'] = curve_areas(*ranked_counts(scores, values)[1:])
+
+    if bootstrap > 0:
+        rs = np.random.RandomState(seed)
+
+        areas = np.empty((bootstrap, 2, values.shape[1]))
+        for b in range(bootstrap):
+            idx = rs.randint(0, len(scores), len(scores))
+            areas[b] = curve_areas(*ranked_counts(scores[idx], values[idx])[1:])
+
+        low, high = np.nanpercentile(areas, [(1 - ci) / 2 * 100, (1 + ci) / 2 * 100], axis=0)
+
+        res['auc_low'], res['auc_high'], res['aupr_low'], res['aupr_high'] = low[0], high[0], low[1], high[1]
+
+    return res
+
+
+def roc_curves(scores, labels):
+    """
+    :return: dict of source to false and true positive rates
+    """
+    tps, fps = ranked_counts(scores, labels.values)[1:]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {s: (np.r_[0, fps[:, j] / fps[-1, j]], np.r_[0, tps[:, j] / tps[-1, j]]) for j, s in enumerate(labels)}
+
+
+def pr_curves(scores, labels):
+    """
+    :return: dict of source to recall and precision
+    """
+    tps, fps = ranked_counts(scores, labels.values)[1:]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {s: (np.r_[0, tps[:, j] / tps[-1, j]], np.r_[1, tps[:, j] / (tps[:, j] + fps[:, j])]) for j, s in enumerate(labels)}
+
+
+# -- Enrichment of the interactions among the top scoring pairs
+def enrichment(scores, labels, thresholds, population=None, positives=None):
+    """
+    Hypergeometric test of the interactions among the pairs scoring above every threshold
+
+    :param scores: array of the pairs scores
+    :param labels: boolean DataFrame (pairs x sources) of interaction_labels
+    :param thresholds: list of score thresholds
+    :param population: number of possible pairs, the number of pairs if None
+    :param positives: number of interactions in the population for every source, the number of labelled pairs if None
+    :return: DataFrame (thresholds x sources) of p-values
+    """
+    scores, values = np.asarray(scores, dtype=np.float64), labels.values.astype(bool)
+
+    order = np.argsort(scores, kind='mergesort')
+    cumulative = np.vstack((np.zeros(values.shape[1]), np.cumsum(values[order[::-1]], axis=0)))
+
+    # Pairs and interactions scoring above the thresholds
+    drawn = len(scores) - np.searchsorted(scores[order], thresholds, side='right')
+    hits = cumulative[drawn]
+
+    population = len(scores) if population is None else population
+    positives = values.sum(0) if positives is None else np.asarray(positives)
+
+    pvalues = hypergeom.sf(hits, population, positives[None, :], drawn[:, None])
+
+    return DataFrame(pvalues, index=thresholds, columns=labels.columns)
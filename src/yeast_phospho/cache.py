@@ -0,0 +1,67 @@
+import os
+import hashlib
+import tempfile
+import numpy as np
+from yeast_phospho import wd
+
+
+# -- Hash-keyed cache of compiled sources
+def file_hash(file_path, block_size=2 ** 20):
+    md5 = hashlib.md5()
+
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            md5.update(block)
+
+    return md5.hexdigest()
+
+
+def sources_hash(sources):
+    """
+    :param sources: file path or dict of label to file path
+    :return: md5 of the file, or of the labels and md5s of all the files
+    """
+    if isinstance(sources, dict):
+        return hashlib.md5(''.join('%s%s' % (s, file_hash(sources[s])) for s in sorted(sources))).hexdigest()
+
+    return file_hash(sources)
+
+
+def cached_file(name, sources, compile_fn, cache_dir='%s/cache/' % wd, extension='npz'):
+    """
+    Cache file of the compiled version of the sources, compiled if the cache of these sources
+    versions is missing. Sources are compiled to a temporary file moved into place once complete,
+    an interrupted compile leaves no cache file behind.
+
+    :param name: cache file prefix
+    :param sources: file path or dict of label to file path, see sources_hash
+    :param compile_fn: function writing the compiled sources to the cache file given as argument
+    :param cache_dir:
+    :param extension: cache file extension
+    :return: cache file path
+    """
+    cache_file = '%s/%s_%s.%s' % (cache_dir, name, sources_hash(sources), extension)
+
+    if not os.path.exists(cache_file):
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+        fd, tmp_file = tempfile.mkstemp(prefix='%s_' % name, suffix='.tmp.%s' % extension, dir=cache_dir)
+        os.close(fd)
+
+        try:
+            compile_fn(tmp_file)
+            os.rename(tmp_file, cache_file)
+
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    return cache_file
+
+
+def cached_npz(name, sources, compile_fn, cache_dir='%s/cache/' % wd):
+    """
+    :return: arrays of the compiled numpy (.npz) cache file, see cached_file
+    """
+    return np.load(cached_file(name, sources, compile_fn, cache_dir))
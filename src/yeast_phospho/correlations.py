@@ -0,0 +1,181 @@
+from __future__ import division
+import numpy as np
+from scipy.stats import t
+from pandas import DataFrame
+
+
+# -- Vectorised pairwise-complete correlations
+def correlation_pvalue(cor, n):
+    """
+    Two-sided p-value of correlation coefficients (Student's t with n - 2 degrees of freedom),
+    as scipy.stats pearsonr and spearmanr for more than 2 observations. With 2 observations the
+    test has no degree of freedom: scipy returns 0 (pearsonr) or NaN (spearmanr), here it is 1.
+
+    :param cor: array of correlation coefficients
+    :param n: array of number of observations
+    :return: array
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        df = n - 2
+        ts = cor * np.sqrt(df / ((1 - cor) * (1 + cor)))
+
+        pvalue = 2 * t.sf(np.abs(ts), df)
+
+    pvalue[np.abs(cor) == 1] = 0
+    pvalue[n == 2] = 1
+
+    return np.where(np.isnan(cor), np.NaN, pvalue)
+
+
+def centre(x, mask):
+    """
+    :return: rows of x centred on the mean of their masked values, 0 elsewhere
+    """
+    x = np.where(mask, x, 0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(mask, x - (x.sum(1) / mask.sum(1))[:, None], 0)
+
+
+def mask_patterns(mask):
+    """
+    :param mask: boolean array (rows x samples)
+    :return: distinct rows of mask and index of the pattern of every row
+    """
+    keys, first, groups = np.unique([r.tostring() for r in mask], return_index=True, return_inverse=True)
+    return mask[first], groups
+
+
+def paired_pearson(x, y, mask):
+    """
+    Pearson correlation of the rows of x with the same rows of y on the masked samples
+
+    :param x: array (rows x samples)
+    :param y: array (rows x samples)
+    :param mask: boolean array (rows x samples)
+    :return: arrays of correlation coefficients and number of observations
+    """
+    x, y, n = centre(x, mask), centre(y, mask), mask.sum(1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cor = np.clip((x * y).sum(1) / np.sqrt((x ** 2).sum(1) * (y ** 2).sum(1)), -1, 1)
+
+    cor[n < 2] = np.NaN
+
+    return cor, n
+
+
+def masked_pearson(x, y):
+    """
+    Pearson correlation of all pairs of rows of x and y using, for each pair, the samples
+    measured in both
+
+    :param x: array (a x samples) with NaN for missing values
+    :param y: array (b x samples) with NaN for missing values
+    :return: arrays (a x b) of correlation coefficients and number of observations
+    """
+    mx, my = np.isfinite(x).astype(np.float64), np.isfinite(y).astype(np.float64)
+
+    # Centre rows to reduce cancellation in the sums of squares
+    x, y = centre(x, mx == 1), centre(y, my == 1)
+
+    n = mx.dot(my.T)
+    sx, sy = x.dot(my.T), mx.dot(y.T)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = x.dot(y.T) - sx * sy / n
+        var_x = (x ** 2).dot(my.T) - sx ** 2 / n
+        var_y = mx.dot((y ** 2).T) - sy ** 2 / n
+
+        cor = np.clip(cov / np.sqrt(var_x * var_y), -1, 1)
+
+    cor[n < 2] = np.NaN
+
+    return cor, n.astype(np.int64)
+
+
+def masked_spearman(x, y):
+    """
+    Spearman correlation of all pairs of rows of x and y, ranking each pair on the samples
+    measured in both. Rows of y are ranked once per missing values pattern of x, and each row
+    of x is ranked on all the masks of its pairs with one matrix product.
+
+    :param x: array (a x samples) with NaN for missing values
+    :param y: array (b x samples) with NaN for missing values
+    :return: arrays (a x b) of correlation coefficients and number of observations
+    """
+    cor, n = np.empty((x.shape[0], y.shape[0])), np.empty((x.shape[0], y.shape[0]), dtype=np.int64)
+
+    x_patterns, x_groups = mask_patterns(np.isfinite(x))
+
+    for i, pattern in enumerate(x_patterns):
+        mask = np.isfinite(y) & pattern
+
+        y_ranks = DataFrame(np.where(mask, y, np.NaN)).rank(axis=1).values
+
+        for r in np.where(x_groups == i)[0]:
+            # Average rank: number of lower values plus half the ties (itself included) plus one half
+            v = x[r]
+            x_ranks = mask.dot((v[:, None] < v[None, :]) + .5 * (v[:, None] == v[None, :])) + .5
+
+            cor[r], n[r] = paired_pearson(x_ranks, y_ranks, mask)
+
+    return cor, n
+
+
+def correlation_matrix(x, y, method='pearson', block_size=1000):
+    """
+    Correlation of every row of x against every row of y (e.g. kinases x conditions against
+    metabolites x conditions) on the pairwise-complete samples, equivalent to calling
+    utilities.pearson or utilities.spearman on each pair
+
+    :param x: DataFrame (features x samples)
+    :param y: DataFrame (features x samples), samples aligned to x
+    :param method: 'pearson' or 'spearman'
+    :param block_size: number of rows of x correlated at once (bounds memory)
+    :return: long DataFrame with 'x', 'y', 'cor', 'pvalue' and 'n' columns
+    """
+    func = {'pearson': masked_pearson, 'spearman': masked_spearman}[method]
+
+    y = y[x.columns]
+    y_values = y.values.astype(np.float64)
+
+    res = []
+    for b in range(0, x.shape[0], block_size):
+        block = x.iloc[b:b + block_size]
+
+        cor, n = func(block.values.astype(np.float64), y_values)
+
+        res.append(DataFrame({
+            'x': np.repeat(block.index.values, y.shape[0]),
+            'y': np.tile(y.index.values, block.shape[0]),
+            'cor': cor.ravel(),
+            'pvalue': correlation_pvalue(cor.ravel(), n.ravel()),
+            'n': n.ravel()
+        }, columns=['x', 'y', 'cor', 'pvalue', 'n']))
+
+    return res[0].append(res[1:], ignore_index=True) if len(res) > 1 else res[0] if len(res) == 1 else DataFrame(columns=['x', 'y', 'cor', 'pvalue', 'n'])
+
+
+def paired_correlations(x, y, pairs, method='pearson'):
+    """
+    Correlation of given pairs of rows of x and y on their pairwise-complete samples
+
+    :param x: DataFrame (features x samples)
+    :param y: DataFrame (features x samples), samples aligned to x
+    :param pairs: list of (x row, y row) labels
+    :param method: 'pearson' or 'spearman'
+    :return: arrays of correlation coefficients, p-values and number of observations
+    """
+    xs = x.ix[[i for i, j in pairs]].values.astype(np.float64)
+    ys = y.ix[[j for i, j in pairs], x.columns].values.astype(np.float64)
+
+    mask = np.isfinite(xs) & np.isfinite(ys)
+    xs, ys = np.where(mask, xs, np.NaN), np.where(mask, ys, np.NaN)
+
+    if method == 'spearman':
+        xs, ys = DataFrame(xs).rank(axis=1).values, DataFrame(ys).rank(axis=1).values
+
+    cor, n = paired_pearson(xs, ys, mask)
+
+    return cor, correlation_pvalue(cor, n), n
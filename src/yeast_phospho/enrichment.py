@@ -0,0 +1,213 @@
+from __future__ import division
+import numpy as np
+from scipy.stats import norm
+from pandas import Series, DataFrame, concat
+from yeast_phospho.incidence import Incidence
+from yeast_phospho.parallel import map_conditions, condition_seed
+
+
+# -- Weighted GSEA (pymist.enrichment.gsea.gsea) vectorised over signatures and permutations
+def running_sum_extremes(positions, weights, nh):
+    """
+    Enrichment score of the signatures hitting the sorted data-set at the given positions.
+
+    The weighted running sum only changes direction at a hit, hence its extremes are the
+    peaks reached at each hit and the troughs reached right before each hit.
+
+    :param positions: (signatures x hits) array of sorted positions in the ranked data-set
+    :param weights: (signatures x hits) array of the absolute values at those positions
+    :param nh: number of misses (data-set size minus signature size)
+    :return: array of the signed enrichment scores (first maximum deviation from zero)
+    """
+    hit = np.cumsum(weights, axis=1)
+    hit /= hit[:, -1:]
+
+    peaks = hit - (positions - np.arange(positions.shape[1])) / nh
+    troughs = peaks - weights / np.sum(weights, axis=1)[:, None]
+
+    # Interleave troughs and peaks in running order and keep the first maximum
+    extremes = np.dstack((troughs, peaks)).reshape(positions.shape[0], -1)
+    ind = np.argmax(np.abs(extremes), axis=1)
+
+    return extremes[np.arange(extremes.shape[0]), ind]
+
+
+def random_ranks(n, size, permutations, random_state):
+    """
+    Shared permutation matrix: each row holds the first positions of a random permutation of
+    the ranked data-set, so that its first k columns are a uniform random signature of size k.
+
+    :param n: data-set size
+    :param size: number of columns to draw (largest signature size)
+    :param permutations: number of rows
+    :param random_state: numpy RandomState
+    :return: (permutations x size) array of positions
+    """
+    keys = random_state.rand(permutations, n)
+
+    idx = np.argpartition(keys, size - 1, axis=1)[:, :size] if size < n else np.tile(np.arange(n), (permutations, 1))
+
+    rows = np.arange(permutations)[:, None]
+    return idx[rows, np.argsort(keys[rows, idx], axis=1)]
+
+
+def wilson_lower_bound(count, n, z):
+    """
+    Lower bound of the Wilson score interval of a binomial proportion
+
+    :param count: number of successes
+    :param n: number of trials
+    :param z: standard normal quantile of the confidence level
+    :return:
+    """
+    p = count / n
+    return (p + z ** 2 / (2 * n) - z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2))) / (1 + z ** 2 / n)
+
+
+def gsea(dataset, signatures, permutations=10000, random_state=None, block_size=1000, threshold=None, confidence=.999, first_block=100):
+    """
+    Weighted GSEA of several signatures against one data-set, sharing the ranking and the
+    permutations between them. Reproduces pymist.enrichment.gsea.gsea: values sorted in
+    ascending order, hits weighted by their absolute value and p-value estimated by sampling
+    random signatures of the same size (floored at 1 / permutations).
+
+    If a significance threshold is given permutations are drawn sequentially, in blocks growing
+    geometrically from first_block to block_size, and a signature stops being permuted once the
+    confidence interval of its p-value lies above the threshold (Besag-Clifford style early
+    stopping). Significant signatures are permuted up to the cap to resolve small p-values.
+
+    :param dataset: Series of measurements (e.g. p-sites log2 fold-changes) of one condition
+    :param signatures: dict of signature name to set of targets or Incidence (targets x signatures)
+    :param permutations: number of random signatures sampled (maximum if threshold is given)
+    :param random_state: seed or numpy RandomState
+    :param block_size: number of permutations scored at once (bounds memory)
+    :param threshold: p-value significance threshold enabling early stopping
+    :param confidence: confidence level of the p-value interval used to stop
+    :param first_block: number of permutations of the first block when early stopping
+    :return: DataFrame indexed by signature with enrichment score ('es'), 'pvalue' and number of 'permutations' used
+    """
+    if not isinstance(random_state, np.random.RandomState):
+        random_state = np.random.RandomState(random_state)
+
+    dataset = dataset.dropna()
+
+    # Rank data-set once
+    order = np.argsort(dataset.values, kind='mergesort')
+    genes, weights = dataset.index[order], np.abs(dataset.values[order])
+    n = len(genes)
+
+    # Signatures positions in the ranked data-set
+    if isinstance(signatures, Incidence):
+        ranks = genes.get_indexer(signatures.index)
+        hits = {s: np.sort(ranks[rows]) for s, rows in signatures.column_rows().items()}
+        names = list(signatures.columns)
+
+    else:
+        hits = {s: np.sort(genes.get_indexer(list(signatures[s]))) for s in signatures}
+        names = list(signatures)
+
+    hits = {s: hits[s][hits[s] != -1] for s in hits}
+    hits = {s: hits[s] for s in hits if 0 < len(hits[s]) < n and weights[hits[s]].sum() != 0}
+
+    res = DataFrame(np.NaN, index=names, columns=['es', 'pvalue', 'permutations'])
+
+    if len(hits) == 0:
+        return res
+
+    # Observed enrichment scores
+    es = Series({s: running_sum_extremes(hits[s][None, :], weights[hits[s]][None, :], n - len(hits[s]))[0] for s in hits})
+
+    # Permutations
+    if permutations > 0:
+        count, drawn, active = Series(0, index=es.index), Series(0, index=es.index), list(es.index)
+
+        z = norm.ppf(1 - (1 - confidence) / 2)
+
+        b, size = 0, block_size if threshold is None else min(first_block, block_size)
+
+        while b < permutations:
+            # The first k positions of each permutation do not depend on the largest size drawn
+            r_positions = random_ranks(n, max(len(hits[s]) for s in active), min(size, permutations - b), random_state)
+            b, size = b + r_positions.shape[0], min(2 * size, block_size)
+
+            for s in active:
+                k = len(hits[s])
+                r_hits = np.sort(r_positions[:, :k], axis=1)
+                r_weights = weights[r_hits]
+
+                # Random signatures without weight have no running sum
+                r_valid = r_weights.sum(1) != 0
+                r_es = running_sum_extremes(r_hits[r_valid], r_weights[r_valid], n - k)
+
+                count[s] += np.sum(np.abs(r_es) >= abs(es[s]))
+                drawn[s] += r_positions.shape[0]
+
+            # Stop signatures clearly not significant
+            if threshold is not None:
+                active = [s for s in active if wilson_lower_bound(count[s], drawn[s], z) <= threshold]
+
+                if len(active) == 0:
+                    break
+
+        res.ix[es.index, 'pvalue'] = [1 / d if c == 0 else c / d for c, d in zip(count[es.index], drawn[es.index])]
+        res.ix[es.index, 'permutations'] = drawn
+
+    res.ix[es.index, 'es'] = es
+
+    return res
+
+
+def signed_log10_pvalue(res):
+    """
+    Activity score from GSEA results: log10 p-value, positive if targets are enriched in the
+    top of the data-set (negative enrichment score as the data-set is sorted in ascending order).
+
+    :param res: DataFrame with 'es' and 'pvalue' columns
+    :return: Series
+    """
+    return Series(np.where(res['es'] > 0, np.log10(res['pvalue']), -np.log10(res['pvalue'])), index=res.index)
+
+
+def gsea_activities(targets, df, permutations, seed, threshold, confidence, block_size, first_block):
+    res = {c: gsea(df[c], targets, permutations, condition_seed(seed, c), block_size, threshold, confidence, first_block) for c in df}
+
+    return concat([DataFrame({c: signed_log10_pvalue(res[c]) for c in res}), DataFrame({c: res[c]['permutations'] for c in res})], keys=['activity', 'permutations'])
+
+
+def estimate_activity_with_gsea(targets, df, permutations=10000, seed=None, n_jobs=1, threshold=None, confidence=.999, block_size=1000, first_block=100):
+    """
+    Estimate activities of all regulators (kinases or transcription-factors) in every condition.
+    Each condition draws its permutations from its own seed, hence results do not depend on
+    the number of workers.
+
+    :param targets: dict of regulator to set of targets or Incidence (targets x regulators)
+    :param df: DataFrame of measurements (targets x conditions)
+    :param permutations: number of permutations (maximum if threshold is given)
+    :param seed: base random seed
+    :param n_jobs: number of worker processes
+    :param threshold: p-value significance threshold enabling early stopping of the permutations
+    :param confidence: confidence level of the p-value interval used to stop
+    :param block_size: number of permutations drawn at once
+    :param first_block: number of permutations of the first block when early stopping
+    :return: DataFrames of activities and of the number of permutations used (regulators x conditions)
+    """
+    seed = np.random.randint(2 ** 31 - 1) if seed is None else seed
+
+    res = map_conditions(
+        gsea_activities, targets, [df[[c]] for c in df], n_jobs,
+        permutations=permutations, seed=seed, threshold=threshold, confidence=confidence, block_size=block_size, first_block=first_block
+    )
+
+    activity = res.ix['activity'].dropna(how='all', axis=0)
+
+    return activity, res.ix['permutations'].ix[activity.index]
+
+
+def permutations_summary(used, permutations):
+    """
+    :param used: DataFrame of the number of permutations used (regulators x conditions) of estimate_activity_with_gsea
+    :param permutations: maximum number of permutations
+    :return: Series with the 'median' and 'mean' permutations per estimate and the 'fold' reduction against the maximum
+    """
+    used = used.stack()
+    return Series({'median': used.median(), 'mean': used.mean(), 'fold': permutations / used.mean()}, index=['median', 'mean', 'fold'])
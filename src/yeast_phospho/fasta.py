@@ -0,0 +1,162 @@
+import os
+import mmap
+import numpy as np
+from yeast_phospho import wd
+from yeast_phospho.cache import cached_file
+
+
+# -- Streaming and indexed (faidx) FASTA access
+def record_name(header):
+    return header.split(' ')[0].split('>')[1].strip()
+
+
+def parse_fasta(fasta_file):
+    """
+    Stream the records of a FASTA file, stop codons ('*') are removed
+
+    :param fasta_file:
+    :return: generator of (name, sequence)
+    """
+    name, lines = None, []
+
+    with open(fasta_file) as f:
+        for line in f:
+            if line.startswith('>'):
+                if name is not None:
+                    yield name, ''.join(lines).replace('*', '')
+
+                name, lines = record_name(line), []
+
+            elif name is not None:
+                lines.append(line.strip())
+
+    if name is not None:
+        yield name, ''.join(lines).replace('*', '')
+
+
+def build_fasta_index(fasta_file):
+    """
+    faidx index of a FASTA file read line by line. All the lines of a record but the last must
+    have the same length, blank lines are only allowed at the end of a record (as samtools faidx).
+
+    :param fasta_file:
+    :return: list of (name, length, offset of the first residue, residues per line, bytes per line)
+    """
+    index, offset, record, short_line, blank_line = [], 0, None, False, False
+
+    with open(fasta_file, 'rb') as f:
+        for line in f:
+            if line.startswith(b'>'):
+                if record is not None:
+                    index.append(tuple(record))
+
+                record, short_line, blank_line = [record_name(line.decode('ascii')), 0, offset + len(line), 0, 0], False, False
+
+            elif record is not None and not line.strip():
+                blank_line = True
+
+            elif record is not None:
+                if blank_line:
+                    raise ValueError('Blank line inside FASTA record %s' % record[0])
+
+                bases = len(line.rstrip(b'\r\n'))
+
+                if record[3] == 0:
+                    record[3], record[4] = bases, len(line)
+
+                elif short_line or bases > record[3]:
+                    raise ValueError('Different line lengths in FASTA record %s' % record[0])
+
+                short_line = bases < record[3]
+                record[1] += bases
+
+            offset += len(line)
+
+    if record is not None:
+        index.append(tuple(record))
+
+    return index
+
+
+def write_fasta_index(index, index_file):
+    with open(index_file, 'w') as f:
+        for record in index:
+            f.write('%s\t%d\t%d\t%d\t%d\n' % record)
+
+
+def read_fasta_index(index_file):
+    with open(index_file) as f:
+        return [(n, int(l), int(o), int(b), int(w)) for n, l, o, b, w in (line.rstrip('\n').split('\t') for line in f)]
+
+
+class IndexedFasta(object):
+    """
+    Random access to the records of a FASTA file through a memory map and its faidx index,
+    without loading the whole file. Behaves as the read-only dict of read_fasta: stop codons
+    ('*') are removed from the returned sequences.
+    """
+
+    def __init__(self, fasta_file, cache_dir='%s/cache/' % wd):
+        index_file = cached_file(os.path.basename(fasta_file), fasta_file, lambda cache_file: write_fasta_index(build_fasta_index(fasta_file), cache_file), cache_dir, 'fai')
+
+        index = read_fasta_index(index_file)
+
+        # Duplicated records: the last one is kept as in read_fasta
+        self.index = {r[0]: r[1:] for r in index}
+        self.names = [r[0] for i, r in enumerate(index) if self.index[r[0]] == r[1:]]
+
+        with open(fasta_file, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(fasta_file) > 0 else b''
+
+    def fetch(self, name, start=0, end=None):
+        """
+        Sub-sequence of a record
+
+        :param name: record name (e.g. ORF)
+        :param start: 0-based start
+        :param end: 0-based end (excluded), end of the record if None
+        :return: str
+        """
+        length, offset, bases, width = self.index[name]
+
+        start, end = max(0, start), length if end is None else min(end, length)
+
+        if start >= end:
+            return ''
+
+        first = offset + (start // bases) * width + start % bases
+        last = offset + ((end - 1) // bases) * width + (end - 1) % bases + 1
+
+        return self.data[first:last].replace(b'\n', b'').replace(b'\r', b'').replace(b'*', b'')
+
+    def bulk(self, names=None):
+        """
+        Records as one contiguous buffer, ready for vectorised window extraction
+
+        :param names: records to load, all if None
+        :return: list of names, uint8 array of the concatenated sequences and array of their offsets in the buffer
+        """
+        names = self.names if names is None else list(names)
+        sequences = [self.fetch(n) for n in names]
+
+        offsets = np.concatenate(([0], np.cumsum([len(s) for s in sequences]))).astype(np.int64)
+
+        return names, np.frombuffer(b''.join(sequences), dtype=np.uint8), offsets
+
+    def __getitem__(self, name):
+        return self.fetch(name)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def keys(self):
+        return list(self.names)
+
+    def items(self):
+        return ((n, self.fetch(n)) for n in self.names)
@@ -0,0 +1,118 @@
+import numpy as np
+from pandas import Index, Series, DataFrame
+from scipy.sparse import csr_matrix
+
+
+# -- Sparse regulator-target interactions
+class Incidence(object):
+    """
+    Sparse (targets x regulators) interaction matrix, e.g. p-sites x kinases or genes x
+    transcription-factors, backed by a scipy CSR matrix and labelled by pandas indexes.
+
+    Memory and alignment scale with the number of interactions instead of the number of
+    targets times the number of regulators of the equivalent pivot table.
+    """
+
+    def __init__(self, matrix, index, columns):
+        self.matrix = csr_matrix(matrix, dtype=np.float64)
+        self.matrix.eliminate_zeros()
+
+        self.index, self.columns = Index(index), Index(columns)
+
+    @classmethod
+    def from_interactions(cls, targets, regulators, values=None):
+        """
+        Build from pairs of interactions (duplicated interactions are counted once)
+
+        :param targets: iterable of targets (rows)
+        :param regulators: iterable of regulators (columns)
+        :param values: interaction weights, 1 if None
+        :return: Incidence with rows and columns sorted
+        """
+        index, rows = np.unique(np.asarray(targets), return_inverse=True)
+        columns, cols = np.unique(np.asarray(regulators), return_inverse=True)
+
+        values = np.ones(len(rows)) if values is None else np.asarray(values, dtype=np.float64)
+
+        # Keep first occurrence of duplicated interactions
+        _, first = np.unique(rows * len(columns) + cols, return_index=True)
+
+        matrix = csr_matrix((values[first], (rows[first], cols[first])), shape=(len(index), len(columns)))
+
+        return cls(matrix, index, columns)
+
+    @classmethod
+    def from_dataframe(cls, df):
+        return cls(csr_matrix(df.replace(np.NaN, 0.0).values.astype(np.float64)), df.index, df.columns)
+
+    @property
+    def shape(self):
+        return self.matrix.shape
+
+    @property
+    def nnz(self):
+        return self.matrix.nnz
+
+    def reindex(self, labels):
+        """
+        Gather rows by label, labels absent from the index are returned as rows of zeros
+
+        :param labels: iterable of target labels
+        :return: Incidence
+        """
+        labels = Index(labels)
+
+        pos = self.index.get_indexer(labels)
+        rows = np.where(pos != -1)[0]
+
+        selection = csr_matrix((np.ones(len(rows)), (rows, pos[rows])), shape=(len(labels), self.shape[0]))
+
+        return Incidence(selection.dot(self.matrix), labels, self.columns)
+
+    def reindex_columns(self, labels):
+        """
+        Gather columns by label, labels absent from the columns are returned as columns of zeros
+
+        :param labels: iterable of regulator labels
+        :return: Incidence
+        """
+        labels = Index(labels)
+
+        pos = self.columns.get_indexer(labels)
+        cols = np.where(pos != -1)[0]
+
+        selection = csr_matrix((np.ones(len(cols)), (pos[cols], cols)), shape=(self.shape[1], len(labels)))
+
+        return Incidence(self.matrix.dot(selection), self.index, labels)
+
+    def sum(self):
+        return Series(np.asarray(self.matrix.sum(0)).ravel(), index=self.columns)
+
+    def drop_empty(self):
+        """
+        Remove regulators without any target
+
+        :return: Incidence
+        """
+        keep = np.where(self.sum().values != 0)[0]
+        return Incidence(self.matrix[:, keep], self.index, self.columns[keep])
+
+    def column_rows(self):
+        """
+        :return: dict of regulator to array of its targets row positions
+        """
+        csc = self.matrix.tocsc()
+        return {c: csc.indices[csc.indptr[i]:csc.indptr[i + 1]] for i, c in enumerate(self.columns)}
+
+    def targets(self, column):
+        csc = self.matrix[:, self.columns.get_loc(column)].tocsc()
+        return set(self.index[csc.indices])
+
+    def to_sets(self):
+        """
+        :return: dict of regulator to set of targets
+        """
+        return {c: set(self.index[rows]) for c, rows in self.column_rows().items()}
+
+    def to_dense(self):
+        return DataFrame(self.matrix.toarray(), index=self.index, columns=self.columns)
@@ -0,0 +1,112 @@
+import os
+import numpy as np
+from yeast_phospho import wd
+from pandas import Index
+from scipy.sparse import csr_matrix
+from pymist.reader.sbml_reader import read_sbml_model
+from yeast_phospho.cache import cached_npz
+
+
+# -- Compiled stoichiometric model (e.g. iMM904)
+def compile_metabolic_model(sbml_file, cache_file):
+    """
+    Parse the SBML model once and store its stoichiometric matrix and gene associations as
+    sparse integer encoded arrays
+
+    :param sbml_file: SBML model
+    :param cache_file: compiled numpy (.npz) file
+    """
+    model = read_sbml_model(sbml_file)
+
+    s_matrix = model.get_stoichiometric_matrix()
+    reactions = s_matrix.columns.values.astype(str)
+
+    rows, cols = np.nonzero(s_matrix.values)
+
+    # Reaction gene associations
+    reaction_genes = [(j, g) for j, r in enumerate(reactions) for g in model.get_reaction_genes(r)]
+    genes = np.unique(np.array([g for j, g in reaction_genes], dtype=str))
+
+    np.savez(
+        cache_file,
+        metabolites=s_matrix.index.values.astype(str), reactions=reactions, genes=genes,
+        stoichiometry_metabolite=rows, stoichiometry_reaction=cols, stoichiometry=s_matrix.values[rows, cols].astype(np.float64),
+        gene_reaction=np.array([j for j, g in reaction_genes], dtype=np.int64), gene=np.searchsorted(genes, [g for j, g in reaction_genes]).astype(np.int64)
+    )
+
+
+class MetabolicModel(object):
+    """
+    Sparse metabolites x reactions stoichiometric matrix and reactions x genes associations.
+    Metabolites are also identified by their compartment-stripped ids (e.g. M_glu_DASH_L_c ->
+    glu_DASH_L), as in the metabolomics annotation.
+    """
+
+    external, biomass, exchange = '_b', 'R_biomass_SC5_notrace', 'R_EX_'
+
+    def __init__(self, arrays):
+        for k in arrays.files:
+            setattr(self, k, arrays[k])
+
+        self.s_matrix = csr_matrix((self.stoichiometry, (self.stoichiometry_metabolite, self.stoichiometry_reaction)), shape=(len(self.metabolites), len(self.reactions)))
+        self.reaction_genes = csr_matrix((np.ones(len(self.gene)), (self.gene_reaction, self.gene)), shape=(len(self.reactions), len(self.genes)))
+
+        self.metabolite_ids = np.array([m[2:-2] for m in self.metabolites], dtype=str)
+
+    def metabolite_gene_matrix(self, metabolites):
+        """
+        Genes of the reactions of every metabolite, all compartments merged. External
+        metabolites, exchange and biomass reactions are ignored.
+
+        :param metabolites: list of compartment-stripped metabolite ids
+        :return: sparse matrix (metabolites x genes), non-zero for associated genes
+        """
+        m_keep = np.where(~np.char.endswith(self.metabolites, self.external))[0]
+        r_keep = np.where((self.reactions != self.biomass) & ~np.char.startswith(self.reactions, self.exchange))[0]
+
+        m_genes = (self.s_matrix[m_keep][:, r_keep] != 0).astype(np.float64).dot(self.reaction_genes[r_keep])
+
+        # Merge compartments
+        rows = Index(metabolites).get_indexer(self.metabolite_ids[m_keep])
+        merge = csr_matrix((np.ones((rows >= 0).sum()), (rows[rows >= 0], np.where(rows >= 0)[0])), shape=(len(metabolites), len(m_keep)))
+
+        return merge.dot(m_genes).tocsr()
+
+    def metabolite_genes(self, metabolites, hubs=set()):
+        """
+        :param metabolites: list of compartment-stripped metabolite ids
+        :param hubs: highly connected metabolites to discard (e.g. 'atp', 'h2o')
+        :return: dict of metabolite to set of genes, metabolites without genes are discarded
+        """
+        metabolites = [m for m in sorted(set(metabolites)) if m not in hubs]
+        m_genes = self.metabolite_gene_matrix(metabolites)
+
+        return {m: set(self.genes[m_genes[i].indices].tolist()) for i, m in enumerate(metabolites) if m_genes[i].nnz > 0}
+
+    def gene_metabolites(self, metabolites, hubs=set()):
+        """
+        :return: dict of gene to set of metabolites, inverse of metabolite_genes
+        """
+        metabolites = [m for m in sorted(set(metabolites)) if m not in hubs]
+        g_metabolites = self.metabolite_gene_matrix(metabolites).T.tocsr()
+
+        return {g: {metabolites[i] for i in g_metabolites[j].indices} for j, g in enumerate(self.genes.tolist()) if g_metabolites[j].nnz > 0}
+
+    def gene_ions(self, annot, hubs=set()):
+        """
+        :param annot: dict of compartment-stripped metabolite id to ion
+        :param hubs: highly connected metabolites to discard
+        :return: dict of gene to set of ions of its metabolites
+        """
+        return {g: {annot[m] for m in ms} for g, ms in self.gene_metabolites(annot, hubs).items()}
+
+
+def load_metabolic_model(sbml_file, cache_dir='%s/cache/' % wd):
+    """
+    Load compiled metabolic model, compiling it if the cache of this file version is missing
+
+    :param sbml_file: SBML model (e.g. iMM904.v1.xml)
+    :param cache_dir:
+    :return: MetabolicModel
+    """
+    return MetabolicModel(cached_npz(os.path.basename(sbml_file), sbml_file, lambda cache_file: compile_metabolic_model(sbml_file, cache_file), cache_dir))
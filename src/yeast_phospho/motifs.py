@@ -0,0 +1,163 @@
+import hashlib
+import numpy as np
+from yeast_phospho import wd
+from pandas import DataFrame
+from scipy.sparse import csr_matrix
+from yeast_phospho.cache import cached_npz
+from yeast_phospho.fasta import IndexedFasta
+from yeast_phospho.incidence import Incidence
+from yeast_phospho.phosphogrid import load_phosphogrid
+from yeast_phospho.utilities import namespace, flanking_sequence, position_weight_matrix, encode_sequences, pwm_array, AA_PRIORS_YEAST
+
+
+# -- Batched kinase motif scanning
+class MotifScanner(object):
+    """
+    PWMs of a set of kinases weighted by their information content and stacked in one
+    (kinases x residues * positions) array. Flanking regions are one-hot encoded once and
+    scored against all kinases with a single sparse matrix product, giving the same scores
+    as utilities.similarity_score_matrix.
+    """
+
+    def __init__(self, pwms, ics, ignore_central=True):
+        """
+        :param pwms: dict of kinase to PWM DataFrame (residues x positions) of position_weight_matrix
+        :param ics: dict of kinase to information content Series (positions)
+        :param ignore_central: do not score the central residue
+        """
+        self.kinases = sorted(pwms)
+
+        # Nothing to scan, scores have no kinase columns
+        if len(self.kinases) == 0:
+            return
+
+        self.width = pwms[self.kinases[0]].shape[1]
+        self.central = int(np.floor(self.width / 2))
+
+        weights = np.array([pwm_array(pwms[k]) for k in self.kinases])
+        ic = np.array([ics[k][list(pwms[k])].values for k in self.kinases])
+
+        if ignore_central:
+            ic[:, self.central] = 0
+
+        # Best and worst scores
+        self.best = np.nansum(ic * weights[:, :-1].max(1), 1)
+        self.worst = np.nansum(ic * weights[:, :-1].min(1), 1)
+
+        self.weights = (weights * ic[:, None, :]).reshape(len(self.kinases), -1)
+
+        # Tyrosine kinases score sequences centred on Y, the others on S or T
+        self.tyrosine = np.array([pwms[k].ix[:, self.central].argmax() not in 'S|T' for k in self.kinases])
+
+    @classmethod
+    def from_targets(cls, targets, sequences, priors, flank=7, ignore_central=True):
+        """
+        Build the PWMs of every kinase from the flanking regions of its targets
+
+        :param targets: Incidence (p-sites x kinases)
+        :param sequences: dict of protein to sequence
+        :param priors: residues frequencies (e.g. AA_PRIORS_YEAST)
+        :param flank: number of residues on each side of the p-sites
+        :param ignore_central: do not score the central residue
+        :return: MotifScanner
+        """
+        flanking = flanking_sequence(sequences, [s for s in targets.index if s.split('_')[0] in sequences], flank)
+
+        pwms, ics = {}, {}
+        for k, rows in targets.column_rows().items():
+            regions = {s: flanking[s] for s in targets.index[rows] if s in flanking}
+
+            if len(regions) > 0:
+                pwms[k], ics[k] = position_weight_matrix(regions, priors)
+
+        return cls(pwms, ics, ignore_central)
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        :param arrays: arrays written by save
+        :return: MotifScanner
+        """
+        scanner = cls({}, {})
+        scanner.kinases = list(arrays['kinases'])
+
+        if len(scanner.kinases) > 0:
+            scanner.width, scanner.central = int(arrays['width']), int(arrays['central'])
+            scanner.best, scanner.worst, scanner.weights, scanner.tyrosine = arrays['best'], arrays['worst'], arrays['weights'], arrays['tyrosine']
+
+        return scanner
+
+    def save(self, cache_file):
+        """
+        Store the IC weighted PWMs in a numpy (.npz) file
+
+        :param cache_file:
+        """
+        if len(self.kinases) == 0:
+            np.savez(cache_file, kinases=np.array([], dtype=str))
+            return
+
+        np.savez(
+            cache_file,
+            kinases=np.array(self.kinases, dtype=str), width=self.width, central=self.central,
+            best=self.best, worst=self.worst, weights=self.weights, tyrosine=self.tyrosine
+        )
+
+    def score(self, flanking_regions, mask=None):
+        """
+        Similarity scores of flanking regions against all kinases
+
+        :param flanking_regions: dict of p-site to flanking region
+        :param mask: Incidence (proteins x kinases) of the kinases allowed to target each protein, e.g. interactors
+        :return: DataFrame (p-sites x kinases) of normalised scores, NaN if the central residue does not match the kinase type or if masked
+        """
+        sites = sorted(flanking_regions)
+
+        if len(self.kinases) == 0:
+            return DataFrame(index=sites, columns=self.kinases, dtype=np.float64)
+
+        encoded = encode_sequences([flanking_regions[s] for s in sites]).astype(np.int64).reshape(len(sites), self.width)
+
+        # One-hot encoding of the residue at each position
+        n = len(sites)
+        onehot = csr_matrix(
+            (np.ones(n * self.width), (np.repeat(np.arange(n), self.width), (encoded * self.width + np.arange(self.width)).ravel())),
+            shape=(n, (len(namespace) + 1) * self.width)
+        )
+
+        scores = (onehot.dot(self.weights.T) - self.worst) / (self.best - self.worst)
+
+        # Central residue matching the kinase type
+        central = encoded[:, self.central]
+        valid = np.where(self.tyrosine, (central == namespace.index('Y'))[:, None], np.in1d(central, [namespace.index('S'), namespace.index('T')])[:, None])
+
+        if mask is not None:
+            # Gather the kinase columns on the sparse mask, only sites x kinases is densified
+            mask = mask.reindex_columns(self.kinases).reindex([s.split('_')[0] for s in sites])
+            valid &= mask.matrix.toarray() != 0
+
+        return DataFrame(np.where(valid, scores, np.NaN), index=sites, columns=self.kinases)
+
+
+def load_motif_scanner(studies_to_filter={'21177495', '19779198'}, flank=7, ignore_central=True, phosphogrid_file='%s/files/PhosphoGrid.txt' % wd, fasta_file='%s/files/orf_trans_all.fasta' % wd, cache_dir='%s/cache/' % wd):
+    """
+    MotifScanner of the PhosphoGrid kinases targets, its PWMs are built once and cached by the
+    PhosphoGrid and FASTA versions and the parameters
+
+    :param studies_to_filter: targets only supported by these pubmed ids are discarded, as get_kinases_targets
+    :param flank: number of residues on each side of the p-sites
+    :param ignore_central: do not score the central residue
+    :param phosphogrid_file:
+    :param fasta_file: proteins sequences
+    :param cache_dir:
+    :return: MotifScanner
+    """
+    def compile_motifs(cache_file):
+        k_targets = load_phosphogrid(phosphogrid_file, cache_dir).interactions(studies_to_filter)
+        targets = Incidence.from_interactions(k_targets['site'], k_targets['kinase'])
+
+        MotifScanner.from_targets(targets, IndexedFasta(fasta_file, cache_dir), AA_PRIORS_YEAST, flank, ignore_central).save(cache_file)
+
+    parameters = hashlib.md5(repr((sorted(studies_to_filter), flank, ignore_central))).hexdigest()
+
+    return MotifScanner.from_arrays(cached_npz('KinaseMotifs_%s' % parameters, {'phosphogrid': phosphogrid_file, 'fasta': fasta_file}, compile_motifs, cache_dir))
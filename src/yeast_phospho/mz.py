@@ -0,0 +1,82 @@
+import numpy as np
+from pandas import Index
+
+
+# -- Tolerance based m/z index
+def mz_window(mz, ppm=None, da=None):
+    """
+    :param mz: array of m/z values
+    :param ppm: relative tolerance in parts per million
+    :param da: absolute tolerance in Dalton, added to the relative one
+    :return: array of the half-width of the matching window of every m/z
+    """
+    if ppm is None and da is None:
+        raise ValueError('Either ppm or da tolerance must be given')
+
+    return (0. if da is None else da) + np.asarray(mz, dtype=np.float64) * (0. if ppm is None else ppm * 1e-6)
+
+
+class MzIndex(object):
+    """
+    Ions m/z values stored as a sorted float64 array. Queries are matched within a ppm and/or
+    Dalton tolerance with searchsorted, returning positions in the original (unsorted) order.
+    """
+
+    def __init__(self, mz):
+        """
+        :param mz: array of m/z values, e.g. the index of a metabolomics DataFrame
+        """
+        mz = np.asarray(mz, dtype=np.float64)
+
+        self.order = np.argsort(mz, kind='mergesort')
+        self.mz = mz[self.order]
+
+    def __len__(self):
+        return len(self.mz)
+
+    def lookup(self, query, ppm=None, da=None):
+        """
+        All ions within tolerance of every query m/z (many-to-many)
+
+        :param query: array of m/z values
+        :return: positions of the queries and positions of their matching ions
+        """
+        query = np.asarray(query, dtype=np.float64)
+        window = mz_window(query, ppm, da)
+
+        lo, hi = np.searchsorted(self.mz, query - window, side='left'), np.searchsorted(self.mz, query + window, side='right')
+        n = np.maximum(hi - lo, 0)
+
+        q = np.repeat(np.arange(len(query)), n)
+        i = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n) + np.repeat(lo, n)
+
+        return q, self.order[i]
+
+
+def mz_labels(mz, decimals=4):
+    """
+    :param mz: array of m/z values
+    :param decimals: number of decimals of the labels
+    :return: array of m/z labels, e.g. '%.4f' % mz
+    """
+    return np.array(['%.*f' % (decimals, i) for i in np.asarray(mz, dtype=np.float64)], dtype=object)
+
+
+def unique_ions(df, decimals=4):
+    """
+    Label ions by their m/z rounded to a number of decimals and discard the ions sharing a label,
+    as the '%.4f' labels of the tables
+
+    :param df: DataFrame (ions x samples) indexed by m/z
+    :param decimals: number of decimals of the labels
+    :return: DataFrame (unique ions x samples) indexed by m/z labels
+    """
+    labels = mz_labels(df.index.values, decimals)
+    _, inverse, counts = np.unique(labels, return_inverse=True, return_counts=True)
+
+    keep = counts[inverse] == 1
+
+    df = df[keep].copy()
+    df.index = Index(labels[keep], name=df.index.name)
+
+    return df
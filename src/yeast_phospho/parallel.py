@@ -0,0 +1,205 @@
+import os
+import pickle
+import hashlib
+import numpy as np
+from pandas import DataFrame, Series, concat
+from multiprocessing import Pool
+
+
+# -- Process-pool execution of activity estimations across conditions
+_shared = {}
+
+
+def _init_worker(targets):
+    _shared['targets'] = targets
+
+
+def _run_task(args):
+    func, df, kwargs = args
+    return func(_shared['targets'], df, **kwargs)
+
+
+def condition_seed(seed, condition):
+    """
+    Random seed of a condition, independent of the order and of the worker in which the
+    conditions are estimated
+
+    :param seed: base seed
+    :param condition: condition label
+    :return: int
+    """
+    return int(hashlib.md5(('%s_%s' % (seed, condition)).encode('utf-8')).hexdigest()[:8], 16)
+
+
+def map_conditions(func, targets, chunks, n_jobs=1, **kwargs):
+    """
+    Apply func(targets, chunk, **kwargs) to every chunk of conditions. Targets are shipped
+    once to each worker, not with every task.
+
+    :param func: module level function returning a DataFrame with the chunk conditions as columns
+    :param targets: regulators targets shared by all tasks
+    :param chunks: list of DataFrames (measurements x conditions)
+    :param n_jobs: number of worker processes
+    :return: DataFrame with the conditions in the order of the chunks
+    """
+    if n_jobs == 1 or len(chunks) < 2:
+        results = [func(targets, chunk, **kwargs) for chunk in chunks]
+
+    else:
+        pool = Pool(min(n_jobs, len(chunks)), initializer=_init_worker, initargs=(targets, ))
+
+        try:
+            results = pool.map(_run_task, [(func, chunk, kwargs) for chunk in chunks], chunksize=1)
+
+        finally:
+            pool.close()
+            pool.join()
+
+    return concat(results, axis=1)[[c for chunk in chunks for c in chunk]]
+
+
+# -- Checkpointed task scheduler
+def data_digest(value):
+    """
+    Digest of the content of a DataFrame, Series or array (labels, dtype, shape and values),
+    other values are digested from their pickle
+
+    :return: str
+    """
+    md5 = hashlib.md5()
+
+    if isinstance(value, (DataFrame, Series)):
+        md5.update(pickle.dumps((type(value).__name__, list(value.index), list(value.columns) if isinstance(value, DataFrame) else value.name), protocol=2))
+        value = value.values
+
+    if isinstance(value, np.ndarray):
+        md5.update(pickle.dumps((str(value.dtype), value.shape), protocol=2))
+        md5.update(pickle.dumps(value.tolist(), protocol=2) if value.dtype == object else np.ascontiguousarray(value).tobytes())
+
+    else:
+        md5.update(pickle.dumps(value, protocol=2))
+
+    return md5.hexdigest()
+
+
+def is_data(value):
+    return isinstance(value, (DataFrame, Series, np.ndarray))
+
+
+def task_key(func, kwargs, inputs=None):
+    """
+    Key of a task: hash of the function name, of its parameters and of the digests of its data.
+    If inputs are given they identify the data arguments (DataFrames, Series and arrays) of the
+    task, e.g. {condition: data_digest(condition data)} of the conditions a task is trained on,
+    hence a task is recomputed only if the data of one of these conditions changes.
+
+    :param func: module level function
+    :param kwargs: dict of keyword arguments
+    :param inputs: dict of input label to digest, None to digest the data arguments themselves
+    :return: str
+    """
+    params = sorted((k, data_digest(v)) for k, v in kwargs.items() if inputs is None or not is_data(v))
+    inputs = [] if inputs is None else sorted(inputs.items())
+
+    return hashlib.md5(pickle.dumps((func.__module__, func.__name__, params, inputs), protocol=2)).hexdigest()
+
+
+class CheckpointStore(object):
+    """
+    Append-only file of pickled (key, result) records. A record partially written by an
+    interrupted run is discarded on load, and so are the records of keys no longer in use.
+    """
+
+    def __init__(self, store_file, keys=None):
+        """
+        :param store_file: checkpoint file
+        :param keys: keys in use, records of other keys are removed from the store, all kept if None
+        """
+        self.store_file, self.results = store_file, {}
+
+        if os.path.exists(store_file):
+            n_records, offset = 0, 0
+
+            with open(store_file, 'rb') as f:
+                while True:
+                    try:
+                        key, result = pickle.load(f)
+
+                    except (EOFError, pickle.UnpicklingError, ValueError, IndexError, AttributeError, KeyError, TypeError):
+                        break
+
+                    n_records, offset = n_records + 1, f.tell()
+
+                    if keys is None or key in keys:
+                        self.results[key] = result
+
+            # Compact: rewrite the store if it holds stale or duplicated records
+            if n_records != len(self.results):
+                tmp_file = '%s.tmp' % store_file
+
+                with open(tmp_file, 'wb') as f:
+                    for key, result in self.results.items():
+                        pickle.dump((key, result), f, protocol=2)
+
+                os.rename(tmp_file, store_file)
+
+            else:
+                with open(store_file, 'ab') as f:
+                    f.truncate(offset)
+
+        elif not os.path.exists(os.path.dirname(os.path.abspath(store_file))):
+            os.makedirs(os.path.dirname(os.path.abspath(store_file)))
+
+    def __contains__(self, key):
+        return key in self.results
+
+    def __getitem__(self, key):
+        return self.results[key]
+
+    def append(self, key, result):
+        with open(self.store_file, 'ab') as f:
+            pickle.dump((key, result), f, protocol=2)
+
+        self.results[key] = result
+
+
+def _run_job(args):
+    func, key, kwargs = args
+    return key, func(**kwargs)
+
+
+def run_tasks(func, tasks, store_file, n_jobs=1):
+    """
+    Run tasks on a process pool, storing every result as soon as it completes. Tasks already
+    in the store (same function, parameters and data) are not run again, hence an interrupted
+    sweep resumes where it stopped. Results of tasks no longer in the sweep are dropped from
+    the store.
+
+    :param func: module level function
+    :param tasks: list of (label, dict of keyword arguments) or (label, dict of keyword arguments, inputs), see task_key
+    :param store_file: checkpoint file
+    :param n_jobs: number of worker processes
+    :return: dict of label to result
+    """
+    keys = [(task[0], task_key(func, task[1], task[2] if len(task) > 2 else None)) for task in tasks]
+
+    store = CheckpointStore(store_file, {key for label, key in keys})
+
+    jobs = {key: (func, key, task[1]) for (label, key), task in zip(keys, tasks) if key not in store}.values()
+
+    if n_jobs == 1 or len(jobs) < 2:
+        for key, result in map(_run_job, jobs):
+            store.append(key, result)
+
+    else:
+        pool = Pool(min(n_jobs, len(jobs)))
+
+        try:
+            for key, result in pool.imap_unordered(_run_job, jobs):
+                store.append(key, result)
+
+        finally:
+            pool.close()
+            pool.join()
+
+    return {label: store[key] for label, key in keys}
@@ -0,0 +1,205 @@
+import re
+import numpy as np
+from pandas import DataFrame, MultiIndex
+
+
+# -- Batch peptide to phosphosite mapping
+MODIFICATION = re.compile('\[[0-9]*\.?[0-9]*\]')
+
+
+def parse_modifications(peptide):
+    """
+    Parse modification brackets of a peptide, e.g. 'AS[167]PT[181]EK'
+
+    :param peptide: modified peptide sequence
+    :return: unmodified sequence and 0-based offsets of the modified residues
+    """
+    sequence, offsets, last = '', [], 0
+
+    for m in MODIFICATION.finditer(peptide):
+        sequence += peptide[last:m.start()]
+        offsets.append(len(sequence) - 1)
+        last = m.end()
+
+    return sequence + peptide[last:], offsets
+
+
+class ProteomeIndex(object):
+    """
+    Suffix array of all protein sequences (concatenated with a separator) sorted to a depth
+    of k residues, i.e. the sorted k-mers of the proteome. Peptides are located all at once
+    by searching their first k residues and verifying the remaining ones.
+    """
+
+    separator = '$'
+
+    def __init__(self, sequences, k=7):
+        self.proteins = sorted(sequences)
+        self.text = self.separator.join(sequences[p] for p in self.proteins) + self.separator
+        self.starts = np.concatenate(([0], np.cumsum([len(sequences[p]) + 1 for p in self.proteins])))
+        self.k = k
+
+        # Residues encoding: 0 is kept for the end of the text and padding, -1 for unknown residues
+        text = np.frombuffer(self.text, dtype=np.uint8)
+        residues = np.unique(text)
+
+        self.encoding = -np.ones(256, dtype=np.int64)
+        self.encoding[0] = 0
+        self.encoding[residues] = np.arange(1, len(residues) + 1)
+        self.base = len(residues) + 1
+
+        self.encoded = self.encoding[text]
+
+        codes = self.kmers(np.concatenate((self.encoded, np.zeros(k - 1, dtype=np.int64)))[np.arange(len(text))[:, None] + np.arange(k)])
+
+        self.sa = np.argsort(codes, kind='mergesort')
+        self.codes = codes[self.sa]
+
+    def kmers(self, encoded):
+        return np.dot(encoded, self.base ** np.arange(self.k - 1, -1, -1, dtype=np.int64))
+
+    def encode(self, sequences):
+        """
+        :param sequences: list of sequences
+        :return: (sequences x longest sequence) matrix of residues codes padded with 0
+        """
+        width = max(len(s) for s in sequences)
+        encoded = np.frombuffer(''.join(s.ljust(width, '\0') for s in sequences), dtype=np.uint8).reshape(len(sequences), width)
+        return self.encoding[encoded]
+
+    def find(self, sequences):
+        """
+        Locate all sequences in the proteome
+
+        :param sequences: list of unmodified peptide sequences
+        :return: arrays of the sequence index and of the start position in the concatenated proteome of every match, sorted by sequence and position
+        """
+        k, encoded = self.k, self.encode(sequences)
+        lengths = np.array([len(s) for s in sequences], dtype=np.int64)
+
+        # Search first k residues, sequences shorter than k match all k-mers starting with them
+        heads = np.zeros((len(sequences), k), dtype=np.int64)
+        heads[:, :min(k, encoded.shape[1])] = np.maximum(encoded[:, :k], 0)
+
+        codes = self.kmers(heads)
+
+        lo = np.searchsorted(self.codes, codes, side='left')
+        hi = np.searchsorted(self.codes, codes + self.base ** (k - np.minimum(lengths, k)), side='left')
+
+        # Sequences with unknown residues have no match
+        hi[(encoded < 0).any(1)] = lo[(encoded < 0).any(1)]
+
+        # Candidate matches
+        counts = hi - lo
+        index = np.repeat(np.arange(len(sequences)), counts)
+        positions = self.sa[np.repeat(lo - np.concatenate(([0], np.cumsum(counts)[:-1])), counts) + np.arange(counts.sum())]
+
+        # Verify residues after the first k
+        window = np.concatenate((self.encoded, np.zeros(encoded.shape[1], dtype=np.int64)))[positions[:, None] + np.arange(encoded.shape[1])]
+        match = ((window == encoded[index]) | (encoded[index] == 0)).all(1)
+
+        index, positions = index[match], positions[match]
+
+        order = np.lexsort((positions, index))
+        return index[order], positions[order]
+
+    def locate(self, sequences, chunk_size=10000):
+        """
+        :param sequences: list of unmodified peptide sequences
+        :param chunk_size: sequences searched at once (bounds memory)
+        :return: arrays of sequence index, protein index (in self.proteins) and 0-based start of every match
+        """
+        res = []
+
+        for c in range(0, len(sequences), chunk_size):
+            index, positions = self.find(sequences[c:c + chunk_size])
+            proteins = np.searchsorted(self.starts, positions, side='right') - 1
+
+            res.append((index + c, proteins, positions - self.starts[proteins]))
+
+        return tuple(np.concatenate(a) for a in zip(*res)) if len(res) > 0 else (np.array([], dtype=np.int64), ) * 3
+
+
+def map_peptides(peptides, proteins, index):
+    """
+    Map modified peptides to their phosphosites, equivalent to utilities.get_multiple_site
+    for peptides found in their protein. Peptides are placed at their first occurrence in the
+    protein, the number of occurrences and of matching proteins are reported to flag
+    ambiguous peptides.
+
+    :param peptides: list of modified peptides
+    :param proteins: list of the proteins of the peptides (None entries are searched in the whole proteome)
+    :param index: ProteomeIndex
+    :return: DataFrame with 'peptide', 'protein', 'start' (0-based), 'site' (e.g. YAL017W_S123_T125),
+        'matches' (occurrences in the protein) and 'proteins' (number of proteins matched)
+    """
+    parsed = [parse_modifications(p) for p in peptides]
+
+    m_peptide, m_protein, m_start = index.locate([s for s, o in parsed])
+
+    # Number of distinct proteins matched
+    first = np.concatenate(([True], (m_peptide[1:] != m_peptide[:-1]) | (m_protein[1:] != m_protein[:-1])))[:len(m_peptide)]
+    n_proteins = np.bincount(m_peptide[first], minlength=len(peptides))
+
+    # Keep matches in the peptide protein
+    protein_id = {p: i for i, p in enumerate(index.proteins)}
+    targets = np.array([-1 if p is None else protein_id.get(p, -2) for p in proteins], dtype=np.int64)
+
+    keep = (targets[m_peptide] == -1) | (targets[m_peptide] == m_protein)
+    m_peptide, m_protein, m_start = m_peptide[keep], m_protein[keep], m_start[keep]
+
+    # Matches are sorted by peptide and position: the first one of each peptide is kept
+    n_matches = np.bincount(m_peptide, minlength=len(peptides))
+    first = np.searchsorted(m_peptide, np.arange(len(peptides)))
+
+    res = []
+    for i, (peptide, protein, (sequence, offsets)) in enumerate(zip(peptides, proteins, parsed)):
+        if n_matches[i] == 0:
+            res.append((peptide, protein, np.NaN, np.NaN))
+            continue
+
+        p, start = index.proteins[m_protein[first[i]]], m_start[first[i]]
+        site = '_'.join(['%s%d' % (sequence[o], start + o + 1) for o in offsets])
+
+        res.append((peptide, p, start, '%s_%s' % (p, site)))
+
+    res = DataFrame(res, columns=['peptide', 'protein', 'start', 'site'])
+    res['matches'], res['proteins'] = n_matches, n_proteins
+
+    return res
+
+
+# -- Peptide map of the dynamic experiments
+def index_peptide_map(peptide_map, site_columns=('site_1', 'site_2', 'site_3', 'site_4')):
+    """
+    Index a peptide map (e.g. dynamic_peptides_map.tab) in one grouped pass
+
+    :param peptide_map: DataFrame with 'condition', 'peptide', 'protein' and site position columns
+    :param site_columns: site position columns
+    :return: DataFrame indexed by (condition, peptide) with the number of mapped phosphopeptides ('phosphopeptides'),
+        and the number of sites ('sites'), protein ('protein') and first site position ('position') of the first mapping
+    """
+    keys = ['condition', 'peptide']
+
+    first = peptide_map.drop_duplicates(keys).set_index(keys)
+
+    res = DataFrame({
+        'phosphopeptides': peptide_map.groupby(keys).size().reindex(first.index).values,
+        'sites': first[list(site_columns)].count(1).values,
+        'protein': first['protein'].values,
+        'position': first[site_columns[0]].values
+    }, index=first.index, columns=['phosphopeptides', 'sites', 'protein', 'position'])
+
+    return res
+
+
+def condition_peptide_map(peptide_map, condition, peptides):
+    """
+    :param peptide_map: DataFrame of index_peptide_map
+    :param condition: condition, e.g. 'Rapamycin'
+    :param peptides: peptides of the condition
+    :return: DataFrame of the peptides mapping in the condition, NaN for unmapped peptides or if the condition is missing
+    """
+    keys = MultiIndex.from_arrays([np.repeat(condition, len(peptides)), list(peptides)], names=peptide_map.index.names)
+
+    return peptide_map.reindex(keys).reset_index(level=0, drop=True)
@@ -0,0 +1,127 @@
+import numpy as np
+from yeast_phospho import wd
+from pandas import DataFrame, read_csv
+from yeast_phospho.cache import cached_npz
+
+
+# -- Compiled PhosphoGrid knowledge-base
+def pubmed_index(records_pubmeds, pubmeds):
+    """
+    Inverted pubmed -> records index
+
+    :param records_pubmeds: list of (record, pubmed id) evidences
+    :param pubmeds: sorted array of all pubmed ids
+    :return: index pointer (per pubmed) and records arrays, number of distinct pubmeds per record
+    """
+    records = np.array([r for r, p in records_pubmeds], dtype=np.int64)
+    ids = np.searchsorted(pubmeds, [p for r, p in records_pubmeds])
+
+    order = np.argsort(ids, kind='mergesort')
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(ids, minlength=len(pubmeds)))))
+
+    return indptr, records[order]
+
+
+def compile_phosphogrid(phosphogrid_file, cache_file):
+    """
+    Parse PhosphoGrid once and store it as integer encoded arrays
+
+    :param phosphogrid_file: PhosphoGrid.txt
+    :param cache_file: compiled numpy (.npz) file
+    """
+    df = read_csv(phosphogrid_file, sep='\t')
+
+    # Records (PhosphoGrid rows) to p-sites
+    sites, record_site = np.unique((df['ORF_NAME'] + '_' + df['PHOSPHO_SITE']).values.astype(str), return_inverse=True)
+
+    # Regulator (kinases and phosphatases) interactions
+    interactions = [(r, k) for r, source in enumerate(df['KINASES_ORFS'] + '|' + df['PHOSPHATASES_ORFS']) for k in source.split('|') if k != '-' and k != '']
+    regulators, interaction_regulator = np.unique(np.array([k for r, k in interactions], dtype=str), return_inverse=True)
+
+    # Pubmed evidences
+    evidences = {c: [(r, p) for r, i in enumerate(df[c]) for p in set(i.split('|'))] for c in ['KINASES_EVIDENCE_PUBMED', 'PHOSPHATASES_EVIDENCE_PUBMED']}
+    pubmeds = np.unique(np.array([p for c in evidences for r, p in evidences[c]], dtype=str))
+
+    k_indptr, k_records = pubmed_index(evidences['KINASES_EVIDENCE_PUBMED'], pubmeds)
+    p_indptr, p_records = pubmed_index(evidences['PHOSPHATASES_EVIDENCE_PUBMED'], pubmeds)
+
+    # Protein sequences in one buffer
+    sequences = df.groupby('ORF_NAME')['SEQUENCE'].first().dropna()
+    offsets = np.concatenate(([0], np.cumsum([len(s) for s in sequences.values])))
+
+    np.savez(
+        cache_file,
+        sites=sites, record_site=record_site,
+        regulators=regulators, interaction_record=np.array([r for r, k in interactions], dtype=np.int64), interaction_regulator=interaction_regulator,
+        pubmeds=pubmeds,
+        kinases_pubmed_indptr=k_indptr, kinases_pubmed_records=k_records, kinases_n_pubmeds=np.bincount([r for r, p in evidences['KINASES_EVIDENCE_PUBMED']], minlength=df.shape[0]),
+        phosphatases_pubmed_indptr=p_indptr, phosphatases_pubmed_records=p_records, phosphatases_n_pubmeds=np.bincount([r for r, p in evidences['PHOSPHATASES_EVIDENCE_PUBMED']], minlength=df.shape[0]),
+        proteins=sequences.index.values.astype(str), sequences=np.array(''.join(sequences.values)), sequences_offsets=offsets
+    )
+
+
+class PhosphoGrid(object):
+    """
+    Integer encoded PhosphoGrid: p-sites records, kinase/phosphatase interactions and an
+    inverted pubmed -> records index of the supporting evidences
+    """
+
+    def __init__(self, arrays):
+        for k in arrays.files:
+            setattr(self, k, arrays[k])
+
+        self.n_records = len(self.record_site)
+
+    def evidence_mask(self, regulator_type, studies_to_filter):
+        """
+        Records with evidences other than the studies to filter
+
+        :param regulator_type: 'kinases' or 'phosphatases'
+        :param studies_to_filter: set of pubmed ids
+        :return: boolean array over records
+        """
+        indptr, records = getattr(self, '%s_pubmed_indptr' % regulator_type), getattr(self, '%s_pubmed_records' % regulator_type)
+
+        ids = np.searchsorted(self.pubmeds, list(studies_to_filter))
+        ids = [i for i, p in zip(ids, studies_to_filter) if i < len(self.pubmeds) and self.pubmeds[i] == p]
+
+        n_filtered = np.bincount(np.concatenate([records[indptr[i]:indptr[i + 1]] for i in ids] + [np.array([], dtype=np.int64)]), minlength=self.n_records)
+
+        return n_filtered != getattr(self, '%s_n_pubmeds' % regulator_type)
+
+    def interactions(self, studies_to_filter=set()):
+        """
+        Regulator p-site interactions
+
+        :param studies_to_filter: records only supported by these pubmed ids are discarded
+        :return: DataFrame with 'kinase' and 'site' columns
+        """
+        keep = self.evidence_mask('kinases', studies_to_filter) & self.evidence_mask('phosphatases', studies_to_filter)
+        keep = keep[self.interaction_record]
+
+        return DataFrame({
+            'kinase': self.regulators[self.interaction_regulator[keep]],
+            'site': self.sites[self.record_site[self.interaction_record[keep]]]
+        }, columns=['kinase', 'site'])
+
+    def regulators_proteins(self):
+        """
+        :return: set of (regulator, target protein) pairs
+        """
+        proteins = [s.split('_')[0] for s in self.sites[self.record_site[self.interaction_record]]]
+        return set(zip(self.regulators[self.interaction_regulator], proteins))
+
+    def protein_sequences(self):
+        sequences = str(self.sequences)
+        return {p: sequences[self.sequences_offsets[i]:self.sequences_offsets[i + 1]] for i, p in enumerate(self.proteins)}
+
+
+def load_phosphogrid(phosphogrid_file='%s/files/PhosphoGrid.txt' % wd, cache_dir='%s/cache/' % wd):
+    """
+    Load compiled PhosphoGrid, compiling it if the cache of this file version is missing
+
+    :param phosphogrid_file:
+    :param cache_dir:
+    :return: PhosphoGrid
+    """
+    return PhosphoGrid(cached_npz('PhosphoGrid', phosphogrid_file, lambda cache_file: compile_phosphogrid(phosphogrid_file, cache_file), cache_dir))
@@ -5,7 +5,7 @@ from yeast_phospho import wd
 from sklearn.decomposition import PCA
 from yeast_phospho.utilities import pearson
 from pandas import DataFrame, Series, read_csv, melt
-from scipy.interpolate.interpolate import interp1d
+from yeast_phospho.timecourse import interpolate
 
 p_timepoints = [-10, 5, 9, 15, 25, 44, 79]
 
@@ -15,19 +15,10 @@ growth['time_perturbation_min'] = growth['time_perturbation'] * 60
 
 
 def interpolate_growth(df, timepoints):
-    growth_tp = []
-    for sample in set(df['sample']):
-        x = df.loc[df['sample'] == sample, 'time_perturbation_min']
-        y = df.loc[df['sample'] == sample, 'OD600']
+    # Samples x time points OD600, samples are interpolated on their own time points
+    od = df.pivot_table(index='sample', columns='time_perturbation_min', values='OD600')
 
-        regression = interp1d(x, y)
-
-        growth_tp.append(regression(timepoints))
-
-    growth_tp = DataFrame(growth_tp).T.median(1)
-    growth_tp.index = timepoints
-
-    return growth_tp
+    return Series(DataFrame(interpolate(od.values, od.columns.values, timepoints)).median().values, index=timepoints)
 
 growth_tp = DataFrame({cond: interpolate_growth(growth[growth['condition'] == cond], p_timepoints) for cond in set(growth['condition'])})
 growth_tp['timepoint'] = growth_tp.index
@@ -4,7 +4,9 @@ import numpy as np
 import itertools as it
 from yeast_phospho import wd
 from pandas import DataFrame, read_csv, Index, concat, melt, pivot_table
-from scipy.interpolate.interpolate import interp1d
+from yeast_phospho.timecourse import fold_change
+from yeast_phospho.replicates import replicate_stats, collapse_replicates
+from yeast_phospho.mz import unique_ions
 
 
 # Import growth rates
@@ -14,11 +16,7 @@ ko_strains = list(growth.index)
 
 # --  Process steady-state metabolomics
 metabol_df = read_csv(wd + 'data/steady_state_metabolomics.tab', sep='\t').dropna()
-metabol_df['m/z'] = ['%.4f' % i for i in metabol_df['m/z']]
-
-counts = {mz: counts for mz, counts in zip(*(np.unique(metabol_df['m/z'], return_counts=True)))}
-metabol_df = metabol_df[[counts[i] == 1 for i in metabol_df['m/z']]]
-metabol_df = metabol_df.set_index('m/z')
+metabol_df = unique_ions(metabol_df.set_index('m/z'), 4)
 
 metabol_df = metabol_df[ko_strains]
 
@@ -27,11 +25,7 @@ metabol_df.to_csv('%s/tables/metabolomics_steady_state.tab' % wd, sep='\t')
 
 # --  Process dynamic metabolomics
 dyn_metabol = read_csv(wd + 'data/metabol_intensities.tab', sep='\t').dropna()
-dyn_metabol['m/z'] = ['%.4f' % i for i in dyn_metabol['m/z']]
-
-counts = {mz: counts for mz, counts in zip(*(np.unique(dyn_metabol['m/z'], return_counts=True)))}
-dyn_metabol = dyn_metabol[[counts[i] == 1 for i in dyn_metabol['m/z']]]
-dyn_metabol = dyn_metabol.set_index('m/z')
+dyn_metabol = unique_ions(dyn_metabol.set_index('m/z'), 4)
 
 # Import samplesheet
 ss = read_csv(wd + 'data/metabol_samplesheet.tab', sep='\t', index_col=0)
@@ -41,21 +35,18 @@ conditions, p_timepoints, dyn_metabol_df, cv = ['N_downshift', 'N_upshift', 'Rap
 for condition in conditions:
     ss_cond = ss[ss['condition'] == condition]
 
-    # Coefficient of variation
-    cv_df = DataFrame({m: {t: dyn_metabol.ix[m, ss_cond[ss_cond['time'] == t].index].std() / dyn_metabol.ix[m, ss_cond[ss_cond['time'] == t].index].mean() for t in set(ss_cond['time'])} for m in dyn_metabol.index})
-    cv = concat([cv, cv_df])
+    # Replicates mean and coefficient of variation of every time-point
+    stats = replicate_stats(dyn_metabol, ss_cond['time'])
+    cv = concat([cv, stats['cv'].T])
 
     # Average metabolite replicates
-    m_df_cond = DataFrame({m: {t: dyn_metabol.ix[m, ss_cond[ss_cond['time'] == t].index].mean() for t in set(ss_cond['time'])} for m in dyn_metabol.index})
-    m_df_cond.index = Index([float(i.replace('min', '')) for i in m_df_cond.index])
-    m_df_cond = m_df_cond.ix[np.sort(m_df_cond.index)].T
+    m_df_cond = stats['mean']
+    m_df_cond.columns = Index([float(i.replace('min', '')) for i in m_df_cond.columns])
+    m_df_cond = m_df_cond[np.sort(m_df_cond.columns)]
 
-    # Interpolate phospho time-points
-    m_df_cond = DataFrame({m: interp1d(m_df_cond.ix[m].index, m_df_cond.ix[m].values)(p_timepoints) for m in dyn_metabol.index}, index=['%s_%dmin' % (condition, i) for i in p_timepoints]).T
-
-    # Calculate log2 fold-change
-    tx, t0 = ['%s_%dmin' % (condition, i) for i in p_timepoints if i != -10], '%s_-10min' % condition
-    m_df_cond = np.log2(m_df_cond[tx].div(m_df_cond[t0], axis=0))
+    # Interpolate phospho time-points and calculate log2 fold-change
+    m_df_cond = fold_change(m_df_cond, m_df_cond.columns.values, p_timepoints, -10)
+    m_df_cond.columns = ['%s_%dmin' % (condition, i) for i in m_df_cond]
 
     # Append to existing data-set
     dyn_metabol_df = dyn_metabol_df.join(m_df_cond, how='outer')
@@ -72,23 +63,8 @@ dyn_metabol = dyn_metabol.drop(['metabolite', 'metabolite_charge'], axis=1)
 
 condition = 'N_upshift'
 
-tec_rep = {
-    'BY003_02': 'BY003_01', 'BY003_03': 'BY003_01', 'BY003_04': 'BY003_01',
-    'BY008_02': 'BY008_01', 'BY008_03': 'BY008_01', 'BY008_04': 'BY008_01',
-    'BY012_02': 'BY012_01', 'BY012_03': 'BY012_01', 'BY012_04': 'BY012_01',
-
-    'BY009_03': 'BY009_01', 'BY009_04': 'BY009_01',
-    'BY010_02': 'BY010_01', 'BY010_03': 'BY010_01', 'BY010_04': 'BY010_01',
-    'BY013_02': 'BY013_01', 'BY013_03': 'BY013_01', 'BY013_04': 'BY013_01',
-
-    'BY005_02': 'BY005_01', 'BY005_03': 'BY005_01', 'BY005_04': 'BY005_01',
-    'BY006_02': 'BY006_01', 'BY006_03': 'BY006_01', 'BY006_04': 'BY006_01',
-    'BY007_02': 'BY007_01', 'BY007_03': 'BY007_01', 'BY007_04': 'BY007_01'
-}
-
-
-dyn_metabol.columns = [tec_rep[c] if c in tec_rep else c for c in dyn_metabol]
-dyn_metabol = DataFrame({c: dyn_metabol[c].mean(1) if len(dyn_metabol[c].shape) > 1 else dyn_metabol[c] for c in dyn_metabol})
+tec_rep = read_csv('%s/files/metabol_technical_replicates.tab' % wd, sep='\t', index_col=0)['replicate']
+dyn_metabol = collapse_replicates(dyn_metabol, tec_rep)
 
 for time in [.1, .25, .5, .75, 1., 2., 7., 10., 20., 45., 60., 120.]:
     t0 = set(ss[(ss['condition'] == condition) & (ss['time_value'] < 0)].index).intersection(dyn_metabol)
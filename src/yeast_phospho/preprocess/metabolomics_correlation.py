@@ -6,14 +6,12 @@ from yeast_phospho import wd
 from pandas.stats.misc import zscore
 from scipy.stats.stats import spearmanr
 from pandas import DataFrame, Series, read_csv, concat
+from yeast_phospho.annotation import load_annotation
 
 
 # -- Imports
 # Annotation
-annot = read_csv('%s/files/2015_12_10_fia_experiments_imm904_annotation.txt' % wd, sep='\t', index_col=0)
-annot['mz'] = ['%.4f' % i for i in annot['mz']]
-annot = annot[annot['mod'] == '-H(+)']
-annot = annot.groupby('mz')['id'].agg(lambda x: set(x)).to_dict()
+annot = load_annotation()
 
 m_map = read_csv('%s/files/james_yeast.txt' % wd, sep='\t', index_col=0).dropna()['id'].to_dict()
 
@@ -23,7 +21,7 @@ m_targeted = m_targeted[[i in m_map for i in m_targeted.index]]
 m_targeted.index = [m_map[i] for i in m_targeted.index]
 
 m_untargeted = read_csv('%s/tables/metabolomics_dynamic_combination.csv' % wd, index_col=0)
-m_untargeted.index = ['; '.join(annot['%.4f' % i]) for i in m_untargeted.index]
+m_untargeted.index = annot.candidates(m_untargeted.index, da=1e-4, sources=['imm904'], column='id').values
 
 # -- Overlap data-sets
 metabolites = list(set(m_targeted.index).intersection(m_untargeted.index))
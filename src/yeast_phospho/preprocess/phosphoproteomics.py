@@ -4,7 +4,8 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 from yeast_phospho import wd
 from pandas import DataFrame, Series, read_csv
-from yeast_phospho.utilities import get_protein_sequence, get_multiple_site
+from yeast_phospho.utilities import get_protein_sequence
+from yeast_phospho.peptides import ProteomeIndex, map_peptides, index_peptide_map, condition_peptide_map
 
 
 # Import growth rates
@@ -28,7 +29,11 @@ phospho_df = phospho_df[[len(i[0].split(',')) == 1 for i in phospho_df.index]]
 phospho_df.index = phospho_df.index.set_levels([re.split('^[K|R]\.', x)[1] for x in phospho_df.index.levels[0]], 'peptide')
 
 # Match peptide sequences to protein sequence and calculate peptide phosphorylation site
-pep_site = {peptide: target + '_' + '_'.join(get_multiple_site(protein_seq[target].upper(), peptide)) for peptide, target in phospho_df.index if target in protein_seq}
+proteome = ProteomeIndex({k: protein_seq[k].upper() for k in protein_seq})
+
+pep_site = [(peptide, target) for peptide, target in phospho_df.index if target in protein_seq]
+pep_site = map_peptides([p for p, t in pep_site], [t for p, t in pep_site], proteome).dropna(subset=['site'])
+pep_site = dict(zip(pep_site['peptide'], pep_site['site']))
 
 # Merge phosphosites with median
 phospho_df['site'] = [pep_site[peptide] if peptide in pep_site else np.NaN for peptide, target in phospho_df.index]
@@ -45,18 +50,20 @@ phospho_dyn_map = read_csv(wd + 'data/dynamic_peptides_map.tab', sep='\t')
 
 dyn_phospho_df, conditions, timepoints = DataFrame(), ['N_downshift', 'N_upshift', 'Rapamycin'], ['5min', '9min', '15min', '25min', '44min', '79min']
 
+# Phosphopeptides, sites and protein position of every peptide of each condition
+peptide_map = index_peptide_map(phospho_dyn_map)
+
 for condition in conditions:
     phospho_dyn_df_cond = phospho_dyn_df[phospho_dyn_df['condition'] == condition]
-    phospho_dyn_map_cond = phospho_dyn_map[phospho_dyn_map['condition'] == condition]
+    phospho_dyn_map_cond = condition_peptide_map(peptide_map, condition, phospho_dyn_df_cond['peptide'])
+
+    # Peptides mapped to one phosphopeptide with one site, in a single protein with sequence
+    keep = ((phospho_dyn_map_cond['phosphopeptides'] == 1) & (phospho_dyn_map_cond['sites'] == 1)).values
+    keep &= (phospho_dyn_df_cond['protein'].isin(protein_seq.keys()) & (phospho_dyn_df_cond['protein'].str.count('/') == 0)).values
 
-    phospho_dyn_df_cond = phospho_dyn_df_cond[[1 == len(phospho_dyn_map_cond.loc[phospho_dyn_map_cond['peptide'] == i, 'phosphopeptide']) for i in phospho_dyn_df_cond['peptide']]]
-    phospho_dyn_df_cond = phospho_dyn_df_cond[[phospho_dyn_map_cond.loc[phospho_dyn_map_cond['peptide'] == i, ['site_%d' % p for p in [1, 2, 3, 4]]].count(1).values[0] == 1 for i in phospho_dyn_df_cond['peptide']]]
-    phospho_dyn_df_cond = phospho_dyn_df_cond[[p in protein_seq for p in phospho_dyn_df_cond['protein']]]
-    phospho_dyn_df_cond = phospho_dyn_df_cond[[len(p.split('/')) == 1 for p in phospho_dyn_df_cond['protein']]]
-    phospho_dyn_df_cond = phospho_dyn_df_cond.set_index('peptide')
+    phospho_dyn_df_cond, phospho_dyn_map_cond = phospho_dyn_df_cond[keep].set_index('peptide'), phospho_dyn_map_cond[keep]
 
-    protein_pos = [tuple(phospho_dyn_map_cond.loc[phospho_dyn_map_cond['peptide'] == i, ['protein', 'site_1']].values[0]) for i in phospho_dyn_df_cond.index]
-    phospho_dyn_df_cond['site'] = ['%s_%s%d' % (protein, protein_seq[protein][int(pos - 1)].upper(), int(pos)) for protein, pos in protein_pos]
+    phospho_dyn_df_cond['site'] = ['%s_%s%d' % (protein, protein_seq[protein][int(pos - 1)].upper(), int(pos)) for protein, pos in phospho_dyn_map_cond[['protein', 'position']].values]
 
     phospho_dyn_df_cond = phospho_dyn_df_cond.groupby('site').mean()[timepoints]
 
@@ -7,7 +7,7 @@ from pandas import DataFrame, read_csv
 from pandas.stats.misc import zscore
 from sklearn.decomposition.pca import PCA
 from matplotlib.gridspec import GridSpec
-from yeast_phospho.utilities import pearson, regress_out
+from yeast_phospho.utilities import pearson, regress_out_matrix
 
 
 # Regress-out Factor correlated with growth rate
@@ -68,7 +68,7 @@ for df_file, df_type, growth_file, dataset_type, pc in datasets:
     pos += 2
 
     # Regress-out factor
-    df = DataFrame({m: regress_out(growth[conditions], df.ix[m, conditions]) for m in df.index}).T
+    df = regress_out_matrix(growth[conditions], df[conditions])[0]
 
     # Export regressed-out data-set
     df.to_csv('%s/tables/%s_no_growth.tab' % (wd, df_file), sep='\t')
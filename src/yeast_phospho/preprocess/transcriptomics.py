@@ -1,10 +1,9 @@
-import numpy as np
 import seaborn as sns
 import matplotlib.pyplot as plt
 from yeast_phospho import wd
 from yeast_phospho.utilities import get_ko_strains
 from pandas import DataFrame, read_csv, pivot_table
-from scipy.interpolate.interpolate import interp1d
+from yeast_phospho.timecourse import fold_change
 
 
 # Import growth rates
@@ -39,16 +38,9 @@ conditions, p_timepoints, dyn_trans_df = ['N_downshift', 'N_upshift', 'Rapamycin
 for condition in conditions:
     ss_cond = ss[ss['condition'] == condition]
 
-    # Sub-set data-set
-    t_df_cond = dyn_transcriptomics[ss_cond.index]
-    t_df_cond.columns = [ss_cond.ix[c, 'time_value'] for c in t_df_cond]
-
-    # Interpolate phospho time-points
-    t_df_cond = DataFrame({t: interp1d(t_df_cond.ix[t].index, t_df_cond.ix[t].values)(p_timepoints) for t in t_df_cond.index}, index=['%s_%dmin' % (condition, i) for i in p_timepoints]).T
-
-    # Calculate log2 fold-change
-    tx, t0 = ['%s_%dmin' % (condition, i) for i in p_timepoints if i != -10], '%s_-10min' % condition
-    t_df_cond = np.log2(t_df_cond[tx].div(t_df_cond[t0], axis=0))
+    # Interpolate phospho time-points and calculate log2 fold-change
+    t_df_cond = fold_change(dyn_transcriptomics[ss_cond.index], ss_cond['time_value'].values, p_timepoints, -10)
+    t_df_cond.columns = ['%s_%dmin' % (condition, i) for i in t_df_cond]
 
     # Append to existing data-set
     dyn_trans_df = dyn_trans_df.join(t_df_cond, how='outer')
@@ -0,0 +1,223 @@
+import numpy as np
+from pandas import DataFrame, Series
+from sklearn.linear_model import ElasticNet, enet_path
+from sklearn.cross_validation import ShuffleSplit
+from yeast_phospho.parallel import run_tasks, condition_seed
+
+
+# -- Leave-one-out regressions sharing folds across response variables
+def loo_elastic_net(x, y, alpha=.01, l1_ratio=.5):
+    """
+    Leave-one-out ElasticNet of every response variable (e.g. metabolite) against the same
+    features. All responses of a fold are fitted at once: the Gram matrix of the fold is
+    computed once and shared, and the coordinate descent starts from the previous fold
+    coefficients (consecutive folds share all but two samples).
+
+    :param x: DataFrame of features (samples x features)
+    :param y: DataFrame of responses (samples x responses)
+    :param alpha: ElasticNet regularisation
+    :param l1_ratio: ElasticNet mixing parameter
+    :return: DataFrame of left-out predictions (samples x responses) and array of coefficients (folds x responses x features)
+    """
+    xs, ys = x.values, y.ix[x.index].values
+
+    lm = ElasticNet(alpha=alpha, l1_ratio=l1_ratio, precompute=True, warm_start=True)
+
+    predictions, coefs = np.empty(ys.shape), np.empty((xs.shape[0], ys.shape[1], xs.shape[1]))
+
+    for i in range(xs.shape[0]):
+        train = np.arange(xs.shape[0]) != i
+
+        lm.fit(xs[train], ys[train])
+
+        predictions[i] = lm.predict(xs[[i]])
+        coefs[i] = lm.coef_.reshape(ys.shape[1], xs.shape[1])
+
+    return DataFrame(predictions, index=x.index, columns=y.columns), coefs
+
+
+def median_betas(coefs, features, responses):
+    """
+    :param coefs: array of coefficients (folds x responses x features) of loo_elastic_net
+    :param features: features labels
+    :param responses: responses labels
+    :return: dict of response to dict of feature to median coefficient across folds
+    """
+    return DataFrame(np.median(coefs, axis=0).T, index=features, columns=responses).to_dict()
+
+
+# -- Multi-target ElasticNet sharing the design matrix across responses
+def alpha_grid(xy, n_samples, l1_ratio=.5, eps=1e-3, n_alphas=100):
+    """
+    Regularisation paths of ElasticNetCV for several responses
+
+    :param xy: array (features x responses) of the centred design times the centred responses
+    :return: array (responses x alphas), in decreasing order
+    """
+    alpha_max = np.abs(xy).max(0) / (n_samples * l1_ratio)
+
+    grids = np.empty((xy.shape[1], n_alphas))
+    grids[:] = np.finfo(float).resolution
+
+    valid = alpha_max > np.finfo(float).resolution
+    grids[valid] = 10 ** np.linspace(np.log10(alpha_max[valid] * eps), np.log10(alpha_max[valid]), n_alphas).T[:, ::-1]
+
+    return grids
+
+
+def elastic_net_cv(x, y, cv, l1_ratio=.5, eps=1e-3, n_alphas=100):
+    """
+    ElasticNetCV of every response against the same design matrix. The Gram matrix and the
+    correlations with the responses are computed once per cross-validation fold and shared
+    by all responses; the regularisation is still selected per response.
+
+    :param x: array (samples x features)
+    :param y: array (samples x responses)
+    :param cv: list of (train, test) indices shared by all responses
+    :param l1_ratio: ElasticNet mixing parameter
+    :param eps: ratio between the smallest and the largest alpha of the paths
+    :param n_alphas: number of alphas of the paths
+    :return: arrays of coefficients (responses x features), intercepts (responses) and selected alphas (responses)
+    """
+    x, y, cv = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64), list(cv)
+
+    x_mu, y_mu = x.mean(0), y.mean(0)
+    xc, yc = x - x_mu, y - y_mu
+
+    gram, xy = xc.T.dot(xc), xc.T.dot(yc)
+    grids = alpha_grid(xy, x.shape[0], l1_ratio, eps, n_alphas)
+
+    # Mean squared error of the paths in the cross-validation folds
+    mse = np.zeros(grids.shape)
+
+    for train, test in cv:
+        f_x_mu, f_y_mu = x[train].mean(0), y[train].mean(0)
+        f_x, f_y = x[train] - f_x_mu, y[train] - f_y_mu
+
+        f_gram, f_xy = f_x.T.dot(f_x), f_x.T.dot(f_y)
+
+        for k in range(y.shape[1]):
+            coefs = enet_path(f_x, f_y[:, k], l1_ratio=l1_ratio, alphas=grids[k], precompute=f_gram, Xy=f_xy[:, k])[1]
+
+            residuals = (x[test] - f_x_mu).dot(coefs) + f_y_mu[k] - y[test, k][:, None]
+            mse[k] += (residuals ** 2).mean(0)
+
+    alphas = grids[np.arange(grids.shape[0]), np.argmin(mse, axis=1)]
+
+    # Refit with the selected alpha
+    coef = np.array([enet_path(xc, yc[:, k], l1_ratio=l1_ratio, alphas=[alphas[k]], precompute=gram, Xy=xy[:, k])[1][:, 0] for k in range(y.shape[1])])
+
+    return coef, y_mu - coef.dot(x_mu), alphas
+
+
+# -- Tasks of the cross-validation sweeps
+def elastic_net_split(x_train, y_train, n_iter=10, test_size=.2, seed=None):
+    """
+    ElasticNetCV of all responses on one training split, regularisation selected with
+    ShuffleSplit folds drawn from seed (a resumed sweep draws the same folds)
+
+    :param x_train: DataFrame (samples x features)
+    :param y_train: DataFrame (samples x responses)
+    :return: DataFrame of coefficients (responses x features), Series of intercepts and Series of selected alphas
+    """
+    cv = ShuffleSplit(x_train.shape[0], n_iter=n_iter, test_size=test_size, random_state=seed)
+    coef, intercept, alphas = elastic_net_cv(x_train.values, y_train.values, cv)
+
+    return DataFrame(coef, index=y_train.columns, columns=x_train.columns), Series(intercept, index=y_train.columns), Series(alphas, index=y_train.columns)
+
+
+def predict_split(coef, intercept, x_test):
+    """
+    :param coef: DataFrame of coefficients (responses x features) of elastic_net_split
+    :param intercept: Series of intercepts
+    :param x_test: DataFrame (samples x features)
+    :return: DataFrame of predictions (samples x responses)
+    """
+    return DataFrame(x_test[coef.columns].values.dot(coef.values.T) + intercept[coef.index].values, index=x_test.index, columns=coef.index)
+
+
+# -- Stability selection
+def resample_masks(n_samples, n_resamples=200, test_size=.2, seed=None):
+    """
+    Training samples of ShuffleSplit resamples, all drawn up front
+
+    :param n_samples: number of samples
+    :param n_resamples: number of resamples
+    :param test_size: fraction of the samples left out of each resample
+    :param seed: random seed
+    :return: boolean array (resamples x samples)
+    """
+    n_train = n_samples - int(np.ceil(test_size * n_samples))
+
+    order = np.argsort(np.random.RandomState(seed).rand(n_resamples, n_samples), axis=1)
+
+    masks = np.zeros((n_resamples, n_samples), dtype=bool)
+    masks[np.arange(n_resamples)[:, None], order[:, :n_train]] = True
+
+    return masks
+
+
+def resample_fit(x, y, train, n_iter=10, test_size=.2, seed=None):
+    """
+    ElasticNetCV of all responses on the training samples of one resample, features scaled to
+    unit variance
+
+    :return: array of coefficients (responses x features)
+    """
+    x_train, y_train = x[train], y[train]
+
+    cv = ShuffleSplit(x_train.shape[0], n_iter=n_iter, test_size=test_size, random_state=seed)
+
+    return elastic_net_cv(x_train / x_train.std(0, ddof=1), y_train, cv)[0]
+
+
+def stability_selection(x, y, store_file, n_resamples=200, test_size=.2, n_iter=10, seed=0, n_jobs=1):
+    """
+    Coefficients of every response across resamples of the samples. Resamples are independent
+    checkpointed tasks (see parallel.run_tasks), all responses of a resample are fitted at once.
+
+    :param x: DataFrame of features (samples x features)
+    :param y: DataFrame of responses (samples x responses)
+    :param store_file: checkpoint file of the resamples
+    :param n_resamples: number of resamples
+    :param test_size: fraction of the samples left out of each resample and of each cross-validation fold
+    :param n_iter: number of cross-validation folds selecting the regularisation
+    :param seed: random seed
+    :param n_jobs: number of worker processes
+    :return: array of coefficients (responses x resamples x features)
+    """
+    xs, ys = x.values.astype(np.float64), y.ix[x.index].values.astype(np.float64)
+
+    masks = resample_masks(xs.shape[0], n_resamples, test_size, seed)
+
+    tasks = [(i, {'x': xs, 'y': ys, 'train': train, 'n_iter': n_iter, 'test_size': test_size, 'seed': condition_seed(seed, i)}) for i, train in enumerate(masks)]
+    fits = run_tasks(resample_fit, tasks, store_file, n_jobs)
+
+    coefs = np.empty((ys.shape[1], n_resamples, xs.shape[1]))
+    for i in range(n_resamples):
+        coefs[:, i] = fits[i]
+
+    return coefs
+
+
+def stability_summary(coefs, responses, features, quantiles=(.05, .5, .95)):
+    """
+    :param coefs: array of coefficients (responses x resamples x features) of stability_selection
+    :param responses: responses labels
+    :param features: features labels
+    :param quantiles: coefficients quantiles reported
+    :return: DataFrame of (response, feature) pairs with mean coefficient ('coef'), median absolute coefficient ('coef_abs'),
+        fraction of resamples selecting the feature ('frequency') and coefficients quantiles (e.g. 'q0.05')
+    """
+    res = DataFrame({
+        'response': np.repeat(responses, len(features)),
+        'feature': np.tile(features, len(responses)),
+        'coef': coefs.mean(1).ravel(),
+        'coef_abs': np.median(np.abs(coefs), axis=1).ravel(),
+        'frequency': (coefs != 0).mean(1).ravel()
+    }, columns=['response', 'feature', 'coef', 'coef_abs', 'frequency'])
+
+    for q, values in zip(quantiles, np.percentile(coefs, [q * 100 for q in quantiles], axis=1)):
+        res['q%g' % q] = values.ravel()
+
+    return res
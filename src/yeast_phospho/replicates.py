@@ -0,0 +1,64 @@
+import numpy as np
+from pandas import DataFrame, Series
+
+
+# -- Samplesheet-driven replicate aggregation
+def group_matrix(groups):
+    """
+    :param groups: group of every sample
+    :return: sorted group labels and indicator array (samples x groups)
+    """
+    labels, codes = np.unique(np.asarray(groups), return_inverse=True)
+
+    indicator = np.zeros((len(codes), len(labels)))
+    indicator[np.arange(len(codes)), codes] = 1
+
+    return labels, indicator
+
+
+def replicate_stats(df, groups):
+    """
+    Mean, standard deviation (ddof=1), coefficient of variation and number of measured
+    replicates of every feature in every group of samples, as DataFrame.groupby(groups, axis=1)
+    skipping NaNs. All features are aggregated at once with the samples x groups indicator matrix.
+
+    :param df: DataFrame (features x samples)
+    :param groups: Series of the group of every sample (e.g. samplesheet 'time' column), samples missing in df are ignored
+    :return: dict of 'mean', 'std', 'cv' and 'count' DataFrames (features x sorted groups)
+    """
+    values = df.reindex(columns=groups.index).values.astype(np.float64)
+    labels, indicator = group_matrix(groups.values)
+
+    measured = np.isfinite(values)
+    count = measured.astype(np.float64).dot(indicator)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.where(measured, values, 0).dot(indicator) / count
+
+        deviation = np.where(measured, values - mean[:, indicator.argmax(1)], 0)
+        std = np.sqrt((deviation ** 2).dot(indicator) / (count - 1))
+        std[count < 2] = np.NaN
+
+        stats = {'mean': mean, 'std': std, 'cv': std / mean, 'count': count}
+
+    return {s: DataFrame(stats[s], index=df.index, columns=labels) for s in stats}
+
+
+def replicate_groups(samples, replicates):
+    """
+    :param samples: list of samples
+    :param replicates: Series of technical replicate to its reference sample (e.g. BY003_02 -> BY003_01)
+    :return: Series of the reference sample of every sample, samples without replicates are their own reference
+    """
+    return Series([replicates.get(s, s) for s in samples], index=samples)
+
+
+def collapse_replicates(df, replicates):
+    """
+    Average technical replicates
+
+    :param df: DataFrame (features x samples)
+    :param replicates: Series of technical replicate to its reference sample
+    :return: DataFrame (features x reference samples)
+    """
+    return replicate_stats(df, replicate_groups(df.columns, replicates))['mean']
@@ -0,0 +1,112 @@
+import io
+import os
+import zipfile
+import numpy as np
+from pandas import DataFrame, concat
+
+
+# -- Columnar store of regression results
+class RegressionStore(object):
+    """
+    Regression results indexed by (feature type, dataset, growth), e.g. ('TFs', 'Dynamic', 'without').
+    Every comparison is stored as typed arrays (labels, coefficients, predictions and
+    correlations) in the members of one npz file, written one comparison at a time and read
+    back one array at a time.
+    """
+
+    columns = ['feature', 'dataset', 'variable', 'growth', 'corr_type', 'cor']
+
+    def __init__(self, store_file, overwrite=False):
+        """
+        :param store_file: npz file
+        :param overwrite: remove the comparisons already stored
+        """
+        self.store_file = store_file
+
+        if overwrite and os.path.exists(store_file):
+            os.remove(store_file)
+
+    def name(self, ft, dt, mt, array):
+        return '%s/%s/%s/%s' % (ft, dt, mt, array)
+
+    def comparisons(self):
+        """
+        :return: list of (feature type, dataset, growth) stored
+        """
+        if not os.path.exists(self.store_file):
+            return []
+
+        with zipfile.ZipFile(self.store_file) as z:
+            return sorted({tuple(n.split('/')[:3]) for n in z.namelist()})
+
+    def remove(self, ft, dt, mt):
+        """
+        Remove one comparison, the archive is rewritten without its members
+        """
+        prefix, tmp_file = self.name(ft, dt, mt, ''), '%s.tmp' % self.store_file
+
+        with zipfile.ZipFile(self.store_file) as z, zipfile.ZipFile(tmp_file, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as out:
+            for member in z.infolist():
+                if not member.filename.startswith(prefix):
+                    out.writestr(member, z.read(member.filename))
+
+        os.rename(tmp_file, self.store_file)
+
+    def write(self, ft, dt, mt, betas, predictions, correlations, replace=False):
+        """
+        Append one comparison to the store
+
+        :param betas: DataFrame (features x responses) of coefficients
+        :param predictions: DataFrame (samples x responses) of predicted values
+        :param correlations: DataFrame with 'variable', 'corr_type' and 'cor' columns
+        :param replace: replace the comparison if already stored, otherwise a ValueError is raised
+        """
+        if (ft, dt, mt) in self.comparisons():
+            if not replace:
+                raise ValueError('Comparison already stored: %s, %s, %s' % (ft, dt, mt))
+
+            self.remove(ft, dt, mt)
+
+        arrays = {
+            'features': np.array(betas.index, dtype=str), 'responses': np.array(betas.columns, dtype=str),
+            'betas': betas.values.astype(np.float64),
+            'samples': np.array(predictions.index, dtype=str), 'predicted': predictions[betas.columns].values.astype(np.float64),
+            'variable': np.array(correlations['variable'], dtype=str), 'corr_type': np.array(correlations['corr_type'], dtype=str),
+            'cor': correlations['cor'].values.astype(np.float64)
+        }
+
+        with zipfile.ZipFile(self.store_file, 'a', zipfile.ZIP_DEFLATED, allowZip64=True) as z:
+            for a, values in arrays.items():
+                buf = io.BytesIO()
+                np.lib.format.write_array(buf, values, allow_pickle=False)
+                z.writestr('%s.npy' % self.name(ft, dt, mt, a), buf.getvalue())
+
+    def read(self, ft, dt, mt, *arrays):
+        with zipfile.ZipFile(self.store_file) as z:
+            return [np.lib.format.read_array(io.BytesIO(z.read('%s.npy' % self.name(ft, dt, mt, a)))) for a in arrays]
+
+    def betas(self, ft, dt, mt):
+        """
+        :return: DataFrame (features x responses) of coefficients
+        """
+        features, responses, betas = self.read(ft, dt, mt, 'features', 'responses', 'betas')
+        return DataFrame(betas, index=features, columns=responses)
+
+    def predictions(self, ft, dt, mt):
+        """
+        :return: DataFrame (samples x responses) of predicted values
+        """
+        samples, responses, predicted = self.read(ft, dt, mt, 'samples', 'responses', 'predicted')
+        return DataFrame(predicted, index=samples, columns=responses)
+
+    def correlations(self, comparisons=None):
+        """
+        :param comparisons: list of (feature type, dataset, growth), all if None
+        :return: DataFrame with 'feature', 'dataset', 'variable', 'growth', 'corr_type' and 'cor' columns
+        """
+        res = []
+        for ft, dt, mt in (self.comparisons() if comparisons is None else comparisons):
+            variable, corr_type, cor = self.read(ft, dt, mt, 'variable', 'corr_type', 'cor')
+            res.append(DataFrame({'feature': ft, 'dataset': dt, 'variable': variable, 'growth': mt, 'corr_type': corr_type, 'cor': cor}, columns=self.columns))
+
+        return concat(res, ignore_index=True) if len(res) > 0 else DataFrame(columns=self.columns)
@@ -0,0 +1,83 @@
+import numpy as np
+from pandas import DataFrame
+from scipy.interpolate import PchipInterpolator
+from yeast_phospho.correlations import mask_patterns
+
+
+# -- Vectorised time-course resampling
+def interpolate(values, times, new_times, method='linear'):
+    """
+    Resample every row of a time-course matrix onto new time points, as interp1d of each row.
+    Rows are interpolated on their measured (finite) time points, rows sharing the same missing
+    values are interpolated at once.
+
+    :param values: array (features x time points)
+    :param times: time point of every column
+    :param new_times: time points to interpolate
+    :param method: 'linear' or 'pchip' (monotone cubic spline)
+    :return: array (features x new time points), NaN outside the measured time range of the row
+    """
+    values, times, new_times = np.asarray(values, dtype=np.float64), np.asarray(times, dtype=np.float64), np.asarray(new_times, dtype=np.float64)
+
+    if method not in ['linear', 'pchip']:
+        raise ValueError('Unknown interpolation method: %s' % method)
+
+    order = np.argsort(times, kind='mergesort')
+    values, times = values[:, order], times[order]
+
+    res = np.empty((values.shape[0], len(new_times)))
+    res[:] = np.NaN
+
+    patterns, groups = mask_patterns(np.isfinite(values))
+
+    for i, pattern in enumerate(patterns):
+        if pattern.sum() < 2:
+            continue
+
+        rows, x = groups == i, times[pattern]
+        y = values[rows][:, pattern]
+
+        inside = (new_times >= x[0]) & (new_times <= x[-1])
+        t = new_times[inside]
+
+        if method == 'linear':
+            lo = np.clip(np.searchsorted(x, t, side='right') - 1, 0, len(x) - 2)
+            slope = (y[:, lo + 1] - y[:, lo]) / (x[lo + 1] - x[lo])
+
+            res[np.ix_(rows, inside)] = slope * (t - x[lo]) + y[:, lo]
+
+        else:
+            res[np.ix_(rows, inside)] = PchipInterpolator(x, y, axis=1)(t)
+
+    return res
+
+
+def resample(df, times, new_times, method='linear'):
+    """
+    :param df: DataFrame (features x samples)
+    :param times: time point of every sample
+    :param new_times: time points to interpolate
+    :param method: 'linear' or 'pchip'
+    :return: DataFrame (features x new time points)
+    """
+    return DataFrame(interpolate(df.values, times, new_times, method), index=df.index, columns=new_times)
+
+
+def fold_change(df, times, new_times, baseline, method='linear'):
+    """
+    Log2 fold-change of the resampled time points against the resampled baseline, all
+    interpolated in the same pass
+
+    :param df: DataFrame (features x samples)
+    :param times: time point of every sample
+    :param new_times: time points to interpolate
+    :param baseline: reference time point (e.g. -10)
+    :param method: 'linear' or 'pchip'
+    :return: DataFrame (features x new time points other than the baseline)
+    """
+    targets = [t for t in new_times if t != baseline]
+
+    res = interpolate(df.values, times, [baseline] + targets, method)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return DataFrame(np.log2(res[:, 1:] / res[:, [0]]), index=df.index, columns=targets)
@@ -6,10 +6,15 @@ import statsmodels.tools as st
 from yeast_phospho import wd
 from pandas.stats.misc import zscore
 from sklearn.linear_model import Ridge
+from scipy.linalg import cho_factor, cho_solve, lstsq
 from scipy.stats.stats import spearmanr, pearsonr
 from sklearn.linear_model import LinearRegression
 from pymist.enrichment.gsea import gsea
-from pandas import Series, DataFrame, read_csv, pivot_table
+from yeast_phospho.fasta import parse_fasta
+from yeast_phospho.incidence import Incidence
+from yeast_phospho.phosphogrid import load_phosphogrid
+from yeast_phospho.parallel import map_conditions
+from pandas import Series, DataFrame, MultiIndex, read_csv, pivot_table
 
 
 # -- Kinases and TFs get targets utility functions
@@ -17,11 +22,12 @@ def jaccard(a, b):
     return float(len(a.intersection(b))) / float(len(a.union(b)))
 
 
-def get_tfs_targets(remove_self=False):
+def get_tfs_targets(remove_self=False, sparse=False):
     """
     Retrieve transcription-factor targets
 
     :param remove_self:
+    :param sparse: return an Incidence instead of a dense pivot table
     :return:
     """
     # Import conversion table
@@ -35,17 +41,21 @@ def get_tfs_targets(remove_self=False):
     if remove_self:
         tf_targets = tf_targets[tf_targets['tf'] != tf_targets['target']]
 
+    if sparse:
+        return Incidence.from_interactions(tf_targets['target'], tf_targets['tf'])
+
     tf_targets['interaction'] = 1
     tf_targets = pivot_table(tf_targets, values='interaction', index='target', columns='tf', fill_value=0)
 
     return tf_targets
 
 
-def get_tfs_targets_filtered(remove_self=False):
+def get_tfs_targets_filtered(remove_self=False, sparse=False):
     """
     Retrieve transcription-factor targets
 
     :param remove_self:
+    :param sparse: return an Incidence instead of a dense pivot table
     :return:
     """
     # Import conversion table
@@ -59,34 +69,32 @@ def get_tfs_targets_filtered(remove_self=False):
     if remove_self:
         tf_targets = tf_targets[tf_targets['tf'] != tf_targets['target']]
 
+    if sparse:
+        return Incidence.from_interactions(tf_targets['target'], tf_targets['tf'])
+
     tf_targets['interaction'] = 1
     tf_targets = pivot_table(tf_targets, values='interaction', index='target', columns='tf', fill_value=0)
 
     return tf_targets
 
 
-def get_kinases_targets(studies_to_filter={'21177495', '19779198'}, remove_self=False):
+def get_kinases_targets(studies_to_filter={'21177495', '19779198'}, remove_self=False, sparse=False):
     """
     Retrieve kinase targets
 
     :param studies_to_filter:
     :param remove_self:
+    :param sparse: return an Incidence instead of a dense pivot table
     :return:
     """
-    k_targets = read_csv('%s/files/PhosphoGrid.txt' % wd, sep='\t')
-
-    k_targets = k_targets[[len(set(i.split('|')).intersection(studies_to_filter)) != len(set(i.split('|'))) for i in k_targets['KINASES_EVIDENCE_PUBMED']]]
-    k_targets = k_targets[[len(set(i.split('|')).intersection(studies_to_filter)) != len(set(i.split('|'))) for i in k_targets['PHOSPHATASES_EVIDENCE_PUBMED']]]
-
-    k_targets = k_targets.loc[(k_targets['KINASES_ORFS'] != '-') | (k_targets['PHOSPHATASES_ORFS'] != '-')]
-
-    k_targets['SOURCE'] = k_targets['KINASES_ORFS'] + '|' + k_targets['PHOSPHATASES_ORFS']
-    k_targets = [(k, t + '_' + site) for t, site, source in k_targets[['ORF_NAME', 'PHOSPHO_SITE', 'SOURCE']].values for k in source.split('|') if k != '-' and k != '']
-    k_targets = DataFrame(k_targets, columns=['kinase', 'site'])
+    k_targets = load_phosphogrid().interactions(studies_to_filter)
 
     if remove_self:
         k_targets = k_targets[[source != target.split('_')[0] for source, target in k_targets.values]]
 
+    if sparse:
+        return Incidence.from_interactions(k_targets['site'], k_targets['kinase'])
+
     k_targets['value'] = 1
 
     k_targets = pivot_table(k_targets, values='value', index='site', columns='kinase', fill_value=0)
@@ -106,6 +114,50 @@ def regress_out(x, y):
     return dict(zip(np.array(ys.index), ys_))
 
 
+def regress_out_matrix(covariates, df):
+    """
+    Batched version of regress_out with one or more covariates (e.g. growth rate, principal
+    components, batch). Features sharing the same measured samples share the same design
+    matrix, hence are fitted at once in one least-squares solve.
+
+    :param covariates: Series or DataFrame of covariates (samples x covariates)
+    :param df: DataFrame of measurements (features x samples)
+    :return: DataFrames of residuals (features x samples) and of coefficients (features x intercept and covariates)
+    """
+    covariates = DataFrame(covariates).ix[df.columns]
+    x, y = covariates.values.astype(np.float64), df.values.astype(np.float64)
+
+    mask = np.isfinite(y) & np.isfinite(x).all(1)
+
+    # Group features by missing values pattern
+    groups = {}
+    for i, m in enumerate(mask):
+        groups.setdefault(m.tostring(), []).append(i)
+
+    residuals, coef = np.empty(y.shape), np.empty((y.shape[0], x.shape[1] + 1))
+    residuals[:], coef[:] = np.NaN, np.NaN
+
+    for rows in groups.values():
+        samples = np.where(mask[rows[0]])[0]
+
+        if len(samples) == 0:
+            continue
+
+        xs, ys = x[samples], y[np.ix_(rows, samples)].T
+
+        # Intercept is fitted by centring, as LinearRegression
+        x_mu, y_mu = xs.mean(0), ys.mean(0)
+        b = lstsq(xs - x_mu, ys - y_mu)[0]
+
+        residuals[np.ix_(rows, samples)] = ((ys - y_mu) - (xs - x_mu).dot(b)).T
+        coef[rows] = np.vstack((y_mu - x_mu.dot(b), b)).T
+
+    residuals = DataFrame(residuals, index=df.index, columns=df.columns)
+    coef = DataFrame(coef, index=df.index, columns=['intercept'] + list(covariates.columns))
+
+    return residuals, coef
+
+
 def estimate_activity_with_sklearn(x, y, alpha=.1):
     ys = y.dropna()
     xs = x.ix[ys.index].replace(np.NaN, 0.0)
@@ -117,9 +169,69 @@ def estimate_activity_with_sklearn(x, y, alpha=.1):
     return dict(zip(*(xs.columns, lm.coef_)))
 
 
+def ridge_activities(x, ys, alpha):
+    """
+    Ridge activities of conditions with the same measured targets
+
+    :param x: Incidence (targets x regulators)
+    :param ys: DataFrame of measurements without missing values (targets x conditions)
+    :param alpha: Ridge regularisation
+    :return: DataFrame of activities (regulators x conditions)
+    """
+    xs = x.reindex(ys.index).drop_empty()
+
+    if xs.shape[0] == 0 or xs.shape[1] == 0:
+        return DataFrame(columns=ys.columns)
+
+    # Intercept is not penalised: centre design and z-score measurements
+    n, m, mu = xs.shape[0], xs.matrix, np.asarray(xs.matrix.mean(0)).ravel()
+    yc = ((ys - ys.mean()) / ys.std(ddof=0)).values
+
+    # Solve the smallest of the primal and dual systems, centring the sparse products
+    if xs.shape[1] <= n:
+        gram = m.T.dot(m).toarray() - n * np.outer(mu, mu)
+        coef = cho_solve(cho_factor(gram + alpha * np.eye(xs.shape[1])), m.T.dot(yc))
+
+    else:
+        m_mu = m.dot(mu)
+        kernel = m.dot(m.T).toarray() - m_mu[:, None] - m_mu[None, :] + mu.dot(mu)
+        dual = cho_solve(cho_factor(kernel + alpha * np.eye(n)), yc)
+        coef = m.T.dot(dual) - np.outer(mu, dual.sum(0))
+
+    return DataFrame(coef, index=xs.columns, columns=ys.columns)
+
+
+def estimate_activities_with_ridge(x, df, alpha=.1, n_jobs=1):
+    """
+    Batched version of estimate_activity_with_sklearn. Conditions sharing the same measured
+    targets share the same design matrix, hence its Ridge system is factorised once and
+    solved for all of them at once.
+
+    :param x: Incidence or DataFrame of regulators targets (targets x regulators)
+    :param df: DataFrame of measurements (targets x conditions)
+    :param alpha: Ridge regularisation
+    :param n_jobs: number of worker processes
+    :return: DataFrame of activities (regulators x conditions)
+    """
+    x = x if isinstance(x, Incidence) else Incidence.from_dataframe(x)
+
+    mask = df.notnull()
+
+    # Group conditions by missing values pattern
+    groups = {}
+    for c in df:
+        groups.setdefault(mask[c].values.tostring(), []).append(c)
+
+    groups = sorted(groups.values(), key=lambda conditions: list(df).index(conditions[0]))
+
+    activities = map_conditions(ridge_activities, x, [df.loc[mask[conditions[0]].values, conditions] for conditions in groups], n_jobs, alpha=alpha)
+
+    return activities[list(df)]
+
+
 # -- Protein related utility functions
 def get_protein_sequence():
-    return read_csv('%s/files/PhosphoGrid.txt' % wd, sep='\t').groupby('ORF_NAME')['SEQUENCE'].first().to_dict()
+    return load_phosphogrid().protein_sequences()
 
 
 def get_site(protein, peptide):
@@ -177,6 +289,55 @@ def randomise_matrix(matrix):
     return random_df
 
 
+def randomised_cells(matrix, cells, permutations=10000, random_state=None):
+    """
+    Values of some cells of the matrix across random permutations of its non-NaN values, as
+    randomise_matrix(matrix).ix[row, column] for each permutation. Only the queried cells are
+    drawn: distinct cells of a permutation take distinct values of the pool, NaN cells stay NaN.
+
+    :param matrix: DataFrame
+    :param cells: list of (row, column) labels
+    :param permutations: number of permutations
+    :param random_state: seed or numpy RandomState
+    :return: array (cells x permutations)
+    """
+    if not isinstance(random_state, np.random.RandomState):
+        random_state = np.random.RandomState(random_state)
+
+    pool = matrix.values[~np.isnan(matrix.values)]
+
+    # Distinct non-NaN cells queried
+    rows, cols = matrix.index.get_indexer([r for r, c in cells]), matrix.columns.get_indexer([c for r, c in cells])
+
+    missing = (rows == -1) | (cols == -1)
+    if missing.any():
+        raise KeyError('Cells not in the matrix: %s' % ', '.join('(%s, %s)' % cells[i] for i in np.where(missing)[0][:5]))
+
+    measured = ~np.isnan(matrix.values[rows, cols])
+
+    keys, inverse = np.unique(rows[measured] * matrix.shape[1] + cols[measured], return_inverse=True)
+
+    # Draw pool positions and redraw positions repeating an earlier one of the same permutation
+    draws = random_state.randint(len(pool), size=(permutations, len(keys)))
+
+    while True:
+        order = np.argsort(draws, axis=1, kind='mergesort')
+        ranked = draws[np.arange(permutations)[:, None], order]
+
+        dup_rows, dup_cols = np.where(ranked[:, 1:] == ranked[:, :-1])
+
+        if len(dup_rows) == 0:
+            break
+
+        draws[dup_rows, order[dup_rows, dup_cols + 1]] = random_state.randint(len(pool), size=len(dup_rows))
+
+    values = np.empty((len(cells), permutations))
+    values[:] = np.NaN
+    values[measured] = pool[draws.T[inverse]]
+
+    return values
+
+
 # ---- Similarity scores
 
 AA_PRIORS_YEAST = Series({
@@ -197,24 +358,7 @@ namespace = ['A', 'R', 'N', 'D', 'C', 'Q', 'E', 'G', 'H', 'I', 'L', 'K', 'M', 'F
 
 
 def read_fasta(fasta_file=None):
-    sequences = {}
-
-    with open(fasta_file) as f:
-        lines = f.readlines()
-
-        for i in range(len(lines)):
-            if lines[i].startswith('>'):
-                key = lines[i].split(' ')[0].split('>')[1].strip()
-                sequence = ''
-
-                i += 1
-                while (i < len(lines)) and (not lines[i].startswith('>')):
-                    sequence += lines[i].strip()
-                    i += 1
-
-                sequences[key] = sequence.replace('*', '')
-
-    return sequences
+    return dict(parse_fasta(fasta_file))
 
 
 def flanking_sequence(seqs, sites, flank=7, empty_char='-'):
@@ -268,40 +412,68 @@ def score_sequence(sequence, pwm, empty_char='-'):
     return np.array([pwm.ix[sequence[i], i] if sequence[i] != empty_char else .0 for i in range(len(sequence))])
 
 
-def similarity_score_matrix(flanking_regions, pwm, ic, ignore_central=True, is_kinase_pwm=True):
-    central_ind = None
+def encode_sequences(sequences):
+    """
+    Integer encode sequences of the same length with the residues order of namespace, empty
+    and unknown residues are encoded as len(namespace)
+
+    :param sequences: list of sequences
+    :return: uint8 array (sequences x positions)
+    """
+    table = np.repeat(np.uint8(len(namespace)), 256)
+    table[np.frombuffer(''.join(namespace).encode('ascii'), dtype=np.uint8)] = np.arange(len(namespace))
+
+    codes = np.frombuffer(''.join(sequences).encode('ascii'), dtype=np.uint8)
+
+    return table[codes.reshape(len(sequences), -1 if len(sequences) > 0 else 0)]
+
+
+def pwm_array(pwm):
+    """
+    :param pwm: PWM DataFrame (residues x positions)
+    :return: array (residues x positions) with the residues order of namespace and an extra row of zeros for empty and unknown residues
+    """
+    return np.vstack((pwm.ix[namespace].replace(np.NaN, 0).values, np.zeros((1, pwm.shape[1]))))
 
-    # Only score sequences which have a central residue S/T or Y depending on the PWM
-    kinase_type = '*'
-    if is_kinase_pwm:
-        kinase_type = 'S|T' if pwm.ix[:, int(np.floor(pwm.shape[1] / 2))].argmax() in 'S|T' else 'Y'
 
-    # Central residue index
-    if ignore_central:
-        central_ind = int(np.floor(pwm.shape[1] / 2))
+def score_sequences(encoded, pwm):
+    """
+    :param encoded: uint8 array (sequences x positions) of encode_sequences
+    :param pwm: array of pwm_array
+    :return: array (sequences x positions) of PWM scores
+    """
+    return pwm[encoded, np.arange(encoded.shape[1])]
+
+
+def similarity_score_matrix(flanking_regions, pwm, ic, ignore_central=True, is_kinase_pwm=True):
+    central_ind = int(np.floor(pwm.shape[1] / 2))
 
-    # Best/worst sequence score
-    bs = score_sequence(''.join(pwm.apply(lambda x: x.argmax())), pwm)
-    ws = score_sequence(''.join(pwm.apply(lambda x: x.argmin())), pwm)
+    # Only score sequences which have a central residue S/T or Y depending on the PWM, all sequences otherwise
+    kinase_type = None
+    if is_kinase_pwm:
+        kinase_type = ['S', 'T'] if pwm.ix[:, central_ind].argmax() in 'S|T' else ['Y']
 
     # Which indicies do we keep
-    positions_to_keep = list(pwm.drop(central_ind, axis=1)) if ignore_central else list(pwm)
+    positions_to_keep = np.array([i != central_ind or not ignore_central for i in range(pwm.shape[1])])
 
     # Information content of positions to keep
-    ic = ic[positions_to_keep]
+    ic = ic[list(pwm)].values[positions_to_keep]
 
     # Best and worst scores
-    bs = (ic * bs[positions_to_keep]).sum()
-    ws = (ic * ws[positions_to_keep]).sum()
-
-    # Get array of scores
-    sites_to_keep = [psite for psite, seq in flanking_regions.items() if seq[central_ind] in kinase_type] if is_kinase_pwm else flanking_regions.keys()
+    weights = pwm_array(pwm)
 
-    # Score positions to keep
-    sites_scores = {(site, flanking_regions[site]): score_sequence(flanking_regions[site], pwm)[positions_to_keep] for site in sites_to_keep}
+    bs = np.nansum(ic * weights[:-1].max(0)[positions_to_keep])
+    ws = np.nansum(ic * weights[:-1].min(0)[positions_to_keep])
 
     # Score p-sites flanking regions
-    scores = Series({(site, seq): sum(ic * score) for (site, seq), score in sites_scores.items()})
+    sites = list(flanking_regions)
+    encoded = encode_sequences([flanking_regions[s] for s in sites])
+
+    sites_to_keep = np.in1d(encoded[:, central_ind], [namespace.index(aa) for aa in kinase_type]) if is_kinase_pwm else np.ones(len(sites), dtype=bool)
+
+    scores = np.dot(score_sequences(encoded[sites_to_keep], weights)[:, positions_to_keep], ic)
+
+    scores = Series(scores, index=MultiIndex.from_tuples([(s, flanking_regions[s]) for s, k in zip(sites, sites_to_keep) if k]) if sites_to_keep.sum() > 0 else None)
 
     # Normalise scores
     scores = (scores - ws) / (bs - ws)
@@ -0,0 +1,124 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from pandas import read_csv
+from yeast_phospho.annotation import load_annotation
+
+files_dir = '%s/../files/' % os.path.dirname(os.path.abspath(__file__))
+
+
+class MetaboliteAnnotationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = '%s/cache/' % self.tmp_dir
+
+        maps = {
+            'a': ['id\tname\tformula\tmz\tmod', 'A1\tAlpha\tC1\t100.0\t-H(+)', 'A2\tBeta\tC2\t100.0002\t-H(+)', 'A3\tGamma\tC3\t100.0001\t+F(-)', 'A4\tDelta\tC4\t200.0\t-H(+)'],
+            'b': ['id\tname\tformula\tmz\tmod\tscore', 'B1\tEta\tC5\t100.0001\t-H(+)\t50', 'B2\tTheta\tC6\t100.0001\t-H(+)\t90', 'B3\tIota\tC7\t100.0\t-H(+)\t10', 'B4\tKappa\tC8\t200.0\t-H(+)\t']
+        }
+
+        self.map_files = {}
+        for s in maps:
+            self.map_files[s] = '%s/%s.txt' % (self.tmp_dir, s)
+
+            with open(self.map_files[s], 'w') as f:
+                f.write('\n'.join(maps[s]) + '\n')
+
+        self.ions = [100., 200., 300.]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def ids(self, res, ion):
+        return list(res.loc[res['ion'] == ion].sort_values('rank')['id'])
+
+    def test_rank_order(self):
+        res = load_annotation(self.map_files, self.cache_dir).annotate(self.ions, da=5e-4)
+
+        # Absolute error, then score (highest first), then source
+        self.assertEqual(self.ids(res, 100.), ['B3', 'A1', 'B2', 'B1', 'A2'])
+        self.assertEqual(self.ids(res, 200.), ['A4', 'B4'])
+        self.assertEqual(list(res['rank']), [0, 1, 2, 3, 4, 0, 1])
+
+        self.assertTrue((res['mod'] == '-H(+)').all())
+        self.assertTrue(np.allclose(res['error_ppm'], (res['mz'] - res['ion']) / res['ion'] * 1e6))
+
+    def test_adducts(self):
+        annotation = load_annotation(self.map_files, self.cache_dir)
+
+        # Adduct preference ranks first
+        res = annotation.annotate(self.ions, da=5e-4, adducts=['+F(-)', '-H(+)'])
+        self.assertEqual(self.ids(res, 100.), ['A3', 'B3', 'A1', 'B2', 'B1', 'A2'])
+
+        res = annotation.annotate(self.ions, da=5e-4, adducts=None)
+        self.assertIn('A3', self.ids(res, 100.))
+
+        res = annotation.annotate(self.ions, da=5e-4, adducts=['+F(-)'])
+        self.assertEqual(list(res['id']), ['A3'])
+
+    def test_sources(self):
+        annotation = load_annotation(self.map_files, self.cache_dir)
+
+        res = annotation.annotate(self.ions, da=5e-4, sources=['b', 'a'])
+        self.assertEqual(self.ids(res, 200.), ['B4', 'A4'])
+
+        res = annotation.annotate(self.ions, da=5e-4, sources=['b'])
+        self.assertEqual(self.ids(res, 100.), ['B3', 'B2', 'B1'])
+        self.assertTrue((res['source'] == 'b').all())
+
+    def test_candidates(self):
+        annotation = load_annotation(self.map_files, self.cache_dir)
+
+        res = annotation.candidates(self.ions, da=5e-4, column='id')
+        self.assertEqual(list(res.index), self.ions)
+        self.assertEqual(list(res.iloc[:2]), ['B3; A1; B2; B1; A2', 'A4; B4'])
+        self.assertTrue(np.isnan(res[300.]))
+
+        # Tolerance narrower than the m/z errors
+        res = annotation.candidates(self.ions, da=5e-5, column='name')
+        self.assertEqual(res[100.], 'Iota; Alpha')
+
+    def test_compiled_once(self):
+        first = load_annotation(self.map_files, self.cache_dir).annotate(self.ions, da=5e-4)
+        second = load_annotation(self.map_files, self.cache_dir).annotate(self.ions, da=5e-4)
+
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        self.assertTrue(first.equals(second))
+
+
+class ShippedAnnotationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+        self.map_files = {
+            'kegg': '%s/metabolite_mz_map_kegg.txt' % files_dir,
+            'kegg_adducts': '%s/metabolite_mz_map_kegg_adducts.txt' % files_dir,
+            'dobson': '%s/metabolite_mz_map_dobson.txt' % files_dir,
+            'imm904': '%s/2015_12_10_fia_experiments_imm904_annotation.txt' % files_dir
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_imm904_ids(self):
+        # iMM904 -H(+) ids grouped by m/z label, as preprocess/metabolomics_correlation.py before the annotation was compiled
+        annot = read_csv(self.map_files['imm904'], sep='\t', index_col=0)
+        annot = annot[annot['mod'] == '-H(+)']
+
+        ions = np.unique(annot['mz'].values)
+
+        annot['mz'] = ['%.4f' % i for i in annot['mz']]
+        ref = annot.groupby('mz')['id'].agg(lambda x: set(x)).to_dict()
+
+        res = load_annotation(self.map_files, self.cache_dir).candidates(ions, da=1e-4, sources=['imm904'], column='id')
+
+        self.assertEqual(len(ions), 196)
+        self.assertEqual({'%.4f' % i: set(res[i].split('; ')) for i in ions}, ref)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import numpy as np
+from sklearn.metrics import roc_curve, auc, average_precision_score
+from scipy.stats.distributions import hypergeom
+from yeast_phospho.benchmark import interaction_labels, benchmark, roc_curves, enrichment
+
+
+class BenchmarkTest(unittest.TestCase):
+
+    def setUp(self):
+        rs = np.random.RandomState(0)
+
+        features, ions = ['Y%03d' % i for i in range(40)], ['%.4f' % (100 + i * .37) for i in range(25)]
+        self.features, self.ions = np.repeat(features, len(ions)), np.tile(ions, len(features))
+
+        # Scores with ties
+        self.scores = np.round(rs.rand(len(self.features)), 2)
+
+        self.sources = {s: {(f, i) for f, i in zip(self.features, self.ions) if rs.rand() < p} | {('missing', '1.0000')} for s, p in [('string', .1), ('biogrid', .02)]}
+
+    def test_interaction_labels(self):
+        labels = interaction_labels(self.features, self.ions, self.sources)
+
+        for s in self.sources:
+            self.assertEqual(list(labels[s].values.astype(int)), [int((f, i) in self.sources[s]) for f, i in zip(self.features, self.ions)])
+
+    def test_areas(self):
+        labels = interaction_labels(self.features, self.ions, self.sources)
+        res = benchmark(self.scores, labels)
+
+        for s in labels:
+            fpr, tpr, _ = roc_curve(labels[s], self.scores)
+
+            self.assertAlmostEqual(res.ix[s, 'auc'], auc(fpr, tpr), places=10)
+            self.assertAlmostEqual(res.ix[s, 'aupr'], average_precision_score(labels[s], self.scores), places=10)
+
+            fpr_, tpr_ = roc_curves(self.scores, labels)[s]
+            self.assertAlmostEqual(np.trapz(tpr_, fpr_), auc(fpr, tpr), places=10)
+
+    def test_enrichment(self):
+        labels = interaction_labels(self.features, self.ions, self.sources)
+        res = enrichment(self.scores, labels, [.5, .9])
+
+        for thres in [.5, .9]:
+            selected = self.scores > thres
+
+            for s in labels:
+                pvalue = hypergeom.sf((labels[s].values & selected).sum(), len(self.scores), labels[s].sum(), selected.sum())
+                self.assertAlmostEqual(res.ix[thres, s], pvalue, places=12)
+
+
+if __name__ == '__main__':
+    unittest.main()
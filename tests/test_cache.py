@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import unittest
+from yeast_phospho.cache import file_hash, sources_hash, cached_file
+
+
+class CachedFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = '%s/cache/' % self.tmp_dir
+
+        self.source = '%s/source.txt' % self.tmp_dir
+        with open(self.source, 'w') as f:
+            f.write('version 1\n')
+
+        self.compiled = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def compile_source(self, cache_file):
+        self.compiled.append(cache_file)
+
+        with open(self.source) as f_in, open(cache_file, 'w') as f_out:
+            f_out.write(f_in.read().upper())
+
+    def test_compiled_once(self):
+        cache_file = cached_file('source', self.source, self.compile_source, self.cache_dir, 'txt')
+
+        self.assertEqual(os.path.basename(cache_file), 'source_%s.txt' % file_hash(self.source))
+        self.assertEqual(cached_file('source', self.source, self.compile_source, self.cache_dir, 'txt'), cache_file)
+        self.assertEqual(len(self.compiled), 1)
+
+        with open(cache_file) as f:
+            self.assertEqual(f.read(), 'VERSION 1\n')
+
+    def test_source_changed(self):
+        first = cached_file('source', self.source, self.compile_source, self.cache_dir, 'txt')
+
+        with open(self.source, 'w') as f:
+            f.write('version 2\n')
+
+        second = cached_file('source', self.source, self.compile_source, self.cache_dir, 'txt')
+
+        self.assertNotEqual(first, second)
+        self.assertEqual(len(self.compiled), 2)
+
+    def test_sources_hash(self):
+        self.assertEqual(sources_hash(self.source), file_hash(self.source))
+        self.assertEqual(sources_hash({'a': self.source}), sources_hash({'a': self.source}))
+        self.assertNotEqual(sources_hash({'a': self.source}), sources_hash({'b': self.source}))
+
+    def test_interrupted_compile(self):
+        def interrupted(cache_file):
+            with open(cache_file, 'w') as f:
+                f.write('partial')
+            raise KeyboardInterrupt
+
+        self.assertRaises(KeyboardInterrupt, cached_file, 'source', self.source, interrupted, self.cache_dir, 'txt')
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+        cache_file = cached_file('source', self.source, self.compile_source, self.cache_dir, 'txt')
+
+        self.assertEqual(os.listdir(self.cache_dir), [os.path.basename(cache_file)])
+
+        with open(cache_file) as f:
+            self.assertEqual(f.read(), 'VERSION 1\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import numpy as np
+from pandas import DataFrame
+from scipy.stats import pearsonr, spearmanr
+from yeast_phospho.correlations import correlation_matrix, paired_correlations, correlation_pvalue
+
+try:
+    from yeast_phospho.utilities import pearson, spearman
+
+except ImportError:
+    # Same as utilities.pearson and utilities.spearman, which need pymist to be imported
+    def pearson(x, y):
+        mask = np.bitwise_and(np.isfinite(x), np.isfinite(y))
+        cor, pvalue = pearsonr(x[mask], y[mask]) if np.sum(mask) > 1 else (np.NaN, np.NaN)
+        return cor, pvalue, mask.sum()
+
+    def spearman(x, y):
+        mask = np.bitwise_and(np.isfinite(x), np.isfinite(y))
+        cor, pvalue = spearmanr(x[mask], y[mask]) if np.sum(mask) > 1 else (np.NaN, np.NaN)
+        return cor, pvalue, mask.sum()
+
+
+class CorrelationTest(unittest.TestCase):
+
+    def setUp(self):
+        rs = np.random.RandomState(0)
+
+        samples = ['c%d' % i for i in range(12)]
+
+        self.x = DataFrame(rs.randn(6, 12), index=['k%d' % i for i in range(6)], columns=samples)
+        self.y = DataFrame(rs.randn(8, 12), index=['m%d' % i for i in range(8)], columns=samples)
+
+        # Missing values, ties, a correlated pair and rows with few measurements
+        self.x = self.x.where(rs.rand(*self.x.shape) >= .25)
+        self.y = self.y.where(rs.rand(*self.y.shape) >= .25)
+
+        self.x.ix['k1'] = np.round(self.x.ix['k1'])
+        self.y.ix['m0'] = self.x.ix['k0'] * 2 + rs.randn(12) * .1
+        self.x.ix['k2'] = np.NaN
+        self.x.ix['k2', :4] = [1., 2., 3., 4.]
+
+    def assert_references(self, res, func):
+        for x, y, cor, pvalue, n in res[['x', 'y', 'cor', 'pvalue', 'n']].values:
+            ref_cor, ref_pvalue, ref_n = func(self.x.ix[x].values, self.y.ix[y].values)
+
+            self.assertEqual(n, ref_n)
+
+            if ref_n > 2:
+                self.assertTrue(np.allclose([cor, pvalue], [ref_cor, ref_pvalue], atol=1e-10, equal_nan=True), (x, y, cor, ref_cor, pvalue, ref_pvalue))
+
+    def test_pearson(self):
+        self.assert_references(correlation_matrix(self.x, self.y, 'pearson', block_size=4), pearson)
+
+    def test_spearman(self):
+        self.assert_references(correlation_matrix(self.x, self.y, 'spearman', block_size=4), spearman)
+
+    def test_paired_correlations(self):
+        pairs = [('k0', 'm0'), ('k1', 'm3'), ('k2', 'm5')]
+
+        for method, func in [('pearson', pearson), ('spearman', spearman)]:
+            cor, pvalue, n = paired_correlations(self.x, self.y, pairs, method)
+            ref = np.array([func(self.x.ix[i].values, self.y.ix[j].values) for i, j in pairs])
+
+            self.assertTrue(np.allclose(np.vstack((cor, pvalue, n)).T, ref, atol=1e-10, equal_nan=True))
+
+    def test_pvalue_small_n(self):
+        cor, ref = pearsonr(*np.random.RandomState(1).randn(2, 10))
+        pvalue = correlation_pvalue(np.array([.5, -1., np.NaN, cor]), np.array([2, 2, 1, 10]))
+
+        # Two observations have no degree of freedom, see correlation_pvalue
+        self.assertEqual(list(pvalue[:2]), [1., 1.])
+        self.assertTrue(np.isnan(pvalue[2]))
+        self.assertAlmostEqual(pvalue[3], ref, places=12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import numpy as np
+from pandas import Series
+from yeast_phospho.incidence import Incidence
+from yeast_phospho.enrichment import gsea, permutations_summary
+
+try:
+    from pymist.enrichment.gsea import gsea as pymist_gsea
+except ImportError:
+    pymist_gsea = None
+
+
+def enrichment_score(dataset, signature):
+    """
+    Weighted running sum of pymist.enrichment.gsea.gsea
+    """
+    genes = sorted(dataset, key=lambda g: dataset[g])
+    signature = set(signature).intersection(genes)
+
+    nh, nr = len(genes) - len(signature), sum(abs(dataset[g]) for g in signature)
+
+    hit, miss, es = 0., 0., 0.
+    for g in genes:
+        if g in signature:
+            hit += abs(dataset[g]) / nr
+        else:
+            miss += 1. / nh
+
+        if abs(hit - miss) > abs(es):
+            es = hit - miss
+
+    return es
+
+
+class GseaTest(unittest.TestCase):
+
+    def setUp(self):
+        rs = np.random.RandomState(0)
+
+        self.dataset = Series(rs.randn(200), index=['g%d' % i for i in range(200)])
+        self.signatures = {'s%d' % i: set(rs.choice(self.dataset.index, rs.randint(1, 30), replace=False)) | {'missing'} for i in range(20)}
+
+        # Strongly enriched signature
+        self.signatures['top'] = set(self.dataset.sort_values().index[-10:])
+
+    def test_enrichment_score(self):
+        res = gsea(self.dataset, self.signatures, 100, 0)
+
+        for s in self.signatures:
+            self.assertAlmostEqual(res.ix[s, 'es'], enrichment_score(self.dataset.to_dict(), self.signatures[s]), places=12)
+
+    def test_pvalue_floor(self):
+        res = gsea(self.dataset, self.signatures, 1000, 0)
+
+        self.assertEqual(res.ix['top', 'pvalue'], 1. / 1000)
+        self.assertTrue(((res['pvalue'] >= 1. / 1000) & (res['pvalue'] <= 1)).all())
+
+    def test_incidence_signatures(self):
+        targets = [t for s in sorted(self.signatures) for t in self.signatures[s]]
+        regulators = [s for s in sorted(self.signatures) for t in self.signatures[s]]
+
+        res = gsea(self.dataset, self.signatures, 500, 0)
+        res_sparse = gsea(self.dataset, Incidence.from_interactions(targets, regulators), 500, 0)
+
+        self.assertTrue(np.allclose(res.ix[res_sparse.index, ['es', 'pvalue']].values, res_sparse[['es', 'pvalue']].values))
+
+    def test_early_stopping(self):
+        full = gsea(self.dataset, self.signatures, 2000, 0)
+        stopped = gsea(self.dataset, self.signatures, 2000, 0, threshold=.05, first_block=100)
+
+        self.assertTrue(np.allclose(full['es'], stopped.ix[full.index, 'es']))
+
+        # Significant signatures are permuted up to the cap, clearly non-significant ones stop at the first block
+        self.assertEqual(stopped.ix['top', 'permutations'], 2000)
+        self.assertEqual(stopped.ix['top', 'pvalue'], full.ix['top', 'pvalue'])
+        self.assertEqual(stopped.ix[full['pvalue'] > .5, 'permutations'].max(), 100)
+
+        summary = permutations_summary(stopped[['permutations']], 2000)
+        self.assertLess(summary['mean'], 2000)
+
+    @unittest.skipUnless(pymist_gsea is not None, 'pymist not installed')
+    def test_pymist(self):
+        res = gsea(self.dataset, self.signatures, 2000, 0)
+
+        for s in self.signatures:
+            es, pvalue = pymist_gsea(self.dataset.to_dict(), self.signatures[s], 2000)
+
+            self.assertAlmostEqual(res.ix[s, 'es'], es, places=12)
+            self.assertLess(abs(res.ix[s, 'pvalue'] - pvalue), 4 * np.sqrt(.25 / 2000) + 1. / 2000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from yeast_phospho.fasta import parse_fasta, build_fasta_index, write_fasta_index, read_fasta_index, IndexedFasta
+
+
+def read_fasta(fasta_file):
+    """
+    Sequences of utilities.read_fasta before the streaming parser
+    """
+    sequences = {}
+
+    with open(fasta_file) as f:
+        lines = f.readlines()
+
+        for i in range(len(lines)):
+            if lines[i].startswith('>'):
+                key = lines[i].split(' ')[0].split('>')[1].strip()
+                sequence = ''
+
+                i += 1
+                while (i < len(lines)) and (not lines[i].startswith('>')):
+                    sequence += lines[i].strip()
+                    i += 1
+
+                sequences[key] = sequence.replace('*', '')
+
+    return sequences
+
+
+class FastaTest(unittest.TestCase):
+
+    def setUp(self):
+        rs = np.random.RandomState(0)
+
+        self.sequences = {'P%d' % i: ''.join(rs.choice(list('ACDEFGHIKLMNPQRSTVWY'), rs.randint(1, 45))) + '*' for i in range(6)}
+
+        # Record wrapping across lines of 10 residues, with a trailing blank line
+        self.tmp_dir = tempfile.mkdtemp()
+        self.fasta_file = '%s/proteins.fasta' % self.tmp_dir
+
+        with open(self.fasta_file, 'w') as f:
+            for p in sorted(self.sequences):
+                f.write('>%s description of %s\n' % (p, p))
+                f.write(''.join('%s\n' % self.sequences[p][i:i + 10] for i in range(0, len(self.sequences[p]), 10)))
+
+            f.write('\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, content):
+        fasta_file = '%s/other.fasta' % self.tmp_dir
+
+        with open(fasta_file, 'w') as f:
+            f.write(content)
+
+        return fasta_file
+
+    def test_parse_fasta(self):
+        self.assertEqual(dict(parse_fasta(self.fasta_file)), read_fasta(self.fasta_file))
+        self.assertEqual(dict(parse_fasta(self.fasta_file)), {p: s.replace('*', '') for p, s in self.sequences.items()})
+
+    def test_fasta_index(self):
+        index = build_fasta_index(self.fasta_file)
+
+        with open(self.fasta_file) as f:
+            content = f.read()
+
+        for name, length, offset, bases, width in index:
+            self.assertEqual(length, len(self.sequences[name]))
+            self.assertEqual(content[offset:offset + min(length, bases)], self.sequences[name][:bases])
+            self.assertEqual((bases, width), (min(length, 10), min(length, 10) + 1))
+
+        write_fasta_index(index, '%s/proteins.fasta.fai' % self.tmp_dir)
+        self.assertEqual(read_fasta_index('%s/proteins.fasta.fai' % self.tmp_dir), index)
+
+    def test_blank_line(self):
+        self.assertRaises(ValueError, build_fasta_index, self.write('>P0\nACDEF\n\nGHIKL\n'))
+        self.assertRaises(ValueError, build_fasta_index, self.write('>P0\n\nACDEF\n'))
+        self.assertEqual(build_fasta_index(self.write('>P0\nACDEF\nGH\n\n>P1\nKL\n')), [('P0', 7, 4, 5, 6), ('P1', 2, 18, 2, 3)])
+
+    def test_line_lengths(self):
+        self.assertRaises(ValueError, build_fasta_index, self.write('>P0\nACDEF\nGH\nIK\n'))
+        self.assertRaises(ValueError, build_fasta_index, self.write('>P0\nACDEF\nGHIKLM\n'))
+
+    def test_fetch(self):
+        fasta = IndexedFasta(self.fasta_file, '%s/cache/' % self.tmp_dir)
+
+        self.assertEqual(sorted(fasta), sorted(self.sequences))
+        self.assertTrue('P0' in fasta and 'missing' not in fasta)
+
+        for p, sequence in self.sequences.items():
+            self.assertEqual(fasta[p], sequence.replace('*', ''))
+
+            # Sub-ranges within and across lines
+            for start, end in [(0, 3), (8, 13), (5, 35), (12, None), (-5, 100), (20, 20)]:
+                self.assertEqual(fasta.fetch(p, start, end), sequence[max(0, start):end].replace('*', ''))
+
+    def test_bulk(self):
+        fasta = IndexedFasta(self.fasta_file, '%s/cache/' % self.tmp_dir)
+        names, buffer, offsets = fasta.bulk(['P3', 'P1'])
+
+        self.assertEqual(names, ['P3', 'P1'])
+        self.assertEqual([buffer[offsets[i]:offsets[i + 1]].tostring() for i in range(len(names))], [fasta['P3'], fasta['P1']])
+
+    def test_duplicated_records(self):
+        fasta = IndexedFasta(self.write('>P0\nAC\n>P1\nDE\n>P0\nFG\n'), '%s/cache/' % self.tmp_dir)
+
+        self.assertEqual(fasta['P0'], read_fasta('%s/other.fasta' % self.tmp_dir)['P0'])
+        self.assertEqual(len(fasta), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+import numpy as np
+from pandas import DataFrame, pivot_table
+from yeast_phospho.incidence import Incidence
+
+
+class IncidenceTest(unittest.TestCase):
+
+    def setUp(self):
+        rs = np.random.RandomState(0)
+
+        # Duplicated interactions included
+        self.interactions = DataFrame({'site': rs.choice(['s%d' % i for i in range(40)], 150), 'kinase': rs.choice(['k%d' % i for i in range(8)], 150)})
+        self.interactions['value'] = 1
+
+        self.x = Incidence.from_interactions(self.interactions['site'], self.interactions['kinase'])
+
+    def test_pivot_table(self):
+        ref = pivot_table(self.interactions.drop_duplicates(['site', 'kinase']), values='value', index='site', columns='kinase', fill_value=0)
+
+        self.assertTrue((self.x.to_dense() == ref.ix[self.x.index, self.x.columns]).all().all())
+
+    def test_reindex(self):
+        labels = ['s3', 'missing', 's0', 's3']
+        res = self.x.reindex(labels).to_dense()
+
+        self.assertEqual(list(res.index), labels)
+        self.assertTrue((res.ix[['s0']].values == self.x.to_dense().ix[['s0']].values).all())
+        self.assertEqual(res.iloc[1].sum(), 0)
+
+    def test_to_sets(self):
+        sets = self.x.to_sets()
+
+        for k, df in self.interactions.groupby('kinase'):
+            self.assertEqual(sets[k], set(df['site']))
+            self.assertEqual(self.x.targets(k), set(df['site']))
+
+    def test_drop_empty(self):
+        res = self.x.reindex(['s0']).drop_empty()
+
+        self.assertEqual(set(res.columns), set(self.interactions.ix[self.interactions['site'] == 's0', 'kinase']))
+
+
+if __name__ == '__main__':
+    unittest.main()
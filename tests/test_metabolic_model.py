@@ -0,0 +1,119 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pandas import DataFrame
+
+try:
+    from yeast_phospho import metabolic_model
+except ImportError:
+    metabolic_model = None
+
+
+class SBMLModel(object):
+    """
+    Stoichiometric matrix and reaction genes of a parsed SBML model, as pymist read_sbml_model
+    """
+
+    def __init__(self, stoichiometry, genes):
+        self.s_matrix = DataFrame(stoichiometry).fillna(0)
+        self.genes = genes
+
+    def get_stoichiometric_matrix(self):
+        return self.s_matrix.copy()
+
+    def get_reaction_genes(self, reaction):
+        return set(self.genes.get(reaction, []))
+
+
+def gene_ions(model, annot, hmet):
+    """
+    Gene to ions mapping of known_interactions_list.py before the model was compiled
+    """
+    s_matrix = model.get_stoichiometric_matrix()
+    s_matrix = s_matrix[[not i.endswith('_b') for i in s_matrix.index]]
+    s_matrix = s_matrix.drop('R_biomass_SC5_notrace', axis=1)
+
+    m_dict = {i: {r for r in s_matrix.loc[i, s_matrix.ix[i] != 0].index if not r.startswith('R_EX_')} for i in s_matrix.index}
+    m_dict = {m: {g for r in m_dict[m] for g in model.get_reaction_genes(r)} for m in m_dict}
+    m_dict = {m: {g for x in m_dict if x[2:-2] == m for g in m_dict[x]} for m in annot}
+    m_dict = {m: m_dict[m] for m in m_dict if 0 < len(m_dict[m])}
+    m_dict = {m: m_dict[m] for m in m_dict if m not in hmet}
+
+    m_genes = {g for m in m_dict for g in m_dict[m]}
+    g_dict = {g: {m for m in m_dict if g in m_dict[m]} for g in m_genes}
+    return {g: {annot[m] for m in g_dict[g]} for g in g_dict}
+
+
+@unittest.skipUnless(metabolic_model is not None, 'pymist not installed')
+class MetabolicModelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+        self.sbml_file = '%s/model.xml' % self.tmp_dir
+        with open(self.sbml_file, 'w') as f:
+            f.write('<sbml/>\n')
+
+        self.model = SBMLModel({
+            'R_HEX': {'M_glc_DASH_D_c': -1, 'M_atp_c': -1, 'M_pyr_c': 1},
+            'R_GLCt': {'M_glc_DASH_D_b': -1, 'M_glc_DASH_D_c': 1},
+            'R_GLCm': {'M_glc_DASH_D_c': -1, 'M_glc_DASH_D_m': 1},
+            'R_PDH': {'M_pyr_c': -1, 'M_cit_c': 1, 'M_oaa_c': -1},
+            'R_GLCx': {'M_glc_DASH_D_b': -1},
+            'R_EX_lac_DASH_L': {'M_lac_DASH_L_c': -1},
+            'R_biomass_SC5_notrace': {'M_cit_c': -1, 'M_atp_c': -1}
+        }, {
+            'R_HEX': ['G1', 'G2'], 'R_GLCt': ['G3'], 'R_GLCm': ['G4'], 'R_PDH': ['G5'],
+            'R_GLCx': ['G7'], 'R_EX_lac_DASH_L': ['G8'], 'R_biomass_SC5_notrace': ['G9']
+        })
+
+        self.annot = {'glc_DASH_D': '179.0561', 'atp': '505.9885', 'pyr': '87.0088', 'cit': '191.0197', 'lac_DASH_L': '89.0244', 'missing': '1.0000'}
+
+        self.read_sbml_model, metabolic_model.read_sbml_model = metabolic_model.read_sbml_model, lambda sbml_file: self.model
+
+    def tearDown(self):
+        metabolic_model.read_sbml_model = self.read_sbml_model
+        shutil.rmtree(self.tmp_dir)
+
+    def load(self):
+        return metabolic_model.load_metabolic_model(self.sbml_file, cache_dir='%s/cache/' % self.tmp_dir)
+
+    def test_gene_ions(self):
+        model = self.load()
+
+        for hubs in [set(), {'atp'}]:
+            self.assertEqual(model.gene_ions(self.annot, hubs), gene_ions(self.model, self.annot, hubs))
+
+    def test_exclusions(self):
+        genes = self.load().metabolite_genes(self.annot, {'atp'})
+
+        # Compartments merged, external glucose (G7) ignored
+        self.assertEqual(genes['glc_DASH_D'], {'G1', 'G2', 'G3', 'G4'})
+
+        # Biomass (G9) and exchange (G8) reactions ignored
+        self.assertEqual(genes['cit'], {'G5'})
+        self.assertNotIn('lac_DASH_L', genes)
+
+        # Hubs and metabolites missing from the model
+        self.assertNotIn('atp', genes)
+        self.assertNotIn('missing', genes)
+
+    def test_gene_metabolites(self):
+        g_metabolites = self.load().gene_metabolites(self.annot)
+
+        self.assertEqual(g_metabolites['G1'], {'glc_DASH_D', 'atp', 'pyr'})
+        self.assertEqual(g_metabolites['G5'], {'pyr', 'cit'})
+        self.assertEqual(set(g_metabolites), {'G1', 'G2', 'G3', 'G4', 'G5'})
+
+    def test_compiled_once(self):
+        first = self.load().gene_ions(self.annot)
+
+        # The model is parsed only when the cache is missing
+        self.model = None
+
+        self.assertEqual(self.load().gene_ions(self.annot), first)
+        self.assertEqual(len(os.listdir('%s/cache/' % self.tmp_dir)), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from pandas import DataFrame
+from yeast_phospho.incidence import Incidence
+
+try:
+    from yeast_phospho import utilities
+    from yeast_phospho.motifs import MotifScanner, load_motif_scanner
+except ImportError:
+    utilities = None
+
+
+@unittest.skipUnless(utilities is not None, 'pymist not installed')
+class MotifScannerTest(unittest.TestCase):
+
+    def setUp(self):
+        rs = np.random.RandomState(0)
+
+        self.sequences = {'P%02d' % i: ''.join(rs.choice(utilities.namespace, 120)) for i in range(20)}
+
+        # Kinase targets on S/T, and one on Y
+        sites = [(p, m) for p in sorted(self.sequences) for m, aa in enumerate(self.sequences[p]) if aa in 'STY']
+        interactions = [('K%d' % (k if self.sequences[p][m] != 'Y' else 3), '%s_%s%d' % (p, self.sequences[p][m], m + 1)) for k, (p, m) in zip(rs.randint(0, 3, len(sites)), sites) if rs.rand() < .3]
+
+        self.interactions = DataFrame(interactions, columns=['kinase', 'site'])
+        self.targets = Incidence.from_interactions(self.interactions['site'], self.interactions['kinase'])
+
+        self.flanking_regions = utilities.flanking_sequence(self.sequences, ['%s_%s%d' % (p, self.sequences[p][m], m + 1) for p, m in sites], 7)
+
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_similarity_score_matrix(self):
+        scanner = MotifScanner.from_targets(self.targets, self.sequences, utilities.AA_PRIORS_YEAST)
+        res = scanner.score(self.flanking_regions)
+
+        for k in self.targets.columns:
+            regions = {s: self.flanking_regions[s] for s in self.targets.targets(k)}
+            ref = utilities.similarity_score_matrix(self.flanking_regions, *utilities.position_weight_matrix(regions, utilities.AA_PRIORS_YEAST))
+
+            self.assertEqual(set(res[k].dropna().index), set(s for s, seq in ref.index))
+            self.assertTrue(np.allclose([res.ix[s, k] for s, seq in ref.index], ref.values, atol=1e-12))
+
+    def test_mask(self):
+        scanner = MotifScanner.from_targets(self.targets, self.sequences, utilities.AA_PRIORS_YEAST)
+        mask = Incidence.from_interactions(['P00', 'P00', 'P01', 'missing'], ['K0', 'K3', 'K1', 'K2'])
+
+        res, unmasked = scanner.score(self.flanking_regions, mask), scanner.score(self.flanking_regions)
+
+        dense = mask.to_dense().reindex(index=[s.split('_')[0] for s in res.index], columns=res.columns).fillna(0).values != 0
+
+        self.assertTrue(np.array_equal(res.isnull().values, unmasked.isnull().values | ~dense))
+        self.assertTrue(np.allclose(res.values[dense & res.notnull().values], unmasked.values[dense & res.notnull().values]))
+
+    def test_no_kinases(self):
+        res = MotifScanner({}, {}).score(self.flanking_regions)
+
+        self.assertEqual(res.shape, (len(self.flanking_regions), 0))
+
+    def test_save(self):
+        scanner = MotifScanner.from_targets(self.targets, self.sequences, utilities.AA_PRIORS_YEAST)
+        scanner.save('%s/motifs.npz' % self.tmp_dir)
+
+        res = MotifScanner.from_arrays(np.load('%s/motifs.npz' % self.tmp_dir)).score(self.flanking_regions)
+
+        self.assertEqual(list(res.columns), scanner.kinases)
+        self.assertTrue(np.allclose(res.values, scanner.score(self.flanking_regions).values, equal_nan=True))
+
+    def test_load_motif_scanner(self):
+        phosphogrid_file, fasta_file, cache_dir = '%s/PhosphoGrid.txt' % self.tmp_dir, '%s/proteins.fasta' % self.tmp_dir, '%s/cache/' % self.tmp_dir
+
+        records = [(s.split('_')[0], s.split('_')[1], self.sequences[s.split('_')[0]], k, '111|222', '-', '-') for k, s in self.interactions.values]
+        DataFrame(records, columns=['ORF_NAME', 'PHOSPHO_SITE', 'SEQUENCE', 'KINASES_ORFS', 'KINASES_EVIDENCE_PUBMED', 'PHOSPHATASES_ORFS', 'PHOSPHATASES_EVIDENCE_PUBMED']).to_csv(phosphogrid_file, sep='\t', index=False)
+
+        with open(fasta_file, 'w') as f:
+            for p in sorted(self.sequences):
+                f.write('>%s\n%s\n%s\n' % (p, self.sequences[p][:60], self.sequences[p][60:]))
+
+        ref = MotifScanner.from_targets(self.targets, self.sequences, utilities.AA_PRIORS_YEAST).score(self.flanking_regions)
+
+        res = load_motif_scanner(set(), 7, True, phosphogrid_file, fasta_file, cache_dir).score(self.flanking_regions)
+        cached = [f for f in os.listdir(cache_dir) if f.startswith('KinaseMotifs_')]
+
+        self.assertTrue(np.allclose(res.values, ref.values, equal_nan=True))
+
+        # Second load reads the cached PWMs, other parameters are cached apart
+        res = load_motif_scanner(set(), 7, True, phosphogrid_file, fasta_file, cache_dir).score(self.flanking_regions)
+        self.assertEqual([f for f in os.listdir(cache_dir) if f.startswith('KinaseMotifs_')], cached)
+        self.assertTrue(np.allclose(res.values, ref.values, equal_nan=True))
+
+        load_motif_scanner({'111'}, 7, True, phosphogrid_file, fasta_file, cache_dir)
+        self.assertEqual(len([f for f in os.listdir(cache_dir) if f.startswith('KinaseMotifs_')]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
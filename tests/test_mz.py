@@ -0,0 +1,69 @@
+import unittest
+import numpy as np
+from pandas import DataFrame
+from yeast_phospho.mz import mz_window, MzIndex, unique_ions
+
+
+class MzIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        rs = np.random.RandomState(0)
+
+        self.mz = np.round(rs.uniform(50, 1000, 500), 3)
+        self.query = np.concatenate((self.mz[:50] + rs.normal(0, .002, 50), rs.uniform(50, 1000, 50)))
+
+    def brute_force(self, query, ppm=None, da=None):
+        window = mz_window(query, ppm, da)
+        return sorted((q, i) for q in range(len(query)) for i in range(len(self.mz)) if abs(self.mz[i] - query[q]) <= window[q])
+
+    def test_lookup(self):
+        index = MzIndex(self.mz)
+
+        for ppm, da in [(5, None), (None, .005), (2, .001)]:
+            q, i = index.lookup(self.query, ppm, da)
+
+            self.assertEqual(sorted(zip(q, i)), self.brute_force(self.query, ppm, da))
+
+    def test_inclusive_bounds(self):
+        query = np.array([100., 250.5])
+
+        for ppm, da in [(10, None), (None, .25), (10, .25)]:
+            window = mz_window(query, ppm, da)
+
+            # Ions on both edges of the windows match, the closest floats outside do not
+            mz = np.concatenate((query - window, query + window, np.nextafter(query - window, 0), np.nextafter(query + window, np.inf)))
+
+            q, i = MzIndex(mz).lookup(query, ppm, da)
+
+            self.assertEqual(sorted(zip(q, i)), [(0, 0), (0, 2), (1, 1), (1, 3)])
+
+    def test_no_tolerance(self):
+        self.assertRaises(ValueError, MzIndex(self.mz).lookup, self.query)
+
+    def test_empty(self):
+        q, i = MzIndex([]).lookup(self.query, da=.01)
+
+        self.assertEqual(len(q), 0)
+        self.assertEqual(len(i), 0)
+
+
+class UniqueIonsTest(unittest.TestCase):
+
+    def test_shared_labels(self):
+        df = DataFrame({'s1': [1., 2, 3, 4, 5]}, index=[100.00001, 100.00004, 100.0001, 250.12344, 98.7])
+        df.index.name = 'm/z'
+
+        res = unique_ions(df, 4)
+
+        # 100.00001 and 100.00004 are both labelled 100.0000
+        self.assertEqual(list(res.index), ['100.0001', '250.1234', '98.7000'])
+        self.assertEqual(list(res['s1']), [3, 4, 5])
+        self.assertEqual(res.index.name, 'm/z')
+
+        res = unique_ions(df, 2)
+
+        self.assertEqual(list(res.index), ['250.12', '98.70'])
+
+
+if __name__ == '__main__':
+    unittest.main()
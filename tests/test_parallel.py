@@ -0,0 +1,123 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from pandas import DataFrame
+from yeast_phospho.parallel import run_tasks, task_key, data_digest, CheckpointStore
+
+calls = []
+
+
+def column_fit(x, y, alpha=1.):
+    calls.append(alpha)
+    return x.values.T.dot(y.values) * alpha
+
+
+def store_records(store_file):
+    records = []
+
+    with open(store_file, 'rb') as f:
+        while True:
+            try:
+                records.append(pickle.load(f))
+            except EOFError:
+                return records
+
+
+class RunTasksTest(unittest.TestCase):
+
+    def setUp(self):
+        rs = np.random.RandomState(0)
+
+        self.x = DataFrame(rs.randn(20, 3), columns=['k0', 'k1', 'k2'])
+        self.y = DataFrame(rs.randn(20, 4), columns=['c0', 'c1', 'c2', 'c3'])
+
+        self.tasks = [(c, {'x': self.x, 'y': self.y[c], 'alpha': a}) for c in self.y for a in [1., 2.]]
+        self.labels = [label for label, kwargs in self.tasks]
+
+        self.tmp_dir = tempfile.mkdtemp()
+        del calls[:]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def tasks_results(self, store_file, tasks=None, n_jobs=1):
+        tasks = self.tasks if tasks is None else tasks
+
+        res = run_tasks(column_fit, [(i, kwargs) for i, (label, kwargs) in enumerate(tasks)], store_file, n_jobs)
+
+        return [res[i] for i in range(len(tasks))]
+
+    def test_resume_torn_record(self):
+        ref = self.tasks_results('%s/ref.pickle' % self.tmp_dir)
+
+        # Interrupted run: three complete records and a partially written one
+        store_file = '%s/store.pickle' % self.tmp_dir
+        self.tasks_results(store_file, self.tasks[:4])
+
+        with open(store_file, 'rb+') as f:
+            f.truncate(os.path.getsize(store_file) - 10)
+
+        del calls[:]
+        res = self.tasks_results(store_file)
+
+        self.assertEqual(len(calls), len(self.tasks) - 3)
+        self.assertTrue(all(np.array_equal(a, b) for a, b in zip(res, ref)))
+
+        # Records appended after the torn one are readable
+        self.assertEqual(len(store_records(store_file)), len(self.tasks))
+
+        del calls[:]
+        self.tasks_results(store_file)
+        self.assertEqual(len(calls), 0)
+
+    def test_parallel(self):
+        ref = self.tasks_results('%s/ref.pickle' % self.tmp_dir)
+        res = self.tasks_results('%s/store.pickle' % self.tmp_dir, n_jobs=2)
+
+        self.assertTrue(all(np.array_equal(a, b) for a, b in zip(res, ref)))
+
+    def test_compaction(self):
+        store_file = '%s/store.pickle' % self.tmp_dir
+        self.tasks_results(store_file)
+
+        # Duplicated record and record of a task no longer in the sweep
+        with open(store_file, 'ab') as f:
+            for key, result in store_records(store_file)[:1] + [('stale', 0)]:
+                pickle.dump((key, result), f, protocol=2)
+
+        self.assertEqual(len(store_records(store_file)), len(self.tasks) + 2)
+
+        del calls[:]
+        self.tasks_results(store_file, self.tasks[:5])
+
+        self.assertEqual(len(calls), 0)
+        self.assertEqual(sorted(k for k, r in store_records(store_file)), sorted(task_key(column_fit, kwargs) for label, kwargs in self.tasks[:5]))
+
+        # Keys kept if none given
+        self.assertEqual(len(CheckpointStore(store_file).results), 5)
+
+    def test_inputs(self):
+        store_file = '%s/store.pickle' % self.tmp_dir
+
+        # Task of each condition identified by the digests of the other conditions
+        def tasks(y):
+            digests = {c: data_digest(y[c]) for c in y}
+            return [(c, {'x': self.x, 'y': y.drop(c, axis=1).sum(1)}, {o: digests[o] for o in y if o != c}) for c in y]
+
+        run_tasks(column_fit, tasks(self.y), store_file)
+
+        y = self.y.copy()
+        y['c0'] += 1
+
+        del calls[:]
+        res = run_tasks(column_fit, tasks(y), store_file)
+
+        self.assertEqual(len(calls), 3)
+        self.assertTrue(np.array_equal(res['c0'], column_fit(self.x, self.y.drop('c0', axis=1).sum(1))))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import re
+import unittest
+import numpy as np
+from pandas import DataFrame
+from yeast_phospho.peptides import ProteomeIndex, map_peptides, index_peptide_map, condition_peptide_map
+
+
+def get_multiple_site(protein, peptide):
+    """
+    Sites of utilities.get_multiple_site
+    """
+    sites = []
+
+    for i in range(len(re.findall('\[[0-9]*\.?[0-9]*\]', peptide))):
+        p = peptide if i == 0 else re.sub('\[[0-9]*\.?[0-9]*\]', '', peptide, i)
+        site_pos = protein.find(re.sub('\[[0-9]*\.?[0-9]*\]', '', p)) + p.find('[')
+        sites.append(protein[site_pos - 1] + str(site_pos))
+
+    return sites
+
+
+class MapPeptidesTest(unittest.TestCase):
+
+    def setUp(self):
+        rs = np.random.RandomState(0)
+        residues = np.array(list('ARNDCQEGHILKMFPSTWYV'))
+
+        self.sequences = {'P%03d' % i: ''.join(rs.choice(residues, rs.randint(50, 300))) for i in range(50)}
+
+        # Repeated segment
+        self.sequences['P001'] = self.sequences['P000'][10:60] * 2
+
+        self.peptides, self.proteins = [], []
+        for i in range(500):
+            p = sorted(self.sequences)[rs.randint(len(self.sequences))]
+            start, length = rs.randint(0, len(self.sequences[p]) - 30), rs.randint(7, 30)
+            peptide = self.sequences[p][start:start + length]
+
+            modified, last = '', 0
+            for m in sorted(set(rs.randint(0, length, rs.randint(1, 4)))):
+                modified += peptide[last:m + 1] + '[%s]' % rs.choice(['80', '166.998', '181'])
+                last = m + 1
+
+            self.peptides.append(modified + peptide[last:])
+            self.proteins.append(p)
+
+    def test_sites(self):
+        res = map_peptides(self.peptides, self.proteins, ProteomeIndex(self.sequences))
+
+        ref = ['%s_%s' % (p, '_'.join(get_multiple_site(self.sequences[p], peptide))) for peptide, p in zip(self.peptides, self.proteins)]
+
+        self.assertEqual(list(res['site']), ref)
+        self.assertTrue((res['matches'] >= 1).all())
+
+    def test_missing_peptide(self):
+        res = map_peptides(['WWWWWWWWWWS[80]WWWW'], ['P000'], ProteomeIndex(self.sequences))
+
+        self.assertEqual(res.ix[0, 'matches'], 0)
+        self.assertTrue(np.isnan(res.ix[0, 'start']))
+
+
+class PeptideMapTest(unittest.TestCase):
+
+    def setUp(self):
+        self.peptide_map = DataFrame([
+            ('P1', 'AS[]K', 'ASK_1', 2, None, 'N_upshift'),
+            ('P1', 'AS[]K', 'ASK_1', 2, None, 'N_upshift'),
+            ('P2', 'GS[]T[]R', 'GSTR_1', 12, 13, 'N_upshift'),
+            ('P3', 'LS[]R', 'LSR_1', 40, None, 'N_upshift'),
+            ('P3', 'LST[]R', 'LSR_1', 41, None, 'N_upshift'),
+            ('P1', 'AS[]K', 'ASK_1', 2, None, 'Rapamycin')
+        ], columns=['protein', 'phosphopeptide', 'peptide', 'site_1', 'site_2', 'condition'])
+
+    def test_index_peptide_map(self):
+        res = index_peptide_map(self.peptide_map, site_columns=('site_1', 'site_2'))
+
+        # Peptide filters of preprocess/phosphoproteomics.py before the map was indexed
+        for condition, peptide in res.index:
+            rows = self.peptide_map[(self.peptide_map['condition'] == condition) & (self.peptide_map['peptide'] == peptide)]
+
+            self.assertEqual(res.ix[(condition, peptide), 'phosphopeptides'], len(rows['phosphopeptide']))
+            self.assertEqual(res.ix[(condition, peptide), 'sites'], rows[['site_1', 'site_2']].count(1).values[0])
+            self.assertEqual(tuple(res.ix[(condition, peptide), ['protein', 'position']]), tuple(rows[['protein', 'site_1']].values[0]))
+
+        self.assertEqual(len(res), 4)
+
+    def test_condition_peptide_map(self):
+        peptide_map = index_peptide_map(self.peptide_map, site_columns=('site_1', 'site_2'))
+
+        res = condition_peptide_map(peptide_map, 'Rapamycin', ['ASK_1', 'GSTR_1', 'ASK_1'])
+        self.assertEqual(list(res.index), ['ASK_1', 'GSTR_1', 'ASK_1'])
+        self.assertEqual(list(res['phosphopeptides'].fillna(0)), [1, 0, 1])
+
+        # Missing condition, no peptide is kept
+        res = condition_peptide_map(peptide_map, 'N_downshift', ['ASK_1', 'LSR_1'])
+        self.assertEqual(len(res), 2)
+        self.assertFalse((res['phosphopeptides'] == 1).any())
+
+
+if __name__ == '__main__':
+    unittest.main()
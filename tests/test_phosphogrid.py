@@ -0,0 +1,71 @@
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from pandas import DataFrame, read_csv
+from yeast_phospho.phosphogrid import load_phosphogrid
+
+
+def kinases_targets(phosphogrid_file, studies_to_filter):
+    """
+    Interactions of utilities.get_kinases_targets before PhosphoGrid was compiled
+    """
+    k_targets = read_csv(phosphogrid_file, sep='\t')
+
+    k_targets = k_targets[[len(set(i.split('|')).intersection(studies_to_filter)) != len(set(i.split('|'))) for i in k_targets['KINASES_EVIDENCE_PUBMED']]]
+    k_targets = k_targets[[len(set(i.split('|')).intersection(studies_to_filter)) != len(set(i.split('|'))) for i in k_targets['PHOSPHATASES_EVIDENCE_PUBMED']]]
+
+    k_targets = k_targets.loc[(k_targets['KINASES_ORFS'] != '-') | (k_targets['PHOSPHATASES_ORFS'] != '-')]
+    k_targets['SOURCE'] = k_targets['KINASES_ORFS'] + '|' + k_targets['PHOSPHATASES_ORFS']
+
+    k_targets = [(k, t + '_' + site) for t, site, source in k_targets[['ORF_NAME', 'PHOSPHO_SITE', 'SOURCE']].values for k in source.split('|') if k != '-' and k != '']
+
+    return DataFrame(k_targets, columns=['kinase', 'site'])
+
+
+class PhosphoGridTest(unittest.TestCase):
+
+    def setUp(self):
+        rs = np.random.RandomState(0)
+
+        orfs, regulators = ['Y%03dW' % i for i in range(50)], ['K%02d' % i for i in range(10)] + ['Y001W']
+        pubmeds = ['21177495', '19779198', '111', '222']
+
+        records = []
+        for i in range(400):
+            orf = orfs[rs.randint(len(orfs))]
+
+            kinases = '|'.join(set(rs.choice(regulators, rs.randint(1, 3)))) if rs.rand() < .6 else '-'
+            phosphatases = '|'.join(set(rs.choice(regulators, 1))) if rs.rand() < .3 else '-'
+
+            records.append((
+                orf, 'S%d' % rs.randint(1, 100), 'MSTY' * (int(orf[1:4]) % 7 + 1),
+                kinases, '|'.join(rs.choice(pubmeds, rs.randint(1, 3))) if kinases != '-' else '-',
+                phosphatases, '|'.join(rs.choice(pubmeds, rs.randint(1, 3))) if phosphatases != '-' else '-'
+            ))
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.phosphogrid_file = '%s/PhosphoGrid.txt' % self.tmp_dir
+
+        DataFrame(records, columns=['ORF_NAME', 'PHOSPHO_SITE', 'SEQUENCE', 'KINASES_ORFS', 'KINASES_EVIDENCE_PUBMED', 'PHOSPHATASES_ORFS', 'PHOSPHATASES_EVIDENCE_PUBMED']).to_csv(self.phosphogrid_file, sep='\t', index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_interactions(self):
+        pg = load_phosphogrid(self.phosphogrid_file, '%s/cache/' % self.tmp_dir)
+
+        for studies_to_filter in [{'21177495', '19779198'}, {'111'}, set(), {'111', '222', 'missing'}]:
+            ref = kinases_targets(self.phosphogrid_file, studies_to_filter)
+            res = pg.interactions(studies_to_filter)
+
+            self.assertEqual([tuple(i) for i in res.values], [tuple(i) for i in ref.values])
+
+    def test_protein_sequences(self):
+        pg = load_phosphogrid(self.phosphogrid_file, '%s/cache/' % self.tmp_dir)
+
+        self.assertEqual(pg.protein_sequences(), read_csv(self.phosphogrid_file, sep='\t').groupby('ORF_NAME')['SEQUENCE'].first().to_dict())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import shutil
+import tempfile
+import unittest
+import warnings
+import numpy as np
+from pandas import DataFrame
+from sklearn.linear_model import ElasticNet, ElasticNetCV
+from sklearn.cross_validation import LeaveOneOut, ShuffleSplit
+from yeast_phospho.regression import loo_elastic_net, median_betas, elastic_net_cv, elastic_net_split, predict_split, resample_masks, stability_selection, stability_summary
+
+
+class ElasticNetTest(unittest.TestCase):
+
+    def setUp(self):
+        warnings.simplefilter('ignore')
+
+        rs = np.random.RandomState(0)
+
+        self.x = DataFrame(rs.randn(30, 10), index=['s%d' % i for i in range(30)], columns=['k%d' % i for i in range(10)])
+        self.y = DataFrame(self.x.values[:, :3].dot(rs.randn(3, 6)) * .5 + rs.randn(30, 6), index=self.x.index, columns=['m%d' % i for i in range(6)])
+
+        # Constant response
+        self.y['m5'] = 1.
+
+    def test_loo_elastic_net(self):
+        predictions, coefs = loo_elastic_net(self.x, self.y)
+        betas = median_betas(coefs, self.x.columns, self.y.columns)
+
+        for m in self.y:
+            fold_coefs = []
+
+            for train, test in LeaveOneOut(len(self.y)):
+                lm = ElasticNet(alpha=.01).fit(self.x.ix[train], self.y.ix[train, m])
+
+                # Warm started folds agree within the coordinate descent tolerance
+                self.assertAlmostEqual(predictions.ix[test[0], m], lm.predict(self.x.ix[test])[0], delta=1e-3)
+                fold_coefs.append(lm.coef_)
+
+            self.assertTrue(np.allclose([betas[m][f] for f in self.x.columns], np.median(fold_coefs, axis=0), atol=1e-3))
+
+    def test_elastic_net_cv(self):
+        cv = list(ShuffleSplit(len(self.x), n_iter=5, test_size=.2, random_state=0))
+
+        coef, intercept, alphas = elastic_net_cv(self.x.values, self.y.values, cv)
+
+        for k, m in enumerate(self.y):
+            lm = ElasticNetCV(cv=cv).fit(self.x.values, self.y[m].values)
+
+            self.assertAlmostEqual(alphas[k], lm.alpha_, places=8)
+            self.assertTrue(np.allclose(coef[k], lm.coef_, atol=1e-4))
+            self.assertAlmostEqual(intercept[k], lm.intercept_, places=4)
+
+    def test_elastic_net_split(self):
+        coef, intercept, alphas = elastic_net_split(self.x.iloc[:25], self.y.iloc[:25], n_iter=5, seed=0)
+        predictions = predict_split(coef, intercept, self.x.iloc[25:])
+
+        cv = ShuffleSplit(25, n_iter=5, test_size=.2, random_state=0)
+
+        for m in self.y:
+            lm = ElasticNetCV(cv=cv).fit(self.x.iloc[:25], self.y[m].iloc[:25])
+
+            self.assertTrue(np.allclose(predictions[m].values, lm.predict(self.x.iloc[25:]), atol=1e-4))
+
+
+class StabilitySelectionTest(unittest.TestCase):
+
+    def setUp(self):
+        warnings.simplefilter('ignore')
+
+        self.tmp_dir = tempfile.mkdtemp()
+
+        rs = np.random.RandomState(0)
+
+        # Response 'm0' driven by feature 'k0' only, response 'm1' pure noise
+        self.x = DataFrame(rs.randn(40, 8), index=['s%d' % i for i in range(40)], columns=['k%d' % i for i in range(8)])
+        self.y = DataFrame({'m0': 2 * self.x['k0'] + rs.randn(40) * .5, 'm1': rs.randn(40)}, columns=['m0', 'm1'])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_resample_masks(self):
+        masks = resample_masks(40, n_resamples=20, test_size=.2, seed=0)
+
+        self.assertEqual(masks.shape, (20, 40))
+        self.assertTrue((masks.sum(1) == 32).all())
+        self.assertTrue((masks == resample_masks(40, n_resamples=20, test_size=.2, seed=0)).all())
+
+    def test_planted_feature(self):
+        coefs = stability_selection(self.x, self.y, '%s/stability.pickle' % self.tmp_dir, n_resamples=20, n_iter=5, seed=0)
+        res = stability_summary(coefs, self.y.columns, self.x.columns).set_index(['response', 'feature'])
+
+        self.assertEqual(coefs.shape, (2, 20, 8))
+
+        self.assertGreaterEqual(res.ix[('m0', 'k0'), 'frequency'], .95)
+        self.assertGreater(res.ix[('m0', 'k0'), 'q0.05'], 0)
+        self.assertTrue(np.allclose(res.ix[('m0', 'k0'), 'coef'], 2, atol=.2))
+
+        # Noise features are shrunk towards zero, even when kept next to a strong feature
+        self.assertLess(res.ix['m0'].drop('k0')['coef_abs'].max(), .25)
+        self.assertLess(res.ix['m1', 'coef_abs'].max(), .25)
+        self.assertLess(res.ix['m1', 'frequency'].mean(), .5)
+
+        # Same seed, same coefficients
+        self.assertTrue(np.array_equal(coefs, stability_selection(self.x, self.y, '%s/stability_2.pickle' % self.tmp_dir, n_resamples=20, n_iter=5, seed=0)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import unittest
+import numpy as np
+from pandas import DataFrame, Series, read_csv
+from yeast_phospho.replicates import replicate_stats, collapse_replicates
+
+replicates_file = '%s/../files/metabol_technical_replicates.tab' % os.path.dirname(os.path.abspath(__file__))
+
+# Technical replicates of preprocess/metabolomics.py before the samplesheet was shipped
+tec_rep = {
+    'BY003_02': 'BY003_01', 'BY003_03': 'BY003_01', 'BY003_04': 'BY003_01',
+    'BY008_02': 'BY008_01', 'BY008_03': 'BY008_01', 'BY008_04': 'BY008_01',
+    'BY012_02': 'BY012_01', 'BY012_03': 'BY012_01', 'BY012_04': 'BY012_01',
+
+    'BY009_03': 'BY009_01', 'BY009_04': 'BY009_01',
+    'BY010_02': 'BY010_01', 'BY010_03': 'BY010_01', 'BY010_04': 'BY010_01',
+    'BY013_02': 'BY013_01', 'BY013_03': 'BY013_01', 'BY013_04': 'BY013_01',
+
+    'BY005_02': 'BY005_01', 'BY005_03': 'BY005_01', 'BY005_04': 'BY005_01',
+    'BY006_02': 'BY006_01', 'BY006_03': 'BY006_01', 'BY006_04': 'BY006_01',
+    'BY007_02': 'BY007_01', 'BY007_03': 'BY007_01', 'BY007_04': 'BY007_01'
+}
+
+
+class ReplicateStatsTest(unittest.TestCase):
+
+    def setUp(self):
+        rs = np.random.RandomState(0)
+
+        samples = ['s%02d' % i for i in range(24)]
+
+        self.df = DataFrame(np.exp(rs.randn(40, len(samples))), index=['m%d' % i for i in range(40)], columns=samples)
+        self.df = self.df.where(rs.rand(*self.df.shape) > .25)
+
+        # Time-points of 1 to 4 replicates, one sample missing from the measurements
+        self.groups = Series(['%dmin' % t for t in rs.choice([0, 5, 10, 15, 20, 25, 30], len(samples))], index=samples)
+        self.groups['s99'] = '5min'
+
+    def test_groupby(self):
+        res = replicate_stats(self.df, self.groups)
+
+        grouped = self.df.groupby(self.groups[self.df.columns].values, axis=1)
+
+        for s, ref in [('mean', grouped.mean()), ('std', grouped.std()), ('count', grouped.count())]:
+            self.assertEqual(list(res[s].columns), list(ref.columns))
+            self.assertTrue(np.allclose(res[s].values, ref.values.astype(np.float64), atol=1e-12, equal_nan=True))
+
+        self.assertTrue(np.allclose(res['cv'].values, (grouped.std() / grouped.mean()).values, atol=1e-12, equal_nan=True))
+
+    def test_collapse_replicates(self):
+        replicates = read_csv(replicates_file, sep='\t', index_col=0)['replicate']
+        self.assertEqual(replicates.to_dict(), tec_rep)
+
+        rs = np.random.RandomState(1)
+
+        samples = sorted(set(tec_rep) | set(tec_rep.values()) | {'BY001_01', 'BY002_01'})
+        df = DataFrame(rs.randn(20, len(samples)), index=['m%d' % i for i in range(20)], columns=samples)
+        df = df.where(rs.rand(*df.shape) > .1)
+
+        ref = df.copy()
+        ref.columns = [tec_rep[c] if c in tec_rep else c for c in ref]
+        ref = DataFrame({c: ref[c].mean(1) if len(ref[c].shape) > 1 else ref[c] for c in ref})
+
+        res = collapse_replicates(df, replicates)
+
+        self.assertEqual(list(res.columns), list(ref.columns))
+        self.assertTrue(np.allclose(res.values, ref.values, atol=1e-12, equal_nan=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from pandas import DataFrame
+from yeast_phospho.results import RegressionStore
+
+
+class RegressionStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store_file = '%s/regressions.npz' % self.tmp_dir
+
+        rs = np.random.RandomState(0)
+        self.betas = DataFrame(rs.normal(size=(3, 2)), index=['TF1', 'TF2', 'TF3'], columns=['m1', 'm2'])
+        self.predictions = DataFrame(rs.normal(size=(4, 2)), index=['s1', 's2', 's3', 's4'], columns=['m1', 'm2'])
+        self.correlations = DataFrame({'variable': ['m1', 'm2', 's1'], 'corr_type': ['metabolites', 'metabolites', 'samples'], 'cor': [.5, -.25, .75]})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, store, mt='without', **kwargs):
+        store.write('TFs', 'Dynamic', mt, self.betas, self.predictions, self.correlations, **kwargs)
+
+    def test_round_trip(self):
+        store = RegressionStore(self.store_file)
+        self.write(store)
+        self.write(store, mt='with')
+
+        self.assertEqual(store.comparisons(), [('TFs', 'Dynamic', 'with'), ('TFs', 'Dynamic', 'without')])
+
+        betas = store.betas('TFs', 'Dynamic', 'without')
+        self.assertEqual(list(betas.index), list(self.betas.index))
+        self.assertEqual(list(betas.columns), list(self.betas.columns))
+        np.testing.assert_array_equal(betas.values, self.betas.values)
+
+        predictions = store.predictions('TFs', 'Dynamic', 'without')
+        self.assertEqual(list(predictions.index), list(self.predictions.index))
+        np.testing.assert_array_equal(predictions.values, self.predictions.values)
+
+        cor = store.correlations([('TFs', 'Dynamic', 'without')])
+        self.assertEqual(list(cor.columns), RegressionStore.columns)
+        self.assertEqual(list(cor['variable']), list(self.correlations['variable']))
+        self.assertEqual(list(cor['corr_type']), list(self.correlations['corr_type']))
+        np.testing.assert_array_equal(cor['cor'].values, self.correlations['cor'].values)
+        self.assertTrue((cor['growth'] == 'without').all())
+
+        self.assertEqual(len(store.correlations()), 2 * len(self.correlations))
+
+    def test_duplicate_refused(self):
+        store = RegressionStore(self.store_file)
+        self.write(store)
+
+        self.assertRaises(ValueError, self.write, store)
+
+    def test_replace(self):
+        store = RegressionStore(self.store_file)
+        self.write(store)
+
+        self.betas *= 2
+        self.write(store, replace=True)
+
+        self.assertEqual(store.comparisons(), [('TFs', 'Dynamic', 'without')])
+        np.testing.assert_array_equal(store.betas('TFs', 'Dynamic', 'without').values, self.betas.values)
+
+    def test_remove(self):
+        store = RegressionStore(self.store_file)
+        self.write(store)
+        self.write(store, mt='with')
+
+        store.remove('TFs', 'Dynamic', 'with')
+
+        self.assertEqual(store.comparisons(), [('TFs', 'Dynamic', 'without')])
+        self.assertFalse(os.path.exists('%s.tmp' % self.store_file))
+        np.testing.assert_array_equal(store.betas('TFs', 'Dynamic', 'without').values, self.betas.values)
+
+    def test_overwrite(self):
+        self.write(RegressionStore(self.store_file))
+
+        store = RegressionStore(self.store_file, overwrite=True)
+
+        self.assertEqual(store.comparisons(), [])
+        self.assertEqual(len(store.correlations()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
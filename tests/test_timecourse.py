@@ -0,0 +1,49 @@
+import unittest
+import numpy as np
+from pandas import DataFrame
+from scipy.interpolate import interp1d, pchip_interpolate
+from yeast_phospho.timecourse import interpolate, fold_change
+
+
+class InterpolateTest(unittest.TestCase):
+
+    def setUp(self):
+        rs = np.random.RandomState(0)
+
+        self.times = np.array([-10., 0, 5, 10, 20, 30, 60, 90, 3])
+        self.new_times = np.array([-10, 5, 9, 15, 25, 44, 79])
+
+        self.df = DataFrame(np.exp(rs.randn(50, len(self.times))), columns=['s%d' % i for i in range(len(self.times))])
+
+        self.missing = self.df.values.copy()
+        self.missing[rs.rand(*self.missing.shape) < .2] = np.NaN
+
+    def test_fold_change(self):
+        ref = DataFrame({g: interp1d(self.times, self.df.ix[g].values)(self.new_times) for g in self.df.index}, index=self.new_times).T
+        ref = np.log2(ref[self.new_times[1:]].div(ref[-10], axis=0))
+
+        res = fold_change(self.df, self.times, self.new_times, -10)
+
+        self.assertTrue(np.allclose(res.values, ref.values, atol=1e-12))
+
+    def test_missing_values(self):
+        order = np.argsort(self.times)
+
+        for method in ['linear', 'pchip']:
+            res = interpolate(self.missing, self.times, self.new_times, method)
+
+            for i, row in enumerate(self.missing[:, order]):
+                measured = np.isfinite(row)
+                x, y = self.times[order][measured], row[measured]
+
+                inside = (self.new_times >= x[0]) & (self.new_times <= x[-1]) if len(x) > 1 else np.zeros(len(self.new_times), dtype=bool)
+
+                if inside.any():
+                    ref = interp1d(x, y)(self.new_times[inside]) if method == 'linear' else pchip_interpolate(x, y, self.new_times[inside])
+                    self.assertTrue(np.allclose(res[i, inside], ref, atol=1e-12))
+
+                self.assertTrue(np.isnan(res[i, ~inside]).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import unittest
+import numpy as np
+from pandas import Series, DataFrame
+from sklearn.linear_model import Ridge
+
+try:
+    from yeast_phospho import utilities
+except ImportError:
+    utilities = None
+
+
+def ridge_activity(x, y, alpha=.1):
+    """
+    Activities of utilities.estimate_activity_with_sklearn
+    """
+    ys = y.dropna()
+    xs = x.ix[ys.index].replace(np.NaN, 0.0)
+    xs = xs.loc[:, xs.sum() != 0]
+
+    lm = Ridge(fit_intercept=True, alpha=alpha).fit(xs, (ys - ys.mean()) / ys.std(ddof=0))
+
+    return dict(zip(*(xs.columns, lm.coef_)))
+
+
+def score_sequence(sequence, pwm, empty_char='-'):
+    return np.array([pwm.ix[sequence[i], i] if sequence[i] != empty_char else .0 for i in range(len(sequence))])
+
+
+def similarity_scores(flanking_regions, pwm, ic, is_kinase_pwm=True):
+    """
+    Scores of utilities.similarity_score_matrix ignoring the central residue, scoring one sequence at a time
+    """
+    central_ind = int(np.floor(pwm.shape[1] / 2))
+    kinase_type = 'S|T' if pwm.ix[:, central_ind].argmax() in 'S|T' else 'Y'
+
+    positions_to_keep = list(pwm.drop(central_ind, axis=1))
+    ic = ic[positions_to_keep]
+
+    bs = (ic * score_sequence(''.join(pwm.apply(lambda x: x.argmax())), pwm)[positions_to_keep]).sum()
+    ws = (ic * score_sequence(''.join(pwm.apply(lambda x: x.argmin())), pwm)[positions_to_keep]).sum()
+
+    sites_to_keep = [s for s, seq in flanking_regions.items() if seq[central_ind] in kinase_type] if is_kinase_pwm else flanking_regions.keys()
+
+    scores = Series({(s, flanking_regions[s]): sum(ic * score_sequence(flanking_regions[s], pwm)[positions_to_keep]) for s in sites_to_keep})
+
+    return (scores - ws) / (bs - ws)
+
+
+@unittest.skipUnless(utilities is not None, 'pymist not installed')
+class RidgeActivitiesTest(unittest.TestCase):
+
+    def test_activities(self):
+        rs = np.random.RandomState(0)
+
+        x = DataFrame((rs.rand(200, 15) < .1).astype(int), index=['s%d' % i for i in range(200)], columns=['k%d' % i for i in range(15)])
+        df = DataFrame(rs.randn(250, 8), index=['s%d' % i for i in range(50, 300)], columns=['c%d' % i for i in range(8)])
+
+        # Conditions with different measured targets
+        df.iloc[:80, :3] = np.NaN
+        df.iloc[rs.rand(250) < .2, 5] = np.NaN
+
+        ref = DataFrame({c: ridge_activity(x, df[c]) for c in df})
+        res = utilities.estimate_activities_with_ridge(x, df)
+
+        self.assertTrue(np.allclose(res.ix[ref.index, ref.columns].values, ref.values, atol=1e-10, equal_nan=True))
+
+
+
+@unittest.skipUnless(utilities is not None, 'pymist not installed')
+class RegressOutTest(unittest.TestCase):
+
+    def test_regress_out_matrix(self):
+        rs = np.random.RandomState(0)
+
+        growth = Series(rs.rand(20), index=['c%d' % i for i in range(20)])
+        df = DataFrame(rs.randn(30, 20) + growth.values * rs.randn(30, 1), index=['m%d' % i for i in range(30)], columns=growth.index)
+
+        # Features with different missing values, and growth missing in one condition
+        df = df.where(rs.rand(*df.shape) >= .15)
+        growth['c3'] = np.NaN
+
+        ref = DataFrame({m: utilities.regress_out(growth, df.ix[m]) for m in df.index}).T
+        residuals, coef = utilities.regress_out_matrix(growth, df)
+
+        self.assertTrue(np.allclose(residuals.ix[ref.index, ref.columns].values, ref.values, atol=1e-10, equal_nan=True))
+        self.assertTrue(residuals['c3'].isnull().all())
+        self.assertEqual(list(coef.columns), ['intercept', 0])
+
+
+@unittest.skipUnless(utilities is not None, 'pymist not installed')
+class RandomisedCellsTest(unittest.TestCase):
+
+    def setUp(self):
+        # Small pool of distinct values, queried cells often collide in a permutation
+        self.matrix = DataFrame([[1., 2., np.NaN], [3., 4., 5.], [np.NaN, 6., 7.]], index=['a', 'b', 'c'], columns=['x', 'y', 'z'])
+        self.cells = [('a', 'x'), ('b', 'y'), ('c', 'z'), ('b', 'z'), ('c', 'y'), ('b', 'y'), ('a', 'z')]
+
+    def test_without_replacement(self):
+        values = utilities.randomised_cells(self.matrix, self.cells, 5000, random_state=0)
+
+        self.assertEqual(values.shape, (len(self.cells), 5000))
+
+        # Distinct cells take distinct values of the pool, a repeated cell the same value and NaN cells stay NaN
+        distinct = values[:5]
+        self.assertTrue((np.sort(distinct, axis=0)[1:] != np.sort(distinct, axis=0)[:-1]).all())
+        self.assertTrue(np.array_equal(values[1], values[5]))
+        self.assertTrue(np.isnan(values[6]).all())
+        self.assertTrue(np.in1d(distinct, [1., 2., 3., 4., 5., 6., 7.]).all())
+
+        # Every value of the pool is drawn uniformly, as randomise_matrix
+        for row in distinct:
+            counts = np.array([(row == v).sum() for v in [1., 2., 3., 4., 5., 6., 7.]])
+            self.assertTrue((np.abs(counts - 5000. / 7) < 5 * np.sqrt(5000. / 7)).all())
+
+    def test_random_state(self):
+        np.testing.assert_array_equal(utilities.randomised_cells(self.matrix, self.cells, 100, random_state=1), utilities.randomised_cells(self.matrix, self.cells, 100, random_state=1))
+
+    def test_missing_cells(self):
+        self.assertRaises(KeyError, utilities.randomised_cells, self.matrix, [('a', 'x'), ('missing', 'x')], 10)
+        self.assertRaises(KeyError, utilities.randomised_cells, self.matrix, [('a', 'missing')], 10)
+
+
+@unittest.skipUnless(utilities is not None, 'pymist not installed')
+class SimilarityScoreTest(unittest.TestCase):
+
+    def setUp(self):
+        rs = np.random.RandomState(0)
+
+        residues = utilities.namespace + ['-']
+        probabilities = [.9 / len(utilities.namespace)] * len(utilities.namespace) + [.1]
+
+        targets = [''.join(rs.choice(utilities.namespace, 15)) for i in range(30)]
+        self.pwm, self.ic = utilities.position_weight_matrix({i: s[:7] + rs.choice(['S', 'T']) + s[8:] for i, s in enumerate(targets)}, utilities.AA_PRIORS_YEAST)
+
+        self.flanking_regions = {'P%d_S%d' % (i, i): ''.join(rs.choice(residues, 15, p=probabilities)) for i in range(300)}
+
+    def test_kinase_pwm(self):
+        ref = similarity_scores(self.flanking_regions, self.pwm, self.ic)
+        res = utilities.similarity_score_matrix(self.flanking_regions, self.pwm, self.ic)
+
+        self.assertEqual(set(res.index), set(ref.index))
+        self.assertTrue(np.allclose(res.ix[ref.index].values, ref.values, atol=1e-12))
+
+    def test_non_kinase_pwm(self):
+        ref = similarity_scores(self.flanking_regions, self.pwm, self.ic, is_kinase_pwm=False)
+        res = utilities.similarity_score_matrix(self.flanking_regions, self.pwm, self.ic, is_kinase_pwm=False)
+
+        self.assertEqual(len(res), len(self.flanking_regions))
+        self.assertTrue(np.allclose(res.ix[ref.index].values, ref.values, atol=1e-12))
+
+
+if __name__ == '__main__':
+    unittest.main()